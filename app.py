@@ -2,8 +2,9 @@ import streamlit as st
 import os
 from utils.auth import check_authentication, login_page, get_user_index_id
 from utils.navigation import setup_navigation
-from utils.config import get_api_keys
+from utils.config import get_api_keys, EMBEDDING_DIMENSIONS
 from utils.index_manager import IndexManager
+from utils.rag import clear_response_cache
 
 # Page configuration
 st.set_page_config(
@@ -26,6 +27,8 @@ if 'document_metadata' not in st.session_state:
     st.session_state.document_metadata = []
 if 'chat_histories' not in st.session_state:
     st.session_state.chat_histories = {}
+if 'recent_messages' not in st.session_state:
+    st.session_state.recent_messages = {}
 if 'current_page' not in st.session_state:
     st.session_state.current_page = 'home'
 
@@ -177,6 +180,33 @@ def render_index_management_page():
     # Advanced operations
     st.markdown("## ⚙️ Дополнительные операции")
     
+    pending_migration = st.session_state.index_manager.has_pending_migration(current_index)
+    if pending_migration or (stats["status"] == "success" and stats["dimension"] != EMBEDDING_DIMENSIONS):
+        with st.expander("🧬 Миграция индекса", expanded=True):
+            if pending_migration:
+                st.warning(
+                    "Предыдущая миграция этого индекса не завершилась. Пересчитанные векторы "
+                    "сохранены; повторный запуск продолжит миграцию."
+                )
+            else:
+                st.warning(
+                    f"Индекс создан для векторов размерности {stats['dimension']}, "
+                    f"а текущая модель использует {EMBEDDING_DIMENSIONS}. "
+                    "Миграция пересчитает все векторы и пересоздаст индекс."
+                )
+            
+            if st.button("Перенести текущий индекс"):
+                with st.spinner("Пересчитываем векторы..."):
+                    result = st.session_state.index_manager.migrate_index(current_index)
+                if result["status"] == "success":
+                    # The recreated index has a new host; drop handles to the old one
+                    from utils.enhanced_document_processor import discard_index_handles
+                    discard_index_handles(current_index)
+                    clear_response_cache()
+                    st.success(result["message"])
+                else:
+                    st.error(result["message"])
+    
     with st.expander("🗑️ Очистка индекса"):
         st.warning("⚠️ Это действие нельзя отменить!")
         
@@ -5,19 +5,27 @@ This module implements a hybrid search system that combines keyword-based BM25 s
 with vector similarity search using Reciprocal Rank Fusion (RRF) for optimal retrieval.
 """
 
+import re
 import numpy as np
-from rank_bm25 import BM25Okapi
 from typing import List, Dict, Tuple, Any, Optional
 import logging
+import math
+import heapq
+from collections import Counter
+from operator import itemgetter
 from dataclasses import dataclass
 import pickle
 import os
+import threading
 from sklearn.metrics.pairwise import cosine_similarity
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Words of three or more letters in any script (digits and underscores excluded)
+_TOKEN_RE = re.compile(r'[^\W\d_]{3,}')
+
 @dataclass
 class SearchResult:
     """Search result with score and metadata."""
@@ -41,9 +49,11 @@ class HybridSearchEngine:
             rrf_k: Parameter for Reciprocal Rank Fusion (default: 60)
         """
         self.rrf_k = rrf_k
-        self.bm25_index = None
+        self.bm25_index = None  # Inverted index: term -> [(document index, term frequency)]
+        self.doc_lengths = []  # Token count per document, for BM25 length normalization
+        self.total_doc_length = 0
         self.documents = []  # List of document texts
-        self.document_embeddings = []  # List of embeddings
+        self.document_embeddings = np.empty((0, 0), dtype=np.float32)  # Embedding matrix, one row per document
         self.chunk_metadata = {}  # chunk_id -> metadata
         self.chunk_id_to_index = {}  # chunk_id -> index in documents list
         self.index_to_chunk_id = {}  # index -> chunk_id
@@ -52,6 +62,10 @@ class HybridSearchEngine:
         self.bm25_k1 = 1.5
         self.bm25_b = 0.75
         
+        # Uploads index new chunks while queries read the same structures; a
+        # search must not see the posting lists ahead of the embedding matrix
+        self._lock = threading.RLock()
+        
         logger.info("Initialized HybridSearchEngine")
     
     def build_index(self, chunks: List[Dict[str, Any]], embeddings: List[np.ndarray]) -> None:
@@ -64,15 +78,53 @@ class HybridSearchEngine:
         """
         logger.info(f"Building hybrid search index with {len(chunks)} chunks")
         
-        # Reset indices
-        self.documents = []
-        self.document_embeddings = embeddings
-        self.chunk_metadata = {}
-        self.chunk_id_to_index = {}
-        self.index_to_chunk_id = {}
+        with self._lock:
+            # Reset indices
+            self.bm25_index = None
+            self.doc_lengths = []
+            self.total_doc_length = 0
+            self.documents = []
+            self.document_embeddings = np.empty((0, 0), dtype=np.float32)
+            self.chunk_metadata = {}
+            self.chunk_id_to_index = {}
+            self.index_to_chunk_id = {}
+            
+            self._add_documents_locked(chunks, embeddings)
+        
+        logger.info("Hybrid search index built successfully")
+    
+    def add_documents(self, chunks: List[Dict[str, Any]], embeddings: List[Any]) -> None:
+        """
+        Add chunks to the index incrementally.
+        
+        Updates the BM25 posting lists and document lengths and appends the
+        embeddings to the matrix; nothing already indexed is rebuilt. Chunks
+        whose chunk_id is already indexed are skipped.
+        
+        Args:
+            chunks: List of document chunks with metadata
+            embeddings: Embedding vectors corresponding to chunks
+        """
+        with self._lock:
+            self._add_documents_locked(chunks, embeddings)
+    
+    def _add_documents_locked(self, chunks: List[Dict[str, Any]], embeddings: List[Any]) -> None:
+        """Body of add_documents; the caller holds the index lock."""
+        new_chunks = []
+        new_embeddings = []
+        for chunk, embedding in zip(chunks, embeddings):
+            if chunk['chunk_id'] not in self.chunk_id_to_index:
+                new_chunks.append(chunk)
+                new_embeddings.append(embedding)
+        
+        if not new_chunks:
+            return
+        
+        if self.bm25_index is None:
+            self.bm25_index = {}
         
-        # Process chunks
-        for i, chunk in enumerate(chunks):
+        for chunk in new_chunks:
+            i = len(self.documents)
             chunk_id = chunk['chunk_id']
             content = chunk['content']
             
@@ -81,29 +133,44 @@ class HybridSearchEngine:
             self.chunk_metadata[chunk_id] = chunk
             self.chunk_id_to_index[chunk_id] = i
             self.index_to_chunk_id[i] = chunk_id
+            
+            self._index_document_tokens(i, self._tokenize_text(content))
         
-        # Build BM25 index
-        self._build_bm25_index()
+        # Append embedding rows
+        new_matrix = np.asarray(new_embeddings, dtype=np.float32)
+        if len(self.document_embeddings) == 0:
+            self.document_embeddings = new_matrix
+        else:
+            self.document_embeddings = np.vstack([self.document_embeddings, new_matrix])
         
-        logger.info("Hybrid search index built successfully")
+        logger.debug(f"Added {len(new_chunks)} chunks to hybrid search index")
+    
+    def _index_document_tokens(self, doc_idx: int, tokens: List[str]) -> None:
+        """Add one document's term frequencies to the posting lists."""
+        for term, tf in Counter(tokens).items():
+            postings = self.bm25_index.get(term)
+            if postings is None:
+                self.bm25_index[term] = [(doc_idx, tf)]
+            else:
+                postings.append((doc_idx, tf))
+        self.doc_lengths.append(len(tokens))
+        self.total_doc_length += len(tokens)
     
     def _build_bm25_index(self) -> None:
         """Build BM25 index from documents."""
+        self.bm25_index = None
+        self.doc_lengths = []
+        self.total_doc_length = 0
+        
         if not self.documents:
             logger.warning("No documents to index")
             return
         
-        # Tokenize documents for BM25
-        tokenized_docs = []
-        for doc in self.documents:
-            # Simple tokenization (can be enhanced with better preprocessing)
-            tokens = self._tokenize_text(doc)
-            tokenized_docs.append(tokens)
+        self.bm25_index = {}
+        for i, doc in enumerate(self.documents):
+            self._index_document_tokens(i, self._tokenize_text(doc))
         
-        # Create BM25 index
-        self.bm25_index = BM25Okapi(tokenized_docs, k1=self.bm25_k1, b=self.bm25_b)
-        
-        logger.debug(f"BM25 index created with {len(tokenized_docs)} documents")
+        logger.debug(f"BM25 index created with {len(self.documents)} documents")
     
     def _tokenize_text(self, text: str) -> List[str]:
         """
@@ -115,18 +182,8 @@ class HybridSearchEngine:
         Returns:
             List of tokens
         """
-        import re
-        
-        # Convert to lowercase
-        text = text.lower()
-        
-        # Remove special characters and split by whitespace
-        tokens = re.findall(r'\b[a-z]+\b', text)
-        
-        # Filter out very short tokens
-        tokens = [token for token in tokens if len(token) > 2]
-        
-        return tokens
+        # One pass of the precompiled pattern; the length filter is part of it
+        return _TOKEN_RE.findall(text.lower())
     
     def search(self, query: str, query_embedding: Optional[np.ndarray] = None,
               top_k: int = 10, alpha: float = 0.5, 
@@ -144,6 +201,13 @@ class HybridSearchEngine:
         Returns:
             List of search results ranked by hybrid score
         """
+        with self._lock:
+            return self._search_locked(query, query_embedding, top_k, alpha, filters)
+    
+    def _search_locked(self, query: str, query_embedding: Optional[np.ndarray],
+                      top_k: int, alpha: float,
+                      filters: Optional[Dict[str, Any]]) -> List[SearchResult]:
+        """Body of search; the caller holds the index lock."""
         if not self.documents:
             logger.warning("No documents indexed")
             return []
@@ -191,20 +255,34 @@ class HybridSearchEngine:
         if not query_tokens:
             return []
         
-        # Get BM25 scores
-        scores = self.bm25_index.get_scores(query_tokens)
-        
-        # Get top k indices
-        top_indices = np.argsort(scores)[::-1][:top_k]
+        # Okapi BM25 over the posting lists of the query terms only
+        n_docs = len(self.doc_lengths)
+        avg_doc_length = (self.total_doc_length / n_docs) or 1.0
+        k1 = self.bm25_k1
+        b = self.bm25_b
+        doc_lengths = self.doc_lengths
+        scores = {}
+        for token in query_tokens:
+            postings = self.bm25_index.get(token)
+            if not postings:
+                continue
+            df = len(postings)
+            idf = math.log((n_docs - df + 0.5) / (df + 0.5) + 1.0)
+            for doc_idx, tf in postings:
+                norm = k1 * (1.0 - b + b * doc_lengths[doc_idx] / avg_doc_length)
+                scores[doc_idx] = scores.get(doc_idx, 0.0) + idf * tf * (k1 + 1.0) / (tf + norm)
+        
+        # Get top k documents
+        top_docs = heapq.nlargest(top_k, scores.items(), key=itemgetter(1))
         
         # Create search results
         results = []
-        for rank, idx in enumerate(top_indices):
-            if scores[idx] > 0:  # Only include positive scores
+        for rank, (idx, score) in enumerate(top_docs):
+            if score > 0:  # Only include positive scores
                 chunk_id = self.index_to_chunk_id[idx]
                 result = SearchResult(
                     chunk_id=chunk_id,
-                    score=float(scores[idx]),
+                    score=float(score),
                     content=self.documents[idx],
                     metadata=self.chunk_metadata[chunk_id],
                     rank=rank + 1
@@ -224,7 +302,7 @@ class HybridSearchEngine:
         Returns:
             List of search results
         """
-        if not self.document_embeddings:
+        if len(self.document_embeddings) == 0:
             logger.warning("No document embeddings available")
             return []
         
@@ -414,6 +492,7 @@ class HybridSearchEngine:
             'chunk_metadata': self.chunk_metadata,
             'chunk_id_to_index': self.chunk_id_to_index,
             'index_to_chunk_id': self.index_to_chunk_id,
+            'doc_lengths': self.doc_lengths,
             'rrf_k': self.rrf_k
         }
         
@@ -440,19 +519,25 @@ class HybridSearchEngine:
                 index_data = pickle.load(f)
             
             self.documents = index_data['documents']
-            self.document_embeddings = index_data['document_embeddings']
+            self.document_embeddings = np.asarray(index_data['document_embeddings'], dtype=np.float32)
             self.chunk_metadata = index_data['chunk_metadata']
             self.chunk_id_to_index = index_data['chunk_id_to_index']
             self.index_to_chunk_id = index_data['index_to_chunk_id']
             self.rrf_k = index_data.get('rrf_k', 60)
             
-            # Load BM25 index
+            # Load BM25 posting lists
+            bm25_index = None
             bm25_filepath = filepath.replace('.pkl', '_bm25.pkl')
             if os.path.exists(bm25_filepath):
                 with open(bm25_filepath, 'rb') as f:
-                    self.bm25_index = pickle.load(f)
+                    bm25_index = pickle.load(f)
+            
+            if isinstance(bm25_index, dict) and 'doc_lengths' in index_data:
+                self.bm25_index = bm25_index
+                self.doc_lengths = index_data['doc_lengths']
+                self.total_doc_length = sum(self.doc_lengths)
             else:
-                # Rebuild BM25 index if not found
+                # Rebuild BM25 index if not found or saved in an older format
                 self._build_bm25_index()
             
             logger.info(f"Search index loaded from {filepath}")
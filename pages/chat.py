@@ -1,7 +1,7 @@
 import streamlit as st
 import uuid
 from datetime import datetime
-from utils.rag import ask_question
+from utils.rag import stream_question
 from utils.enhanced_rag import ask_question_enhanced
 from utils.chat_history import ChatHistoryManager
 from utils.auth import get_user_index_id
@@ -16,8 +16,8 @@ class ChatPage:
         openai_key, pinecone_key, _ = get_api_keys()
         if openai_key and pinecone_key:
             try:
-                from utils.enhanced_document_processor import EnhancedDocumentProcessor
-                self.enhanced_processor = EnhancedDocumentProcessor(openai_key, pinecone_key)
+                from utils.enhanced_document_processor import get_enhanced_processor
+                self.enhanced_processor = get_enhanced_processor(openai_key, pinecone_key)
             except Exception as e:
                 st.warning(f"Не удалось инициализировать улучшенный процессор: {e}")
                 self.enhanced_processor = None
@@ -135,8 +135,7 @@ class ChatPage:
         # Add question to history
         question_message = {
             'type': 'question',
-            'content': question,
-            'timestamp': datetime.now().isoformat()
+            'content': question
         }
         
         self.chat_manager.add_message(
@@ -155,13 +154,13 @@ class ChatPage:
                 answer = ask_question_enhanced(question, vectorstore, self.enhanced_processor)
             else:
                 st.write("⚠️ Используется базовый поиск...")
-                answer = ask_question(question, vectorstore)
+                # Tokens are shown as they are generated; the full text is returned
+                answer = st.write_stream(stream_question(question, vectorstore))
         
         # Add answer to history
         answer_message = {
             'type': 'answer',
-            'content': answer,
-            'timestamp': datetime.now().isoformat()
+            'content': answer
         }
         
         self.chat_manager.add_message(
@@ -1,8 +1,8 @@
 import streamlit as st
-from utils.rag import ask_question
+from utils.rag import ask_question, ask_questions
 from utils.enhanced_rag import ask_question_enhanced
 from utils.auth import get_user_index_id
-from utils.config import get_api_keys
+from utils.config import get_api_keys, EMBEDDING_DIMENSIONS
 import logging
 
 class DebugPage:
@@ -11,8 +11,8 @@ class DebugPage:
         openai_key, pinecone_key, _ = get_api_keys()
         if openai_key and pinecone_key:
             try:
-                from utils.enhanced_document_processor import EnhancedDocumentProcessor
-                self.enhanced_processor = EnhancedDocumentProcessor(openai_key, pinecone_key)
+                from utils.enhanced_document_processor import get_enhanced_processor
+                self.enhanced_processor = get_enhanced_processor(openai_key, pinecone_key)
             except Exception as e:
                 st.warning(f"Не удалось инициализировать улучшенный процессор: {e}")
                 self.enhanced_processor = None
@@ -113,6 +113,9 @@ class DebugPage:
             if question:
                 self._test_search(question, vectorstore, search_method)
         
+        if st.button("📋 Прогнать все тестовые вопросы (базовый поиск)"):
+            self._test_all_questions(test_questions, vectorstore)
+        
         # Direct index query test
         st.markdown("## 🔬 Прямой запрос к индексу")
         
@@ -170,6 +173,15 @@ class DebugPage:
         finally:
             logger.removeHandler(handler)
     
+    def _test_all_questions(self, questions, vectorstore):
+        """Answer all test questions with one batched basic search"""
+        with st.spinner(f"Обработка {len(questions)} вопросов..."):
+            answers = ask_questions(questions, vectorstore)
+        
+        for question, answer in zip(questions, answers):
+            with st.expander(f"❓ {question}"):
+                st.write(answer)
+    
     def _show_sample_vectors(self, vectorstore):
         """Show sample vectors from the index"""
         st.markdown("### 📊 Образцы векторов в индексе")
@@ -180,12 +192,13 @@ class DebugPage:
                 index = vectorstore._index
                 
                 # Try to query with a dummy vector to see what's stored
-                dummy_query = [0.0] * 1536  # OpenAI embedding dimension
+                dummy_query = [0.0] * EMBEDDING_DIMENSIONS  # OpenAI embedding dimension
                 
                 query_result = index.query(
                     vector=dummy_query,
                     top_k=5,
-                    include_metadata=True
+                    include_metadata=True,
+                    include_values=False
                 )
                 
                 st.write(f"Найдено {len(query_result.matches)} векторов в индексе:")
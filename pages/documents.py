@@ -1,6 +1,7 @@
 import streamlit as st
 from datetime import datetime
 from utils.document_manager import DocumentManager
+from utils.rag import clear_response_cache
 
 class DocumentsPage:
     def __init__(self):
@@ -158,6 +159,7 @@ class DocumentsPage:
         if st.session_state.get(f"confirm_delete_{doc.get('id')}", False):
             # Actually delete
             self.doc_manager.delete_document(doc.get('id'))
+            clear_response_cache()
             st.success(f"✅ Документ '{doc.get('filename')}' удален")
             st.rerun()
         else:
@@ -169,6 +171,7 @@ class DocumentsPage:
             with col1:
                 if st.button("✅ Подтвердить", key=f"confirm_yes_{doc.get('id')}"):
                     self.doc_manager.delete_document(doc.get('id'))
+                    clear_response_cache()
                     st.success(f"✅ Документ '{doc.get('filename')}' удален")
                     del st.session_state[f"confirm_delete_{doc.get('id')}"]
                     st.rerun()
@@ -5,8 +5,9 @@ import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from utils.document_manager import DocumentManager
+from utils.rag import clear_response_cache
 from utils.auth import get_user_index_id
-from utils.enhanced_document_processor import EnhancedDocumentProcessor
+from utils.enhanced_document_processor import get_enhanced_processor
 from utils.config import get_api_keys
 from langchain_community.document_loaders import PyPDFLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
@@ -18,7 +19,7 @@ class UploadPage:
         # Initialize enhanced processor
         openai_key, pinecone_key, _ = get_api_keys()
         if openai_key and pinecone_key:
-            self.enhanced_processor = EnhancedDocumentProcessor(openai_key, pinecone_key)
+            self.enhanced_processor = get_enhanced_processor(openai_key, pinecone_key)
         else:
             self.enhanced_processor = None
     
@@ -142,6 +143,9 @@ class UploadPage:
             results = self._process_multiple_pdfs_enhanced(valid_files, index_name)
         else:
             results = self._process_multiple_pdfs_legacy(valid_files, vectorstore, index_name)
+        
+        # Cached answers may not cover the new documents
+        clear_response_cache()
         self._display_results(results)
     
     def _process_multiple_pdfs_enhanced(self, uploaded_files, index_name):
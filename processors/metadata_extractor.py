@@ -6,74 +6,184 @@ title, authors, keywords, publication information, and other relevant metadata.
 """
 
 import re
+import copy
 import fitz  # pymupdf
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, List, Optional, Any, Set, Tuple
 import logging
+import hashlib
+import threading
+from collections import OrderedDict
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Financial content indicators (without DOTALL the formula match stays within one line)
+_FORMULA_RE = re.compile(r'\$.*?\$|\\[a-zA-Z]+\{.*?\}')
+_TABLE_RE = re.compile(r'table\s+\d+|figure\s+\d+', re.IGNORECASE)
+_REFS_RE = re.compile(r'references|bibliography', re.IGNORECASE)
+
+# Abstract is located by its heading (the word at the start of a line, so prose
+# mentioning "abstract" is skipped), then terminated by the first sentinel
+# inside a bounded window (prefer sentinels that start a new line)
+_ABSTRACT_HEAD_RE = re.compile(r'^[ \t]*abstract\b[ \t]*[:.]?\s*', re.IGNORECASE | re.MULTILINE)
+_ABSTRACT_END_RE = re.compile(r'\n\s*(?:Keywords?|JEL|1\.|Introduction)', re.IGNORECASE)
+_ABSTRACT_LOOSE_END_RE = re.compile(r'Keywords?|JEL|1\.|Introduction', re.IGNORECASE)
+_ABSTRACT_WINDOW = 2500
+
+# Anchors that the labelled extractors depend on, tagged in one pass per page
+_ANCHOR_RE = re.compile(
+    r'(?P<abstract>abstract)'
+    r'|(?P<keywords>key\s*words?:|jel\s*(?:classification|codes?):)'
+    r'|(?P<date>(?:date|published|revised):)'
+    r'|(?P<publication>journal|published\s+in|forthcoming\s+in|vol|doi:)',
+    re.IGNORECASE
+)
+_ANCHOR_COUNT = len(_ANCHOR_RE.groupindex)
+
+# Results for re-ingested files, keyed by content hash (uploads arrive under fresh temp paths)
+_METADATA_CACHE_SIZE = 128
+_metadata_cache: 'OrderedDict[Tuple[str, Optional[frozenset]], Dict[str, Any]]' = OrderedDict()
+_metadata_cache_lock = threading.Lock()
+
+
+def _file_digest(pdf_path: str) -> str:
+    """SHA-256 of the file contents."""
+    digest = hashlib.sha256()
+    with open(pdf_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class _PageTextCache:
+    """Plain text and metadata anchors per page, extracted lazily and shared by all extractors."""
+    
+    def __init__(self, doc: fitz.Document):
+        self._doc = doc
+        self._texts: Dict[int, str] = {}
+        self._anchors: Dict[int, Set[str]] = {}
+    
+    def __len__(self) -> int:
+        return len(self._doc)
+    
+    def __getitem__(self, page_num: int) -> str:
+        text = self._texts.get(page_num)
+        if text is None:
+            text = self._texts[page_num] = self._doc[page_num].get_text()
+        return text
+    
+    def anchors(self, page_num: int) -> Set[str]:
+        """Return the anchor groups (abstract, keywords, date, publication) present on a page."""
+        found = self._anchors.get(page_num)
+        if found is None:
+            found = set()
+            for match in _ANCHOR_RE.finditer(self[page_num]):
+                found.add(match.lastgroup)
+                if len(found) == _ANCHOR_COUNT:
+                    break
+            self._anchors[page_num] = found
+        return found
+
+
+def _compile_union(patterns: List[str], flags: int = 0) -> re.Pattern:
+    """
+    Merge a family of single-group patterns into one alternation.
+    
+    The matching alternative is reported by ``match.lastindex`` (1-based
+    position in ``patterns``) and its capture by ``match.group(match.lastindex)``.
+    """
+    return re.compile('|'.join(f'(?:{pattern})' for pattern in patterns), flags)
+
 
 class MetadataExtractor:
     """
     Extracts comprehensive metadata from academic financial papers.
     """
     
+    # Patterns for metadata extraction
+    title_patterns = [
+        r'^([A-Z][^\n]{10,200})$',  # Title case, reasonable length
+        r'(?:TITLE|Title):\s*([^\n]+)',  # Explicit title label
+        r'^([A-Z][A-Z\s]{5,100})$',  # All caps title
+    ]
+    
+    author_patterns = [
+        r'(?:Author|AUTHORS?|By)s?\s*:\s*([^\n]+)',  # Explicit author label
+        # Name line: separators are confined to the line and repetitions bounded to avoid backtracking blowups
+        r'^([A-Z][a-z]+(?:[ \t]+[A-Z][a-z]*\.?){1,3}(?:[ \t]*,[ \t]*[A-Z][a-z]+(?:[ \t]+[A-Z][a-z]*\.?){1,3})*)[ \t]*$',
+        r'([A-Z][a-z]+\s+[A-Z][a-z]+(?:\s*,\s*[A-Z][a-z]+\s+[A-Z][a-z]+)*)',  # Simple name pattern
+    ]
+    
+    keyword_patterns = [
+        r'(?:Keywords?|KEY\s*WORDS?):\s*([^\n]+)',
+        r'(?:JEL\s*Classification|JEL\s*Codes?):\s*([^\n]+)',  # Financial papers often use JEL codes
+    ]
+    
+    publication_patterns = [
+        r'(?:Journal|Published\s+in|Forthcoming\s+in):\s*([^\n]+)',
+        r'([A-Z][a-z]+\s+(?:Journal|Review|of).*?)\s*,?\s*(?:Vol|Volume)',
+        r'(?:DOI|doi):\s*(10\.\d+/[^\s]+)',
+    ]
+    
+    date_patterns = [
+        r'(?:Date|Published|Revised):\s*([A-Z][a-z]+\s+\d{4})',
+        r'(?:Date|Published|Revised):\s*(\d{1,2}/\d{1,2}/\d{4})',
+        r'(?:Date|Published|Revised):\s*(\d{4}-\d{2}-\d{2})',
+        r'(\d{4})',  # Simple year
+    ]
+    
+    # Financial domain keywords
+    financial_keywords = [
+        'asset pricing', 'capm', 'volatility', 'portfolio', 'options', 'derivatives',
+        'risk management', 'market efficiency', 'behavioral finance', 'corporate finance',
+        'capital structure', 'dividend policy', 'merger', 'acquisition', 'ipo',
+        'credit risk', 'liquidity', 'hedge fund', 'mutual fund', 'pension fund',
+        'interest rate', 'bond', 'equity', 'stock', 'return', 'alpha', 'beta',
+        'sharpe ratio', 'var', 'stress test', 'basel', 'regulation', 'compliance'
+    ]
+    
+    # Compiled artifacts shared by all instances, built on first use
+    _compiled = False
+    
     def __init__(self):
-        # Patterns for metadata extraction
-        self.title_patterns = [
-            r'^([A-Z][^\n]{10,200})$',  # Title case, reasonable length
-            r'(?:TITLE|Title):\s*([^\n]+)',  # Explicit title label
-            r'^([A-Z][A-Z\s]{5,100})$',  # All caps title
-        ]
-        
-        self.author_patterns = [
-            r'(?:Author|AUTHORS?|By)s?\s*:\s*([^\n]+)',  # Explicit author label
-            r'^([A-Z][a-z]+(?:\s+[A-Z][a-z]*\.?)+(?:\s*,\s*[A-Z][a-z]+(?:\s+[A-Z][a-z]*\.?)+)*)\s*$',  # Name patterns
-            r'([A-Z][a-z]+\s+[A-Z][a-z]+(?:\s*,\s*[A-Z][a-z]+\s+[A-Z][a-z]+)*)',  # Simple name pattern
-        ]
-        
-        self.keyword_patterns = [
-            r'(?:Keywords?|KEY\s*WORDS?):\s*([^\n]+)',
-            r'(?:JEL\s*Classification|JEL\s*Codes?):\s*([^\n]+)',  # Financial papers often use JEL codes
-        ]
-        
-        self.abstract_patterns = [
-            r'(?:ABSTRACT|Abstract)\s*[:.]?\s*\n(.*?)(?:\n\s*(?:Keywords?|JEL|1\.|Introduction|INTRODUCTION))',
-            r'(?:ABSTRACT|Abstract)\s*[:.]?\s*(.*?)(?:Keywords?|JEL|1\.|Introduction)',
-        ]
-        
-        self.publication_patterns = [
-            r'(?:Journal|Published\s+in|Forthcoming\s+in):\s*([^\n]+)',
-            r'([A-Z][a-z]+\s+(?:Journal|Review|of).*?)\s*,?\s*(?:Vol|Volume)',
-            r'(?:DOI|doi):\s*(10\.\d+/[^\s]+)',
-        ]
-        
-        self.date_patterns = [
-            r'(?:Date|Published|Revised):\s*([A-Z][a-z]+\s+\d{4})',
-            r'(?:Date|Published|Revised):\s*(\d{1,2}/\d{1,2}/\d{4})',
-            r'(?:Date|Published|Revised):\s*(\d{4}-\d{2}-\d{2})',
-            r'(\d{4})',  # Simple year
-        ]
-        
-        # Financial domain keywords
-        self.financial_keywords = [
-            'asset pricing', 'capm', 'volatility', 'portfolio', 'options', 'derivatives',
-            'risk management', 'market efficiency', 'behavioral finance', 'corporate finance',
-            'capital structure', 'dividend policy', 'merger', 'acquisition', 'ipo',
-            'credit risk', 'liquidity', 'hedge fund', 'mutual fund', 'pension fund',
-            'interest rate', 'bond', 'equity', 'stock', 'return', 'alpha', 'beta',
-            'sharpe ratio', 'var', 'stress test', 'basel', 'regulation', 'compliance'
-        ]
-    
-    def extract_metadata(self, pdf_path: str) -> Dict[str, Any]:
+        self._ensure_compiled()
+    
+    @classmethod
+    def _ensure_compiled(cls) -> None:
+        """Compile pattern families and translate tables once per process."""
+        if cls._compiled:
+            return
+        
+        # Each family is scanned once per page via a single alternation.
+        # Labelled dates take precedence over a bare year, so the year
+        # pattern stays a separate fallback scan. Title patterns are tried
+        # one by one: a rejected match of one pattern must not hide the
+        # matches of the next.
+        cls._title_res = [re.compile(pattern, re.MULTILINE | re.IGNORECASE) 
+                          for pattern in cls.title_patterns]
+        cls._keyword_re = _compile_union(cls.keyword_patterns, re.MULTILINE | re.IGNORECASE)
+        cls._publication_re = _compile_union(cls.publication_patterns, re.MULTILINE | re.IGNORECASE)
+        cls._labelled_date_re = _compile_union(cls.date_patterns[:-1])
+        cls._year_re = re.compile(cls.date_patterns[-1])
+        
+        # Deletion tables for characters tolerated in titles / author names
+        cls._title_allowed = str.maketrans('', '', ' :-.,()[]')
+        cls._author_allowed = str.maketrans('', '', ' .-')
+        
+        cls._compiled = True
+    
+    def extract_metadata(self, pdf_path: str, fields: Optional[Set[str]] = None) -> Dict[str, Any]:
         """
         Extract comprehensive metadata from PDF document.
         
         Args:
             pdf_path: Path to PDF file
+            fields: Optional subset of metadata sections to compute (e.g. {'title', 'abstract'});
+                    all sections are computed when None
             
         Returns:
             Dictionary containing extracted metadata
@@ -81,24 +191,73 @@ class MetadataExtractor:
         logger.info(f"Extracting metadata from: {pdf_path}")
         
         try:
+            cache_key = (_file_digest(pdf_path), frozenset(fields) if fields is not None else None)
+            with _metadata_cache_lock:
+                cached = _metadata_cache.get(cache_key)
+                if cached is not None:
+                    _metadata_cache.move_to_end(cache_key)
+            if cached is not None:
+                logger.info(f"Using cached metadata for: {pdf_path}")
+                # Deep copy: callers may mutate nested authors / publication_info
+                metadata = copy.deepcopy(cached)
+                metadata['file_path'] = pdf_path
+                metadata['extraction_date'] = datetime.now().isoformat()
+                return metadata
+            
             doc = fitz.open(pdf_path)
             
+            # Fail fast: nothing to scan in locked or image-only documents
+            if doc.is_encrypted and not doc.authenticate(""):
+                doc.close()
+                logger.warning(f"Skipping encrypted PDF: {pdf_path}")
+                return {
+                    'file_path': pdf_path,
+                    'extraction_date': datetime.now().isoformat(),
+                    'encrypted': True
+                }
+            
+            pages = _PageTextCache(doc)
+            sample_chars = sum(len(pages[page_num].strip()) for page_num in range(min(3, len(pages))))
+            if sample_chars < 50:
+                metadata = {
+                    'file_path': pdf_path,
+                    'extraction_date': datetime.now().isoformat(),
+                    'basic_metadata': self._extract_basic_metadata(doc),
+                    'empty_or_scanned': True
+                }
+                doc.close()
+                logger.warning(f"No extractable text in first pages, skipping content extraction: {pdf_path}")
+                return metadata
+            
+            # Only run the extractors whose output is requested
+            steps = {
+                'basic_metadata': lambda: self._extract_basic_metadata(doc),
+                'title': lambda: self._extract_title(doc, pages),
+                'authors': lambda: self._extract_authors(pages),
+                'abstract': lambda: self._extract_abstract(pages),
+                'keywords': lambda: self._extract_keywords(pages),
+                'publication_info': lambda: self._extract_publication_info(pages),
+                'date': lambda: self._extract_date(doc, pages),
+                'financial_indicators': lambda: self._detect_financial_content(pages),
+                'document_stats': lambda: self._calculate_document_stats(pages)
+            }
+            
             # Extract metadata
             metadata = {
                 'file_path': pdf_path,
-                'extraction_date': datetime.now().isoformat(),
-                'basic_metadata': self._extract_basic_metadata(doc),
-                'title': self._extract_title(doc),
-                'authors': self._extract_authors(doc),
-                'abstract': self._extract_abstract(doc),
-                'keywords': self._extract_keywords(doc),
-                'publication_info': self._extract_publication_info(doc),
-                'date': self._extract_date(doc),
-                'financial_indicators': self._detect_financial_content(doc),
-                'document_stats': self._calculate_document_stats(doc)
+                'extraction_date': datetime.now().isoformat()
             }
+            for name, step in steps.items():
+                if fields is None or name in fields:
+                    metadata[name] = step()
             
             doc.close()
+            
+            with _metadata_cache_lock:
+                _metadata_cache[cache_key] = copy.deepcopy(metadata)
+                if len(_metadata_cache) > _METADATA_CACHE_SIZE:
+                    _metadata_cache.popitem(last=False)
+            
             logger.info(f"Metadata extraction completed for: {pdf_path}")
             return metadata
             
@@ -120,8 +279,13 @@ class MetadataExtractor:
             'page_count': len(doc)
         }
     
-    def _extract_title(self, doc: fitz.Document) -> Optional[str]:
+    def _extract_title(self, doc: fitz.Document, pages: _PageTextCache) -> Optional[str]:
         """Extract paper title from first few pages."""
+        # A clean PDF metadata title avoids the layout walk entirely
+        pdf_title = doc.metadata.get('title', '')
+        if pdf_title and self._is_valid_title(pdf_title):
+            return pdf_title
+        
         # Check first 3 pages for title
         for page_num in range(min(3, len(doc))):
             page = doc[page_num]
@@ -133,54 +297,40 @@ class MetadataExtractor:
                 return title_candidate
             
             # Try pattern matching
-            page_text = page.get_text()
-            for pattern in self.title_patterns:
-                match = re.search(pattern, page_text, re.MULTILINE | re.IGNORECASE)
+            page_text = pages[page_num]
+            for title_re in self._title_res:
+                match = title_re.search(page_text)
                 if match:
                     candidate = match.group(1).strip()
                     if self._is_valid_title(candidate):
                         return candidate
         
-        # Fallback to PDF metadata title
-        pdf_title = doc.metadata.get('title', '')
-        if pdf_title and self._is_valid_title(pdf_title):
-            return pdf_title
-        
         return None
     
     def _find_title_by_font_size(self, text_dict: Dict) -> Optional[str]:
         """Find title based on font size analysis."""
-        font_sizes = []
-        text_by_font_size = {}
+        # Track the longest text with the largest font size in a single pass
+        best_size = -1.0
+        best_text = ""
         
-        # Collect all font sizes and associated text
         for block in text_dict.get("blocks", []):
             if "lines" not in block:
                 continue
             
             for line in block["lines"]:
                 for span in line["spans"]:
-                    font_size = span["size"]
                     text = span["text"].strip()
                     
-                    if text and len(text) > 10:  # Ignore very short text
-                        font_sizes.append(font_size)
-                        if font_size not in text_by_font_size:
-                            text_by_font_size[font_size] = []
-                        text_by_font_size[font_size].append(text)
-        
-        if not font_sizes:
-            return None
-        
-        # Find the largest font size
-        max_font_size = max(font_sizes)
-        title_candidates = text_by_font_size.get(max_font_size, [])
+                    if len(text) > 10:  # Ignore very short text
+                        font_size = span["size"]
+                        if font_size > best_size:
+                            best_size = font_size
+                            best_text = text
+                        elif font_size == best_size and len(text) > len(best_text):
+                            best_text = text
         
-        # Return the longest text with the largest font size
-        if title_candidates:
-            title = max(title_candidates, key=len)
-            if self._is_valid_title(title):
-                return title
+        if best_text and self._is_valid_title(best_text):
+            return best_text
         
         return None
     
@@ -194,20 +344,20 @@ class MetadataExtractor:
             return False
         
         # Should not contain too many special characters
-        special_char_ratio = sum(1 for c in text if not c.isalnum() and c not in ' :-.,()[]') / len(text)
-        if special_char_ratio > 0.3:
+        stripped = text.translate(self._title_allowed)
+        special_char_count = len(stripped) - sum(map(str.isalnum, stripped))
+        if special_char_count / len(text) > 0.3:
             return False
         
         return True
     
-    def _extract_authors(self, doc: fitz.Document) -> List[str]:
+    def _extract_authors(self, pages: _PageTextCache) -> List[str]:
         """Extract author names from the document."""
         authors = []
         
         # Check first few pages for author information
-        for page_num in range(min(3, len(doc))):
-            page = doc[page_num]
-            page_text = page.get_text()
+        for page_num in range(min(3, len(pages))):
+            page_text = pages[page_num]
             
             for pattern in self.author_patterns:
                 matches = re.findall(pattern, page_text, re.MULTILINE)
@@ -219,14 +369,14 @@ class MetadataExtractor:
                     author_names = self._parse_author_names(match)
                     authors.extend(author_names)
         
-        # Remove duplicates and clean up
-        unique_authors = []
+        # Remove duplicates and clean up (dict keeps insertion order)
+        unique_authors = {}
         for author in authors:
             cleaned = self._clean_author_name(author)
             if cleaned and cleaned not in unique_authors and self._is_valid_author_name(cleaned):
-                unique_authors.append(cleaned)
+                unique_authors[cleaned] = None
         
-        return unique_authors[:10]  # Limit to reasonable number
+        return list(unique_authors)[:10]  # Limit to reasonable number
     
     def _parse_author_names(self, author_text: str) -> List[str]:
         """Parse multiple author names from text."""
@@ -261,24 +411,29 @@ class MetadataExtractor:
             return False
         
         # Should not contain too many special characters
-        if sum(1 for c in name if not c.isalpha() and c not in ' .-') > 3:
+        stripped = name.translate(self._author_allowed)
+        if len(stripped) - sum(map(str.isalpha, stripped)) > 3:
             return False
         
         return True
     
-    def _extract_abstract(self, doc: fitz.Document) -> Optional[str]:
+    def _extract_abstract(self, pages: _PageTextCache) -> Optional[str]:
         """Extract abstract from the document."""
         # Check first few pages for abstract
-        for page_num in range(min(3, len(doc))):
-            page = doc[page_num]
-            page_text = page.get_text()
+        for page_num in range(min(3, len(pages))):
+            if 'abstract' not in pages.anchors(page_num):
+                continue
             
-            for pattern in self.abstract_patterns:
-                match = re.search(pattern, page_text, re.MULTILINE | re.IGNORECASE | re.DOTALL)
-                if match:
-                    abstract = match.group(1).strip()
-                    if self._is_valid_abstract(abstract):
-                        return abstract
+            # Try each heading until one yields a valid abstract
+            page_text = pages[page_num]
+            for heading in _ABSTRACT_HEAD_RE.finditer(page_text):
+                segment = page_text[heading.end():heading.end() + _ABSTRACT_WINDOW]
+                for end_re in (_ABSTRACT_END_RE, _ABSTRACT_LOOSE_END_RE):
+                    end = end_re.search(segment)
+                    if end:
+                        abstract = segment[:end.start()].strip()
+                        if self._is_valid_abstract(abstract):
+                            return abstract
         
         return None
     
@@ -294,27 +449,32 @@ class MetadataExtractor:
         
         return True
     
-    def _extract_keywords(self, doc: fitz.Document) -> List[str]:
+    def _extract_keywords(self, pages: _PageTextCache) -> List[str]:
         """Extract keywords from the document."""
         keywords = []
         
         # Check first few pages for keywords
-        for page_num in range(min(3, len(doc))):
-            page = doc[page_num]
-            page_text = page.get_text()
+        for page_num in range(min(3, len(pages))):
+            if 'keywords' not in pages.anchors(page_num):
+                continue
             
-            for pattern in self.keyword_patterns:
-                match = re.search(pattern, page_text, re.MULTILINE | re.IGNORECASE)
-                if match:
-                    keyword_text = match.group(1).strip()
-                    # Split keywords by common separators
-                    keyword_list = re.split(r'[,;]', keyword_text)
-                    keywords.extend([kw.strip() for kw in keyword_list if kw.strip()])
+            # First match of each keyword pattern on the page
+            seen_patterns = set()
+            for match in self._keyword_re.finditer(pages[page_num]):
+                if match.lastindex in seen_patterns:
+                    continue
+                seen_patterns.add(match.lastindex)
+                
+                keyword_text = match.group(match.lastindex).strip()
+                # Split keywords by common separators
+                keyword_list = re.split(r'[,;]', keyword_text)
+                keywords.extend([kw.strip() for kw in keyword_list if kw.strip()])
+                
+                if len(seen_patterns) == len(self.keyword_patterns):
+                    break
         
         # Also detect financial keywords from content
-        full_text = ""
-        for page_num in range(min(5, len(doc))):
-            full_text += doc[page_num].get_text().lower()
+        full_text = "".join([pages[page_num] for page_num in range(min(5, len(pages)))]).lower()
         
         detected_keywords = []
         for keyword in self.financial_keywords:
@@ -323,14 +483,14 @@ class MetadataExtractor:
         
         # Combine and deduplicate
         all_keywords = keywords + detected_keywords
-        unique_keywords = []
+        unique_keywords = {}
         for kw in all_keywords:
-            if kw not in unique_keywords and len(kw) > 2:
-                unique_keywords.append(kw)
+            if len(kw) > 2 and kw not in unique_keywords:
+                unique_keywords[kw] = None
         
-        return unique_keywords[:20]  # Limit to reasonable number
+        return list(unique_keywords)[:20]  # Limit to reasonable number
     
-    def _extract_publication_info(self, doc: fitz.Document) -> Dict[str, Optional[str]]:
+    def _extract_publication_info(self, pages: _PageTextCache) -> Dict[str, Optional[str]]:
         """Extract publication information."""
         pub_info = {
             'journal': None,
@@ -342,21 +502,27 @@ class MetadataExtractor:
         }
         
         # Check first few pages
-        for page_num in range(min(3, len(doc))):
-            page = doc[page_num]
-            page_text = page.get_text()
+        for page_num in range(min(3, len(pages))):
+            if 'publication' not in pages.anchors(page_num):
+                continue
             
-            for pattern in self.publication_patterns:
-                match = re.search(pattern, page_text, re.MULTILINE | re.IGNORECASE)
-                if match:
-                    if 'doi' in pattern.lower():
-                        pub_info['doi'] = match.group(1)
-                    else:
-                        pub_info['journal'] = match.group(1)
+            # First match of each publication pattern on the page
+            page_matches = {}
+            for match in self._publication_re.finditer(pages[page_num]):
+                page_matches.setdefault(match.lastindex, match.group(match.lastindex))
+                if len(page_matches) == len(self.publication_patterns):
+                    break
+            
+            # Later patterns take precedence, as with the sequential scan
+            for pattern_num, value in sorted(page_matches.items()):
+                if 'doi' in self.publication_patterns[pattern_num - 1].lower():
+                    pub_info['doi'] = value
+                else:
+                    pub_info['journal'] = value
         
         return pub_info
     
-    def _extract_date(self, doc: fitz.Document) -> Optional[str]:
+    def _extract_date(self, doc: fitz.Document, pages: _PageTextCache) -> Optional[str]:
         """Extract publication or creation date."""
         # Check document metadata first
         creation_date = doc.metadata.get('creationDate', '')
@@ -364,29 +530,29 @@ class MetadataExtractor:
             return creation_date
         
         # Check document content
-        for page_num in range(min(3, len(doc))):
-            page = doc[page_num]
-            page_text = page.get_text()
+        for page_num in range(min(3, len(pages))):
+            page_text = pages[page_num]
             
-            for pattern in self.date_patterns:
-                match = re.search(pattern, page_text)
-                if match:
-                    return match.group(1)
+            match = None
+            if 'date' in pages.anchors(page_num):
+                match = self._labelled_date_re.search(page_text)
+            match = match or self._year_re.search(page_text)
+            if match:
+                return match.group(match.lastindex)
         
         return None
     
-    def _detect_financial_content(self, doc: fitz.Document) -> Dict[str, Any]:
+    def _detect_financial_content(self, pages: _PageTextCache) -> Dict[str, Any]:
         """Detect financial content indicators."""
-        full_text = ""
-        for page_num in range(min(10, len(doc))):  # Check first 10 pages
-            full_text += doc[page_num].get_text().lower()
+        # Check first 10 pages
+        full_text = "".join([pages[page_num] for page_num in range(min(10, len(pages)))]).lower()
         
         indicators = {
-            'has_mathematical_formulas': bool(re.search(r'\$.*?\$|\\[a-zA-Z]+\{.*?\}', full_text)),
+            'has_mathematical_formulas': bool(_FORMULA_RE.search(full_text)),
             'has_financial_terms': False,
             'financial_term_count': 0,
-            'has_tables': bool(re.search(r'table\s+\d+|figure\s+\d+', full_text, re.IGNORECASE)),
-            'has_references': bool(re.search(r'references|bibliography', full_text, re.IGNORECASE)),
+            'has_tables': bool(_TABLE_RE.search(full_text)),
+            'has_references': bool(_REFS_RE.search(full_text)),
             'estimated_academic_level': 'research'
         }
         
@@ -401,20 +567,56 @@ class MetadataExtractor:
         
         return indicators
     
-    def _calculate_document_stats(self, doc: fitz.Document) -> Dict[str, Any]:
+    def _calculate_document_stats(self, pages: _PageTextCache) -> Dict[str, Any]:
         """Calculate document statistics."""
         total_chars = 0
         total_words = 0
         
-        for page_num in range(len(doc)):
-            page_text = doc[page_num].get_text()
+        for page_num in range(len(pages)):
+            page_text = pages[page_num]
             total_chars += len(page_text)
             total_words += len(page_text.split())
         
         return {
-            'page_count': len(doc),
+            'page_count': len(pages),
             'total_characters': total_chars,
             'total_words': total_words,
-            'avg_words_per_page': total_words / len(doc) if len(doc) > 0 else 0,
+            'avg_words_per_page': total_words / len(pages) if len(pages) > 0 else 0,
             'estimated_reading_time_minutes': total_words / 200  # Assuming 200 words per minute
-        }
\ No newline at end of file
+        }
+
+
+_shared_extractor: Optional[MetadataExtractor] = None
+
+
+def get_metadata_extractor() -> MetadataExtractor:
+    """Return a process-wide MetadataExtractor instance."""
+    global _shared_extractor
+    if _shared_extractor is None:
+        _shared_extractor = MetadataExtractor()
+    return _shared_extractor
+
+
+def _extract_one(pdf_path: str, fields: Optional[Set[str]] = None) -> Dict[str, Any]:
+    """Worker entry point: reuse the per-process extractor."""
+    return get_metadata_extractor().extract_metadata(pdf_path, fields)
+
+
+def extract_metadata_batch(pdf_paths: List[str], max_workers: Optional[int] = None,
+                           fields: Optional[Set[str]] = None) -> List[Dict[str, Any]]:
+    """
+    Extract metadata from several PDFs in parallel worker processes.
+    
+    Args:
+        pdf_paths: Paths to PDF files
+        max_workers: Number of worker processes (defaults to CPU count)
+        fields: Optional subset of metadata sections to compute
+        
+    Returns:
+        List of metadata dictionaries in the same order as pdf_paths
+    """
+    if len(pdf_paths) <= 1:
+        return [_extract_one(pdf_path, fields) for pdf_path in pdf_paths]
+    
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(partial(_extract_one, fields=fields), pdf_paths))
\ No newline at end of file
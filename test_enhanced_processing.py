@@ -6,7 +6,9 @@ Tests the system with sample financial PDF documents
 
 import os
 import sys
+import importlib
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Add the current directory to path for imports
 sys.path.append(str(Path(__file__).parent))
@@ -59,38 +61,54 @@ def test_enhanced_processing():
     for pdf_file in pdf_files:
         print(f"  • {pdf_file.name}")
     
-    # Test with first document
-    test_pdf = pdf_files[0]
-    print(f"\n🔬 Testing with: {test_pdf.name}")
+    # Test with all documents, one at a time (the processor's shared caches and
+    # search index are not meant for concurrent uploads)
+    print(f"\n🔬 Testing with {len(pdf_files)} documents")
     print("-" * 50)
     
     try:
-        # Process document
-        result = processor.process_document(
-            str(test_pdf),
-            "pdf-qa-test-v3",  # Test index
-            document_id=None
-        )
+        # Process documents
+        results = [
+            processor.process_document(
+                str(pdf_file),
+                "pdf-qa-test-v3",  # Test index
+                document_id=None
+            )
+            for pdf_file in pdf_files
+        ]
         
-        if result['status'] == 'success':
-            print("✅ Document processing successful!")
-            print(f"📄 Document Title: {result['document_title']}")
-            print(f"📊 Chunks Created: {result['chunks_created']}")
-            print(f"📝 Sections Detected: {result['sections_detected']}")
-            print(f"🧮 Has Formulas: {result['has_formulas']}")
-            print(f"📋 Has Tables: {result['has_tables']}")
+        all_succeeded = True
+        for pdf_file, result in zip(pdf_files, results):
+            print(f"\n📁 {pdf_file.name}")
             
-            # Processing stats
-            stats = result['processing_stats']
-            print(f"\n📈 Processing Statistics:")
-            print(f"  • Total Pages: {stats['total_pages']}")
-            print(f"  • Total Chunks: {stats['total_chunks']}")
-            print(f"  • Average Chunk Size: {stats['avg_chunk_size']:.0f} chars")
-            print(f"  • Formula Chunks: {stats['formula_chunks']}")
-            print(f"  • Table Chunks: {stats['table_chunks']}")
-            
-        else:
-            print(f"❌ Document processing failed: {result.get('error_message', 'Unknown error')}")
+            if result['status'] == 'success':
+                print("✅ Document processing successful!")
+                print(f"📄 Document Title: {result['document_title']}")
+                print(f"📊 Chunks Created: {result['chunks_created']}")
+                print(f"📝 Sections Detected: {result['sections_detected']}")
+                print(f"🧮 Has Formulas: {result['has_formulas']}")
+                print(f"📋 Has Tables: {result['has_tables']}")
+                
+                # Processing stats
+                stats = result['processing_stats']
+                print(f"\n📈 Processing Statistics:")
+                print(f"  • Total Pages: {stats['total_pages']}")
+                print(f"  • Total Chunks: {stats['total_chunks']}")
+                print(f"  • Average Chunk Size: {stats['avg_chunk_size']:.0f} chars")
+                print(f"  • Formula Chunks: {stats['formula_chunks']}")
+                print(f"  • Table Chunks: {stats['table_chunks']}")
+                
+            else:
+                print(f"❌ Document processing failed: {result.get('error_message', 'Unknown error')}")
+                all_succeeded = False
+        
+        successful = [result for result in results if result['status'] == 'success']
+        print(f"\n📦 Totals across {len(successful)}/{len(results)} documents:")
+        print(f"  • Chunks Created: {sum(r['chunks_created'] for r in successful)}")
+        print(f"  • Sections Detected: {sum(r['sections_detected'] for r in successful)}")
+        print(f"  • Formula Chunks: {sum(r['processing_stats']['formula_chunks'] for r in successful)}")
+        
+        if not all_succeeded:
             return False
         
         # Test query processing
@@ -103,16 +121,10 @@ def test_enhanced_processing():
             "What are the key findings?"
         ]
         
-        for question in test_questions:
+        def print_query_result(question, query_result):
             print(f"\n❓ Question: {question}")
             
             try:
-                query_result = processor.query_documents(
-                    question=question,
-                    index_name="pdf-qa-test-v3",
-                    top_k=3
-                )
-                
                 if query_result['status'] == 'success':
                     print("✅ Query processed successfully")
                     
@@ -131,6 +143,15 @@ def test_enhanced_processing():
                 
             except Exception as e:
                 print(f"❌ Query error: {e}")
+        
+        # One batched embeddings request for all questions; searches and answers
+        # run concurrently and each result is printed as soon as it arrives
+        processor.query_documents_batch(
+            test_questions,
+            index_name="pdf-qa-test-v3",
+            top_k=3,
+            on_result=print_query_result
+        )
                 
         # System statistics
         print(f"\n📊 System Statistics")
@@ -139,6 +160,10 @@ def test_enhanced_processing():
         print(f"📚 Citations indexed: {stats['citations_count']}")
         print(f"📖 Documents indexed: {stats['documents_indexed']}")
         
+        cache_stats = processor.cache.stats()
+        print(f"🗄️  Query cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses "
+              f"(hit rate {cache_stats['hit_rate']:.0%})")
+        
         processors_status = stats['processors_initialized']
         print(f"🔧 Components initialized:")
         for component, status in processors_status.items():
@@ -158,53 +183,35 @@ def test_individual_components():
     print(f"\n🧪 Testing Individual Components")
     print("=" * 40)
     
-    # Test PDF processor
-    try:
-        from processors.pdf_processor import EnhancedPDFProcessor
-        pdf_processor = EnhancedPDFProcessor()
-        print("✅ EnhancedPDFProcessor initialized")
-    except Exception as e:
-        print(f"❌ EnhancedPDFProcessor error: {e}")
-    
-    # Test metadata extractor
-    try:
-        from processors.metadata_extractor import MetadataExtractor
-        metadata_extractor = MetadataExtractor()
-        print("✅ MetadataExtractor initialized")
-    except Exception as e:
-        print(f"❌ MetadataExtractor error: {e}")
-    
-    # Test smart chunker
-    try:
-        from utils.smart_chunker import SmartChunker
-        smart_chunker = SmartChunker()
-        print("✅ SmartChunker initialized")
-    except Exception as e:
-        print(f"❌ SmartChunker error: {e}")
-    
-    # Test citation manager
-    try:
-        from utils.citation_manager import CitationManager
-        citation_manager = CitationManager()
-        print("✅ CitationManager initialized")
-    except Exception as e:
-        print(f"❌ CitationManager error: {e}")
-    
-    # Test hybrid search
-    try:
-        from models.hybrid_search import HybridSearchEngine
-        search_engine = HybridSearchEngine()
-        print("✅ HybridSearchEngine initialized")
-    except Exception as e:
-        print(f"❌ HybridSearchEngine error: {e}")
-    
-    # Test response formatter
-    try:
-        from utils.response_formatter import ResponseFormatter
-        formatter = ResponseFormatter()
-        print("✅ ResponseFormatter initialized")
-    except Exception as e:
-        print(f"❌ ResponseFormatter error: {e}")
+    # Shared-instance factories where available, so the integration test
+    # reuses these components instead of loading their models again
+    components = [
+        ("processors.pdf_processor", "get_pdf_processor"),
+        ("processors.metadata_extractor", "get_metadata_extractor"),
+        ("utils.smart_chunker", "get_smart_chunker"),
+        ("utils.citation_manager", "CitationManager"),
+        ("models.hybrid_search", "HybridSearchEngine"),
+        ("utils.response_formatter", "ResponseFormatter"),
+    ]
+    
+    def init_component(module_path, factory_name):
+        module = importlib.import_module(module_path)
+        return getattr(module, factory_name)()
+    
+    # Initializers are independent, so import and construct them concurrently
+    with ThreadPoolExecutor(max_workers=len(components)) as executor:
+        futures = {
+            executor.submit(init_component, module_path, factory_name): factory_name
+            for module_path, factory_name in components
+        }
+        
+        for future in as_completed(futures):
+            factory_name = futures[future]
+            try:
+                future.result()
+                print(f"✅ {factory_name} initialized")
+            except Exception as e:
+                print(f"❌ {factory_name} error: {e}")
 
 if __name__ == "__main__":
     print("🧪 Enhanced Document Processing v3 Test Suite")
@@ -1,19 +1,26 @@
 import streamlit as st
+from types import MappingProxyType
 
-# Team members
+# Team members (list keeps the display order for the login selectbox)
 TEAM_MEMBERS = ["Стас", "Макс", "Вова", "Семен"]
+_TEAM_MEMBER_SET = frozenset(TEAM_MEMBERS)
 
 # Username to index-safe mapping
-USERNAME_TO_INDEX = {
+USERNAME_TO_INDEX = MappingProxyType({
     "Стас": "stas",
     "Макс": "max", 
     "Вова": "vova",
     "Семен": "semen"
-}
+})
+_index_id_for = USERNAME_TO_INDEX.get
+
+# Login selectbox options and their display labels, built once
+_LOGIN_OPTIONS = ("",) + tuple(TEAM_MEMBERS)
+_LOGIN_LABELS = MappingProxyType({"": "Выберите пользователя...", **{member: member for member in TEAM_MEMBERS}})
 
 def check_authentication():
     """Check if user is authenticated"""
-    return st.session_state.get('authenticated', False) and st.session_state.get('username') in TEAM_MEMBERS
+    return st.session_state.get('authenticated', False) and st.session_state.get('username') in _TEAM_MEMBER_SET
 
 def login_page():
     """Display login page"""
@@ -33,9 +40,9 @@ def login_page():
         # User selection
         selected_user = st.selectbox(
             "Имя пользователя:",
-            options=[""] + TEAM_MEMBERS,
+            options=_LOGIN_OPTIONS,
             index=0,
-            format_func=lambda x: "Выберите пользователя..." if x == "" else x
+            format_func=_LOGIN_LABELS.__getitem__
         )
         
         # Login button
@@ -64,4 +71,5 @@ def get_current_user():
 
 def get_user_index_id(username):
     """Get index-safe user ID"""
-    return USERNAME_TO_INDEX.get(username, username.lower())
\ No newline at end of file
+    # Lowercase only for users missing from the mapping
+    return _index_id_for(username) or username.lower()
\ No newline at end of file
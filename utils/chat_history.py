@@ -1,81 +1,314 @@
 import streamlit as st
+import os
 import json
+import time
+import heapq
+import logging
+import tempfile
+from collections import deque
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from itertools import islice
+from typing import List, Dict, Any, Optional, Tuple
+from utils.auth import get_user_index_id
+
+# orjson is optional; the stdlib json module is the fallback serializer
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+# fcntl is POSIX-only; without it logs are still appended but never compacted
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Directory with one append-only JSONL history log per user
+CHAT_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'chat')
+
+# A log is compacted on load once it holds this many more records than live
+# messages (trimmed, cleared and deleted messages pile up there)
+LOG_COMPACTION_SLACK = 500
+
+# Messages kept per conversation
+CONVERSATION_MESSAGES_LIMIT = 50
+
+# Size of the per-user recent-messages feed. It matches the per-conversation
+# limit, so no message in the feed can have been trimmed from its conversation.
+RECENT_MESSAGES_LIMIT = CONVERSATION_MESSAGES_LIMIT
+
+# (epoch second, ISO string) of the last generated timestamp
+_timestamp_cache = (None, '')
+
+def current_timestamp() -> str:
+    """ISO timestamp for a new message, formatted at most once per second"""
+    global _timestamp_cache
+    seconds = int(time.time())
+    if _timestamp_cache[0] != seconds:
+        _timestamp_cache = (seconds, datetime.fromtimestamp(seconds).isoformat())
+    return _timestamp_cache[1]
+
+def _encode_record(record: Dict[str, Any]) -> bytes:
+    """Serialize a history log record as one UTF-8 JSON line"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(record, default=str, option=orjson.OPT_APPEND_NEWLINE)
+    return (json.dumps(record, ensure_ascii=False, default=str) + '\n').encode('utf-8')
+
+@contextmanager
+def _locked_log(path: str):
+    """Hold an exclusive lock on a history log (via its .lock file); yields whether it is held"""
+    if fcntl is None:
+        yield False
+        return
+    with open(f"{path}.lock", 'ab') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def _decode_record(line: bytes) -> Dict[str, Any]:
+    """Parse one history log line (raises ValueError on malformed input)"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(line)
+    return json.loads(line)
 
 class ChatHistoryManager:
-    """Simple chat history manager using session state for persistence"""
+    """Chat history manager using session state, backed by per-user JSONL logs on disk"""
     
     def __init__(self):
-        # chat_histories is initialized in main app.py
+        # chat_histories (username -> conversation_id -> messages) and recent_messages
+        # are initialized in main app.py
         pass
     
+    def _history_path(self, username: str) -> str:
+        """Path of the user's history log"""
+        return os.path.join(CHAT_DATA_DIR, f"{get_user_index_id(username)}.jsonl")
+    
+    def _append_record(self, username: str, record: Dict[str, Any]):
+        """Append one operation record to the user's history log"""
+        path = self._history_path(username)
+        try:
+            os.makedirs(CHAT_DATA_DIR, exist_ok=True)
+            # The lock keeps appends from landing in a log that is being replaced
+            with _locked_log(path):
+                with open(path, 'ab', buffering=8192) as f:
+                    f.write(_encode_record(record))
+        except OSError as e:
+            logger.warning(f"Could not persist chat history for {username}: {str(e)}")
+    
+    def _replay_log(self, path: str) -> Tuple[Dict[str, deque], int]:
+        """Rebuild conversations from a history log; returns them with the log's record count"""
+        user_histories = {}
+        record_count = 0
+        
+        with open(path, 'rb') as f:
+            for line in f:
+                record_count += 1
+                try:
+                    record = _decode_record(line)
+                except ValueError:
+                    # Skip a partially written line
+                    continue
+                
+                conversation_id = record.get('conversation_id')
+                operation = record.get('op')
+                
+                if operation == 'add':
+                    if conversation_id not in user_histories:
+                        user_histories[conversation_id] = deque(maxlen=CONVERSATION_MESSAGES_LIMIT)
+                    user_histories[conversation_id].append(record['message'])
+                elif operation == 'clear':
+                    if conversation_id in user_histories:
+                        user_histories[conversation_id] = deque(maxlen=CONVERSATION_MESSAGES_LIMIT)
+                elif operation == 'delete':
+                    user_histories.pop(conversation_id, None)
+        
+        return user_histories, record_count
+    
+    def _compact_log(self, path: str) -> Optional[Dict[str, deque]]:
+        """
+        Replace a history log with one 'add' record per live message.
+        
+        The log is re-read under its lock, so records appended by other
+        sessions since it was last loaded are kept.
+        
+        Returns:
+            The conversations as re-read from disk, or None if the log could
+            not be locked
+        """
+        with _locked_log(path) as locked:
+            if not locked:
+                return None
+            
+            user_histories, _ = self._replay_log(path)
+            fd, temp_path = tempfile.mkstemp(dir=CHAT_DATA_DIR, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb', buffering=65536) as f:
+                    for conversation_id, history in user_histories.items():
+                        for message in history:
+                            f.write(_encode_record({'op': 'add', 'conversation_id': conversation_id, 'message': message}))
+                os.replace(temp_path, path)
+            except BaseException:
+                os.unlink(temp_path)
+                raise
+            return user_histories
+    
+    def _load_user_histories(self, username: str) -> Dict[str, deque]:
+        """Rebuild the user's conversations by replaying their history log"""
+        path = self._history_path(username)
+        try:
+            user_histories, record_count = self._replay_log(path)
+        except FileNotFoundError:
+            return {}
+        except OSError as e:
+            logger.warning(f"Could not load chat history for {username}: {str(e)}")
+            return {}
+        
+        live_count = sum(len(history) for history in user_histories.values())
+        if record_count > live_count + LOG_COMPACTION_SLACK:
+            try:
+                compacted = self._compact_log(path)
+            except OSError as e:
+                logger.warning(f"Could not compact chat history for {username}: {str(e)}")
+            else:
+                if compacted is not None:
+                    user_histories = compacted
+        
+        return user_histories
+    
+    def _user_histories(self, username: str) -> Dict[str, deque]:
+        """Get the user's conversation_id -> messages mapping, loading it from disk on first use"""
+        chat_histories = st.session_state.chat_histories
+        user_histories = chat_histories.get(username)
+        
+        if not isinstance(user_histories, dict):
+            user_histories = self._load_user_histories(username)
+            
+            # Fold old "{username}_{conversation_id}" entries into the nested layout
+            prefix = f"{username}_"
+            legacy_keys = [
+                key for key, history in chat_histories.items()
+                if key.startswith(prefix) and not isinstance(history, dict)
+            ]
+            for key in legacy_keys:
+                user_histories[key[len(prefix):]] = chat_histories.pop(key)
+            chat_histories[username] = user_histories
+        
+        return user_histories
+    
+    def _user_recent_messages(self, username: str) -> deque:
+        """Get the user's (conversation_id, message) feed in arrival order, building it on first use"""
+        recent = st.session_state.recent_messages.get(username)
+        if recent is None:
+            messages = [
+                (conversation_id, message)
+                for conversation_id, history in self._user_histories(username).items()
+                for message in history
+            ]
+            messages.sort(key=lambda item: item[1].get('timestamp', ''))
+            recent = deque(messages, maxlen=RECENT_MESSAGES_LIMIT)
+            st.session_state.recent_messages[username] = recent
+        return recent
+    
     def get_conversation_history(self, conversation_id: str, username: str) -> List[Dict[str, Any]]:
         """Get conversation history for a specific conversation and user"""
-        key = f"{username}_{conversation_id}"
-        return st.session_state.chat_histories.get(key, [])
+        return list(self._user_histories(username).get(conversation_id, ()))
     
     def add_message(self, conversation_id: str, username: str, message: Dict[str, Any]):
         """Add a message to conversation history"""
-        key = f"{username}_{conversation_id}"
+        user_histories = self._user_histories(username)
         
-        if key not in st.session_state.chat_histories:
-            st.session_state.chat_histories[key] = []
+        # Bounded deque keeps only the last 50 messages per conversation
+        if conversation_id not in user_histories:
+            user_histories[conversation_id] = deque(maxlen=CONVERSATION_MESSAGES_LIMIT)
         
         # Add timestamp if not present
         if 'timestamp' not in message:
-            message['timestamp'] = datetime.now().isoformat()
+            message['timestamp'] = current_timestamp()
         
-        st.session_state.chat_histories[key].append(message)
+        user_histories[conversation_id].append(message)
+        self._append_record(username, {'op': 'add', 'conversation_id': conversation_id, 'message': message})
         
-        # Keep only last 50 messages per conversation
-        if len(st.session_state.chat_histories[key]) > 50:
-            st.session_state.chat_histories[key] = st.session_state.chat_histories[key][-50:]
+        # Keep the recent-messages feed current (an unbuilt feed picks the message up when built)
+        recent = st.session_state.recent_messages.get(username)
+        if recent is not None:
+            recent.append((conversation_id, message))
     
     def clear_conversation(self, conversation_id: str, username: str):
         """Clear conversation history"""
-        key = f"{username}_{conversation_id}"
-        if key in st.session_state.chat_histories:
-            st.session_state.chat_histories[key] = []
+        user_histories = self._user_histories(username)
+        if conversation_id in user_histories:
+            user_histories[conversation_id] = deque(maxlen=CONVERSATION_MESSAGES_LIMIT)
+            self._append_record(username, {'op': 'clear', 'conversation_id': conversation_id})
+            # Rebuild the feed lazily so older messages from other conversations resurface
+            st.session_state.recent_messages.pop(username, None)
     
     def get_user_conversations(self, username: str) -> List[Dict[str, Any]]:
         """Get all conversations for a user (last 10)"""
+        # Pick the 10 most recently active non-empty conversations
+        latest = heapq.nlargest(
+            10,
+            ((conversation_id, history) 
+             for conversation_id, history in self._user_histories(username).items() 
+             if history),
+            key=lambda item: item[1][-1]['timestamp']
+        )
+        
         conversations = []
+        for conversation_id, history in latest:
+            last_message = history[-1]
+            
+            conversations.append({
+                'id': conversation_id,
+                'last_message': last_message,
+                'message_count': len(history),
+                'last_activity': last_message['timestamp']
+            })
         
-        for key, history in st.session_state.chat_histories.items():
-            if key.startswith(f"{username}_") and history:
-                conversation_id = key.replace(f"{username}_", "")
-                last_message = history[-1] if history else None
-                
-                conversations.append({
-                    'id': conversation_id,
-                    'last_message': last_message,
-                    'message_count': len(history),
-                    'last_activity': last_message['timestamp'] if last_message else None
-                })
-        
-        # Sort by last activity and return last 10
-        conversations.sort(key=lambda x: x['last_activity'] or '', reverse=True)
-        return conversations[:10]
+        return conversations
     
     def delete_conversation(self, conversation_id: str, username: str):
         """Delete a conversation"""
-        key = f"{username}_{conversation_id}"
-        if key in st.session_state.chat_histories:
-            del st.session_state.chat_histories[key]
+        user_histories = self._user_histories(username)
+        if conversation_id in user_histories:
+            del user_histories[conversation_id]
+            self._append_record(username, {'op': 'delete', 'conversation_id': conversation_id})
+            st.session_state.recent_messages.pop(username, None)
     
     def get_recent_messages(self, username: str, limit: int = 10) -> List[Dict[str, Any]]:
         """Get recent messages across all conversations for a user"""
-        all_messages = []
-        
-        for key, history in st.session_state.chat_histories.items():
-            if key.startswith(f"{username}_"):
-                conversation_id = key.replace(f"{username}_", "")
-                for message in history:
-                    message_copy = message.copy()
-                    message_copy['conversation_id'] = conversation_id
-                    all_messages.append(message_copy)
-        
-        # Sort by timestamp and return recent messages
-        all_messages.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
-        return all_messages[:limit]
\ No newline at end of file
+        if limit > RECENT_MESSAGES_LIMIT:
+            return self._scan_recent_messages(username, limit)
+        
+        recent_messages = []
+        for conversation_id, message in islice(reversed(self._user_recent_messages(username)), limit):
+            message_copy = message.copy()
+            message_copy['conversation_id'] = conversation_id
+            recent_messages.append(message_copy)
+        
+        return recent_messages
+    
+    def _scan_recent_messages(self, username: str, limit: int) -> List[Dict[str, Any]]:
+        """Select a user's most recent messages directly from the histories (for limits beyond the feed size)"""
+        candidates = (
+            (conversation_id, message)
+            for conversation_id, history in self._user_histories(username).items()
+            for message in history
+        )
+        
+        # Partial selection instead of a full sort; only the returned messages are copied
+        recent_messages = []
+        for conversation_id, message in heapq.nlargest(limit, candidates, key=lambda item: item[1].get('timestamp', '')):
+            message_copy = message.copy()
+            message_copy['conversation_id'] = conversation_id
+            recent_messages.append(message_copy)
+        
+        return recent_messages
\ No newline at end of file
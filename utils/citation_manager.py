@@ -5,30 +5,138 @@ This module manages citations and provides precise source references with page n
 section information, and exact text coordinates for academic financial documents.
 """
 
-import re
+import os
+import time
+import bisect
+import threading
+import weakref
 import fitz  # pymupdf
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, List, Optional, Any, Tuple, BinaryIO
 import logging
-from dataclasses import dataclass
+from collections import OrderedDict, defaultdict
+from itertools import groupby
+from operator import attrgetter
 import json
 
+# orjson is optional; the stdlib json module is the fallback serializer
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-@dataclass
+# Number of open PDF documents kept per manager instance
+_DOCUMENT_CACHE_SIZE = 8
+
+# Number of extracted clip texts kept per manager instance
+_CLIP_TEXT_CACHE_SIZE = 512
+
+def _close_cached_documents(doc_cache: 'OrderedDict[Tuple[str, int, int], fitz.Document]',
+                            clip_text_cache: 'OrderedDict[Tuple[Any, ...], str]',
+                            cache_lock: threading.Lock) -> None:
+    """Close the PDFs in a manager's document cache and drop its clip texts."""
+    with cache_lock:
+        documents = list(doc_cache.values())
+        doc_cache.clear()
+        clip_text_cache.clear()
+    
+    for doc in documents:
+        doc.close()
+
+def _dumps_json(value: Any) -> bytes:
+    """Serialize value to UTF-8 JSON with orjson when available."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(value, default=str)
+    return json.dumps(value, ensure_ascii=False, default=str).encode('utf-8')
+
+def _create_text_snippet(content: str, max_length: int = 200) -> str:
+    """Create a representative text snippet from chunk content."""
+    # Remove excessive whitespace (split() on whitespace runs matches re's \s+).
+    # Only the leading words can reach the snippet: n words join to at least
+    # 2n - 1 characters, so the rest of a long chunk is never split.
+    max_words = max_length // 2 + 2
+    words = content.split(None, max_words)
+    content = ' '.join(words[:max_words])
+    
+    # If content is short enough, return as-is
+    if len(content) <= max_length:
+        return content
+    
+    # Try to find a good breaking point (sentence end)
+    truncated = content[:max_length]
+    
+    # Look for last sentence end
+    sentence_end = max(
+        truncated.rfind('.'),
+        truncated.rfind('!'),
+        truncated.rfind('?')
+    )
+    
+    if sentence_end > max_length * 0.6:  # If we found a good breaking point
+        return truncated[:sentence_end + 1]
+    else:
+        # Fallback: break at word boundary
+        word_end = truncated.rfind(' ')
+        if word_end > 0:
+            return truncated[:word_end] + "..."
+        else:
+            return truncated + "..."
+
+
 class CitationData:
-    """Data structure for citation information."""
-    chunk_id: str
-    document_id: str
-    document_title: str
-    page_number: int
-    section_id: Optional[str]
-    section_title: Optional[str]
-    text_snippet: str
-    coordinates: Dict[str, float]  # {'x1': float, 'y1': float, 'x2': float, 'y2': float}
-    context_before: str = ""
-    context_after: str = ""
+    """
+    Data structure for citation information.
+    
+    The text snippet is built from the chunk content on first access, so
+    citations that are never displayed or exported skip that work.
+    """
+    __slots__ = (
+        'chunk_id', 'document_id', 'document_title', 'page_number', 'section_id',
+        'section_title', 'coordinates', 'context_before', 'context_after',
+        '_text_snippet', '_raw_content'
+    )
+    
+    def __init__(self, chunk_id: str, document_id: str, document_title: str, 
+                 page_number: int, section_id: Optional[str], section_title: Optional[str],
+                 text_snippet: Optional[str], 
+                 coordinates: Dict[str, float],  # {'x1': float, 'y1': float, 'x2': float, 'y2': float}
+                 context_before: str = "", context_after: str = "",
+                 raw_content: Optional[str] = None):
+        """
+        Initialize citation data.
+        
+        Args:
+            text_snippet: Ready-made snippet, or None to derive it from raw_content
+            raw_content: Chunk content the snippet is built from on first access
+        """
+        self.chunk_id = chunk_id
+        self.document_id = document_id
+        self.document_title = document_title
+        self.page_number = page_number
+        self.section_id = section_id
+        self.section_title = section_title
+        self.coordinates = coordinates
+        self.context_before = context_before
+        self.context_after = context_after
+        self._text_snippet = text_snippet
+        self._raw_content = raw_content
+    
+    @property
+    def text_snippet(self) -> str:
+        """Representative text snippet, created from the chunk content when first read."""
+        if self._text_snippet is None:
+            self._text_snippet = _create_text_snippet(self._raw_content or '')
+            self._raw_content = None
+        return self._text_snippet
+    
+    def __repr__(self) -> str:
+        return (f"CitationData(chunk_id={self.chunk_id!r}, document_id={self.document_id!r}, "
+                f"page_number={self.page_number!r}, section_id={self.section_id!r})")
 
 
 class CitationManager:
@@ -40,6 +148,31 @@ class CitationManager:
         self.citations_index: Dict[str, CitationData] = {}
         self.document_citations: Dict[str, List[str]] = {}  # document_id -> chunk_ids
         
+        # Formatted citation strings keyed by (chunk_id, include_quote)
+        self._format_cache: Dict[Tuple[str, bool], str] = {}
+        
+        # Inverted indices maintained at insertion time
+        self._by_page: Dict[Tuple[str, int], List[str]] = defaultdict(list)  # (document_id, page) -> chunk_ids
+        self._by_section: Dict[Tuple[str, Optional[str]], List[str]] = defaultdict(list)  # (document_id, section_id) -> chunk_ids
+        
+        # document_id -> (sections list it was built from, section_id -> section,
+        # sorted section page numbers, sections sorted by page)
+        self._section_indices: Dict[str, Tuple[List[Dict[str, Any]], Dict[str, Dict[str, Any]], 
+                                               List[int], List[Dict[str, Any]]]] = {}
+        
+        # LRU of open PDFs keyed by (path, mtime_ns, size), and of clip texts
+        # keyed by (document key, page index, rounded clip rect)
+        self._doc_cache: 'OrderedDict[Tuple[str, int, int], fitz.Document]' = OrderedDict()
+        self._clip_text_cache: 'OrderedDict[Tuple[Any, ...], str]' = OrderedDict()
+        self._cache_lock = threading.Lock()
+        # Runs when the manager is collected or at interpreter exit, whichever
+        # comes first; it holds the caches, not the manager, so it does not
+        # keep discarded managers alive
+        self._close_finalizer = weakref.finalize(
+            self, _close_cached_documents,
+            self._doc_cache, self._clip_text_cache, self._cache_lock
+        )
+        
     def add_citation(self, chunk_data: Dict[str, Any], document_info: Dict[str, Any],
                     coordinates: Dict[str, float]) -> None:
         """
@@ -52,32 +185,62 @@ class CitationManager:
         """
         chunk_id = chunk_data['chunk_id']
         document_id = document_info.get('document_id', '')
-        
-        # Find section information
-        section_info = self._find_section_for_chunk(chunk_data, document_info)
-        
-        # Create citation data
-        citation = CitationData(
-            chunk_id=chunk_id,
-            document_id=document_id,
-            document_title=document_info.get('title', 'Unknown Document'),
-            page_number=chunk_data.get('page_num', 1),
-            section_id=section_info.get('section_id') if section_info else None,
-            section_title=section_info.get('title') if section_info else None,
-            text_snippet=self._create_text_snippet(chunk_data['content']),
-            coordinates=coordinates
-        )
+        citation = self._make_citation(chunk_data, document_info, coordinates)
         
         # Store citation
         self.citations_index[chunk_id] = citation
+        self._invalidate_formatted(chunk_id)
         
         # Update document index
         if document_id not in self.document_citations:
             self.document_citations[document_id] = []
         self.document_citations[document_id].append(chunk_id)
+        self._index_citation(citation)
         
         logger.debug(f"Added citation for chunk {chunk_id}")
     
+    def add_citations_bulk(self, chunks: List[Dict[str, Any]], document_info: Dict[str, Any],
+                           coords_list: Optional[List[Dict[str, float]]] = None,
+                           default_coordinates: Optional[Dict[str, float]] = None) -> None:
+        """
+        Add citations for many chunks of one document at once.
+        
+        Equivalent to calling add_citation() per chunk, but stores the
+        citations with a single dict update and extends the document index once.
+        
+        Args:
+            chunks: Chunk information from SmartChunker
+            document_info: Document metadata and structure
+            coords_list: Coordinates per chunk, parallel to chunks
+            default_coordinates: Coordinates shared by all chunks when coords_list
+                is not given (the same dict object is stored, so it must not be mutated)
+        """
+        if coords_list is None:
+            coords_list = [default_coordinates or {}] * len(chunks)
+        elif len(coords_list) != len(chunks):
+            raise ValueError("coords_list must have one entry per chunk")
+        
+        document_id = document_info.get('document_id', '')
+        citations = [
+            self._make_citation(chunk_data, document_info, coordinates)
+            for chunk_data, coordinates in zip(chunks, coords_list)
+        ]
+        
+        # Store citations
+        self.citations_index.update((citation.chunk_id, citation) for citation in citations)
+        if self._format_cache:
+            for citation in citations:
+                self._invalidate_formatted(citation.chunk_id)
+        
+        # Update document and inverted indices
+        self.document_citations.setdefault(document_id, []).extend(
+            citation.chunk_id for citation in citations
+        )
+        for citation in citations:
+            self._index_citation(citation)
+        
+        logger.debug(f"Added {len(citations)} citations for document {document_id}")
+    
     def get_citation(self, chunk_id: str) -> Optional[CitationData]:
         """
         Retrieve citation data for a chunk.
@@ -90,6 +253,18 @@ class CitationManager:
         """
         return self.citations_index.get(chunk_id)
     
+    def get_citations_bulk(self, chunk_ids: List[Optional[str]]) -> List[Optional[CitationData]]:
+        """
+        Retrieve citation data for several chunks in one pass.
+        
+        Args:
+            chunk_ids: Chunk identifiers; None entries are allowed
+            
+        Returns:
+            CitationData or None for each chunk ID, in the same order
+        """
+        return list(map(self.citations_index.get, chunk_ids))
+    
     def format_citation(self, chunk_id: str, include_quote: bool = True) -> Optional[str]:
         """
         Format citation string for a chunk.
@@ -101,6 +276,11 @@ class CitationManager:
         Returns:
             Formatted citation string or None if not found
         """
+        cache_key = (chunk_id, include_quote)
+        formatted_citation = self._format_cache.get(cache_key)
+        if formatted_citation is not None:
+            return formatted_citation
+        
         citation = self.get_citation(chunk_id)
         if not citation:
             return None
@@ -120,6 +300,7 @@ class CitationManager:
         if include_quote and citation.text_snippet:
             formatted_citation += f' - "{citation.text_snippet}"'
         
+        self._format_cache[cache_key] = formatted_citation
         return formatted_citation
     
     def get_context_around_citation(self, chunk_id: str, pdf_path: str, 
@@ -141,57 +322,65 @@ class CitationManager:
         
         try:
             # Re-read the PDF area using stored coordinates
-            doc = fitz.open(pdf_path)
+            doc_key, doc = self._get_document(pdf_path)
             page = doc[citation.page_number - 1]  # Convert to 0-based indexing
             
-            # Extract text from the exact coordinates with expanded area for context
-            coords = citation.coordinates
-            
-            # Expand coordinates for context
-            expanded_rect = fitz.Rect(
-                max(0, coords['x1'] - 50),
-                max(0, coords['y1'] - 50),
-                min(page.rect.width, coords['x2'] + 50),
-                min(page.rect.height, coords['y2'] + 50)
-            )
-            
-            # Get text from expanded area
-            full_text = page.get_text("text", clip=expanded_rect)
-            
-            # Find the chunk text within the full text
-            chunk_text = citation.text_snippet
-            chunk_start = full_text.find(chunk_text[:50])  # Use first 50 chars to find position
-            
-            if chunk_start == -1:
-                # Fallback: return available text
-                doc.close()
-                return {
-                    'before': '',
-                    'chunk': citation.text_snippet,
-                    'after': '',
-                    'full_context': full_text
-                }
-            
-            # Extract context
-            context_start = max(0, chunk_start - context_chars)
-            context_end = min(len(full_text), chunk_start + len(chunk_text) + context_chars)
-            
-            before_text = full_text[context_start:chunk_start]
-            after_text = full_text[chunk_start + len(chunk_text):context_end]
-            
-            doc.close()
-            
-            return {
-                'before': before_text,
-                'chunk': chunk_text,
-                'after': after_text,
-                'full_context': full_text[context_start:context_end]
-            }
+            return self._context_from_page(citation, doc_key, page, context_chars)
             
         except Exception as e:
             logger.error(f"Error retrieving context for chunk {chunk_id}: {e}")
             return None
     
+    def get_contexts_batch(self, chunk_ids: List[str], pdf_path: str, 
+                           context_chars: int = 200) -> Dict[str, Optional[Dict[str, str]]]:
+        """
+        Retrieve context around several citations from the same PDF.
+        
+        Citations are grouped by page and pages are visited in ascending order,
+        so each page is loaded once no matter how many citations it holds.
+        
+        Args:
+            chunk_ids: Unique identifiers for the chunks
+            pdf_path: Path to the original PDF file
+            context_chars: Number of characters to include before and after
+            
+        Returns:
+            Dictionary mapping each chunk ID to its context (as returned by
+            get_context_around_citation) or None if not found
+        """
+        contexts: Dict[str, Optional[Dict[str, str]]] = dict.fromkeys(chunk_ids)
+        citations = [citation for citation in map(self.get_citation, contexts) if citation]
+        if not citations:
+            return contexts
+        
+        try:
+            doc_key, doc = self._get_document(pdf_path)
+        except Exception as e:
+            logger.error(f"Error opening {pdf_path} for citation context: {e}")
+            return contexts
+        
+        by_page = attrgetter('page_number')
+        for page_number, page_citations in groupby(sorted(citations, key=by_page), key=by_page):
+            try:
+                page = doc[page_number - 1]  # Convert to 0-based indexing
+            except Exception as e:
+                logger.error(f"Error loading page {page_number} of {pdf_path}: {e}")
+                continue
+            
+            for citation in page_citations:
+                try:
+                    contexts[citation.chunk_id] = self._context_from_page(
+                        citation, doc_key, page, context_chars
+                    )
+                except Exception as e:
+                    logger.error(f"Error retrieving context for chunk {citation.chunk_id}: {e}")
+        
+        return contexts
+    
+    def close_documents(self) -> None:
+        """Close all cached PDF documents and drop cached clip texts."""
+        _close_cached_documents(self._doc_cache, self._clip_text_cache, self._cache_lock)
+    
     def get_citations_for_document(self, document_id: str) -> List[CitationData]:
         """
         Get all citations for a specific document.
@@ -203,8 +392,8 @@ class CitationManager:
             List of CitationData objects
         """
         chunk_ids = self.document_citations.get(document_id, [])
-        return [self.citations_index[chunk_id] for chunk_id in chunk_ids 
-                if chunk_id in self.citations_index]
+        citations = map(self.citations_index.get, chunk_ids)
+        return [citation for citation in citations if citation is not None]
     
     def find_citations_by_section(self, document_id: str, section_id: str) -> List[CitationData]:
         """
@@ -217,9 +406,8 @@ class CitationManager:
         Returns:
             List of CitationData objects in the section
         """
-        document_citations = self.get_citations_for_document(document_id)
-        return [citation for citation in document_citations 
-                if citation.section_id == section_id]
+        return self._lookup(self._by_section.get((document_id, section_id), ()), 
+                            'section_id', section_id)
     
     def find_citations_by_page(self, document_id: str, page_number: int) -> List[CitationData]:
         """
@@ -232,9 +420,8 @@ class CitationManager:
         Returns:
             List of CitationData objects on the page
         """
-        document_citations = self.get_citations_for_document(document_id)
-        return [citation for citation in document_citations 
-                if citation.page_number == page_number]
+        return self._lookup(self._by_page.get((document_id, page_number), ()), 
+                            'page_number', page_number)
     
     def create_detailed_citation(self, chunk_ids: List[str], 
                                response_text: str = "") -> Dict[str, Any]:
@@ -248,48 +435,33 @@ class CitationManager:
         Returns:
             Dictionary with detailed citation information
         """
-        citations = []
-        sources_by_document = {}
+        citations = [citation for citation in map(self.get_citation, chunk_ids) if citation]
         
-        for chunk_id in chunk_ids:
-            citation = self.get_citation(chunk_id)
-            if citation:
-                citations.append(citation)
-                
-                doc_id = citation.document_id
-                if doc_id not in sources_by_document:
-                    sources_by_document[doc_id] = {
-                        'document_title': citation.document_title,
-                        'citations': []
-                    }
-                sources_by_document[doc_id]['citations'].append(citation)
+        # Group by document, in order of first appearance
+        sources_by_document = defaultdict(list)
+        for citation in citations:
+            sources_by_document[citation.document_id].append(citation)
         
         # Create formatted citation list
         formatted_sources = []
-        for doc_id, doc_info in sources_by_document.items():
-            doc_citations = doc_info['citations']
+        by_page = attrgetter('page_number')
+        for doc_citations in sources_by_document.values():
+            document_title = doc_citations[0].document_title
             
             # Group by page for cleaner citations
-            pages = {}
-            for citation in doc_citations:
-                page = citation.page_number
-                if page not in pages:
-                    pages[page] = []
-                pages[page].append(citation)
-            
-            # Format citations by document
             page_refs = []
-            for page, page_citations in sorted(pages.items()):
-                sections = list(set([c.section_title for c in page_citations if c.section_title]))
+            for page, page_citations in groupby(sorted(doc_citations, key=by_page), key=by_page):
+                # Unique section titles in citation order
+                sections = list(dict.fromkeys(c.section_title for c in page_citations if c.section_title))
                 if sections:
                     page_refs.append(f"p. {page} ({', '.join(sections)})")
                 else:
                     page_refs.append(f"p. {page}")
             
             formatted_source = {
-                'document_title': doc_info['document_title'],
+                'document_title': document_title,
                 'page_references': page_refs,
-                'citation_string': f"{doc_info['document_title']}, {', '.join(page_refs)}",
+                'citation_string': f"{document_title}, {', '.join(page_refs)}",
                 'quotes': [c.text_snippet for c in doc_citations if c.text_snippet]
             }
             formatted_sources.append(formatted_source)
@@ -317,25 +489,56 @@ class CitationManager:
             citations = list(self.citations_index.values())
         
         # Convert to serializable format
-        export_data = {
-            'citations': [],
-            'export_timestamp': str(fitz.time.time()),
+        return {
+            'citations': [self._citation_record(citation) for citation in citations],
+            'export_timestamp': time.time(),
             'total_citations': len(citations)
         }
+    
+    def export_citations_json(self, document_id: Optional[str] = None) -> bytes:
+        """
+        Export citation data as UTF-8 encoded JSON.
+        
+        Args:
+            document_id: If provided, export only citations for this document
+            
+        Returns:
+            JSON document produced from export_citations()
+        """
+        return _dumps_json(self.export_citations(document_id))
+    
+    def stream_export(self, fp: BinaryIO, document_id: Optional[str] = None) -> int:
+        """
+        Write the export_citations() JSON document to a binary file one citation at a time.
+        
+        Unlike export_citations_json(), the full export is never held in memory.
+        Open fp with a large buffer (e.g. buffering=1024 * 1024) for big exports.
+        
+        Args:
+            fp: Binary file-like object to write to
+            document_id: If provided, export only citations for this document
+            
+        Returns:
+            Number of citations written
+        """
+        if document_id:
+            chunk_ids = self.document_citations.get(document_id, [])
+            citations = filter(None, map(self.citations_index.get, chunk_ids))
+        else:
+            # Snapshot of references only, so additions during the write are safe
+            citations = list(self.citations_index.values())
         
+        total = 0
+        fp.write(b'{"citations":[')
         for citation in citations:
-            export_data['citations'].append({
-                'chunk_id': citation.chunk_id,
-                'document_id': citation.document_id,
-                'document_title': citation.document_title,
-                'page_number': citation.page_number,
-                'section_id': citation.section_id,
-                'section_title': citation.section_title,
-                'text_snippet': citation.text_snippet,
-                'coordinates': citation.coordinates
-            })
-        
-        return export_data
+            if total:
+                fp.write(b',')
+            fp.write(_dumps_json(self._citation_record(citation)))
+            total += 1
+        fp.write(b'],"export_timestamp":' + _dumps_json(time.time()) + 
+                 b',"total_citations":' + _dumps_json(total) + b'}')
+        
+        return total
     
     def import_citations(self, citation_data: Dict[str, Any]) -> None:
         """
@@ -356,63 +559,168 @@ class CitationManager:
                 coordinates=citation_dict['coordinates']
             )
             
+            previous = self.citations_index.get(citation.chunk_id)
             self.citations_index[citation.chunk_id] = citation
+            self._invalidate_formatted(citation.chunk_id)
             
             # Update document index
             if citation.document_id not in self.document_citations:
                 self.document_citations[citation.document_id] = []
             if citation.chunk_id not in self.document_citations[citation.document_id]:
                 self.document_citations[citation.document_id].append(citation.chunk_id)
+                self._index_citation(citation)
+            elif (previous is not None and 
+                  (previous.page_number, previous.section_id) != (citation.page_number, citation.section_id)):
+                # Re-imported with a new location; stale entries are skipped on lookup
+                self._index_citation(citation)
         
         logger.info(f"Imported {len(citation_data.get('citations', []))} citations")
     
+    def _make_citation(self, chunk_data: Dict[str, Any], document_info: Dict[str, Any],
+                       coordinates: Dict[str, float]) -> CitationData:
+        """Create the citation for a chunk, resolving its section."""
+        section_info = self._find_section_for_chunk(chunk_data, document_info)
+        
+        return CitationData(
+            chunk_id=chunk_data['chunk_id'],
+            document_id=document_info.get('document_id', ''),
+            document_title=document_info.get('title', 'Unknown Document'),
+            page_number=chunk_data.get('page_num', 1),
+            section_id=section_info.get('section_id') if section_info else None,
+            section_title=section_info.get('title') if section_info else None,
+            text_snippet=None,
+            coordinates=coordinates,
+            raw_content=chunk_data['content']
+        )
+    
+    def _citation_record(self, citation: CitationData) -> Dict[str, Any]:
+        """Serializable export record for a citation."""
+        return {
+            'chunk_id': citation.chunk_id,
+            'document_id': citation.document_id,
+            'document_title': citation.document_title,
+            'page_number': citation.page_number,
+            'section_id': citation.section_id,
+            'section_title': citation.section_title,
+            'text_snippet': citation.text_snippet,
+            'coordinates': citation.coordinates
+        }
+    
+    def _invalidate_formatted(self, chunk_id: str) -> None:
+        """Drop cached format_citation() strings for a chunk whose citation changed."""
+        self._format_cache.pop((chunk_id, True), None)
+        self._format_cache.pop((chunk_id, False), None)
+    
+    def _index_citation(self, citation: CitationData) -> None:
+        """Record a citation in the page and section inverted indices."""
+        self._by_page[(citation.document_id, citation.page_number)].append(citation.chunk_id)
+        self._by_section[(citation.document_id, citation.section_id)].append(citation.chunk_id)
+    
+    def _lookup(self, chunk_ids: List[str], attribute: str, value: Any) -> List[CitationData]:
+        """Resolve indexed chunk IDs, skipping entries whose citation was since replaced."""
+        citations = []
+        for chunk_id in chunk_ids:
+            citation = self.citations_index.get(chunk_id)
+            if citation is not None and getattr(citation, attribute) == value:
+                citations.append(citation)
+        return citations
+    
+    def _get_document(self, pdf_path: str) -> Tuple[Tuple[str, int, int], 'fitz.Document']:
+        """Return (cache key, open document) for pdf_path, reopening it only if the file changed."""
+        stat = os.stat(pdf_path)
+        doc_key = (pdf_path, stat.st_mtime_ns, stat.st_size)
+        
+        with self._cache_lock:
+            doc = self._doc_cache.get(doc_key)
+            if doc is not None:
+                self._doc_cache.move_to_end(doc_key)
+                return doc_key, doc
+            
+            doc = fitz.open(pdf_path)
+            self._doc_cache[doc_key] = doc
+            if len(self._doc_cache) > _DOCUMENT_CACHE_SIZE:
+                # Evicted documents are closed when the last reference goes away,
+                # so a caller still reading one is not affected
+                self._doc_cache.popitem(last=False)
+            return doc_key, doc
+    
+    def _get_clip_text(self, doc_key: Tuple[str, int, int], page: 'fitz.Page', 
+                       clip: 'fitz.Rect') -> str:
+        """Extract the text inside clip on page, reusing earlier extractions of the same area."""
+        text_key = (doc_key, page.number, tuple(round(value, 1) for value in clip))
+        
+        with self._cache_lock:
+            text = self._clip_text_cache.get(text_key)
+            if text is not None:
+                self._clip_text_cache.move_to_end(text_key)
+                return text
+        
+        text = page.get_text("text", clip=clip)
+        
+        with self._cache_lock:
+            self._clip_text_cache[text_key] = text
+            if len(self._clip_text_cache) > _CLIP_TEXT_CACHE_SIZE:
+                self._clip_text_cache.popitem(last=False)
+        return text
+    
+    def _context_from_page(self, citation: CitationData, doc_key: Tuple[str, int, int], 
+                           page: 'fitz.Page', context_chars: int) -> Dict[str, str]:
+        """Extract the context around a citation from its already loaded page."""
+        coords = citation.coordinates
+        
+        # Context bands directly above and below the chunk's own rectangle,
+        # widened horizontally and clipped to the page
+        left = max(0, coords['x1'] - 50)
+        right = min(page.rect.width, coords['x2'] + 50)
+        before_rect = fitz.Rect(left, max(0, coords['y1'] - 50), right, coords['y1'])
+        chunk_rect = fitz.Rect(coords['x1'], coords['y1'], coords['x2'], coords['y2'])
+        after_rect = fitz.Rect(left, coords['y2'], right, min(page.rect.height, coords['y2'] + 50))
+        
+        before_text = self._get_clip_text(doc_key, page, before_rect)[-context_chars:]
+        chunk_text = self._get_clip_text(doc_key, page, chunk_rect) or citation.text_snippet
+        after_text = self._get_clip_text(doc_key, page, after_rect)[:context_chars]
+        
+        return {
+            'before': before_text,
+            'chunk': chunk_text,
+            'after': after_text,
+            'full_context': before_text + chunk_text + after_text
+        }
+    
     def _find_section_for_chunk(self, chunk_data: Dict[str, Any], 
                                document_info: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Find the section that contains this chunk."""
-        sections = document_info.get('sections', [])
+        sections_by_id, section_pages, sorted_sections = self._get_section_index(document_info)
         chunk_page = chunk_data.get('page_num', 1)
         chunk_section_id = chunk_data.get('section_id')
         
         # First try direct section ID match
-        if chunk_section_id:
-            for section in sections:
-                if section.get('section_id') == chunk_section_id:
-                    return section
+        if chunk_section_id and chunk_section_id in sections_by_id:
+            return sections_by_id[chunk_section_id]
         
-        # Fallback: find section by page number
-        best_section = None
-        for section in sections:
-            if section.get('page_num', 1) <= chunk_page:
-                if not best_section or section.get('page_num', 1) > best_section.get('page_num', 1):
-                    best_section = section
-        
-        return best_section
+        # Fallback: the first section on the last page at or before the chunk's page
+        i = bisect.bisect_right(section_pages, chunk_page)
+        if i == 0:
+            return None
+        return sorted_sections[bisect.bisect_left(section_pages, section_pages[i - 1])]
     
-    def _create_text_snippet(self, content: str, max_length: int = 200) -> str:
-        """Create a representative text snippet from chunk content."""
-        # Remove excessive whitespace
-        content = re.sub(r'\s+', ' ', content.strip())
+    def _get_section_index(self, document_info: Dict[str, Any]) -> Tuple[Dict[str, Dict[str, Any]], 
+                                                                          List[int], List[Dict[str, Any]]]:
+        """Get the document's section lookup tables, building them once per sections list."""
+        sections = document_info.get('sections', [])
+        document_id = document_info.get('document_id', '')
         
-        # If content is short enough, return as-is
-        if len(content) <= max_length:
-            return content
+        cached = self._section_indices.get(document_id)
+        if cached is not None and cached[0] is sections:
+            return cached[1:]
         
-        # Try to find a good breaking point (sentence end)
-        truncated = content[:max_length]
+        sections_by_id = {}
+        for section in sections:
+            sections_by_id.setdefault(section.get('section_id'), section)
         
-        # Look for last sentence end
-        sentence_end = max(
-            truncated.rfind('.'),
-            truncated.rfind('!'),
-            truncated.rfind('?')
-        )
+        # Stable sort keeps document order among sections on the same page
+        sorted_sections = sorted(sections, key=lambda section: section.get('page_num', 1))
+        section_pages = [section.get('page_num', 1) for section in sorted_sections]
         
-        if sentence_end > max_length * 0.6:  # If we found a good breaking point
-            return truncated[:sentence_end + 1]
-        else:
-            # Fallback: break at word boundary
-            word_end = truncated.rfind(' ')
-            if word_end > 0:
-                return truncated[:word_end] + "..."
-            else:
-                return truncated + "..."
\ No newline at end of file
+        self._section_indices[document_id] = (sections, sections_by_id, section_pages, sorted_sections)
+        return sections_by_id, section_pages, sorted_sections
\ No newline at end of file
@@ -1,6 +1,12 @@
 import streamlit as st
 import os
 
+# Embedding model shared by ingestion, querying and index creation.
+# Indexes created for a different dimension must be migrated
+# (IndexManager.migrate_index) before they can be queried again.
+EMBEDDING_MODEL = "text-embedding-3-small"
+EMBEDDING_DIMENSIONS = 512
+
 def get_api_keys():
     """Get API keys from Streamlit secrets or environment variables"""
     openai_key = None
@@ -1,9 +1,15 @@
 import streamlit as st
 import json
 from datetime import datetime
-from typing import List, Dict, Any
+from functools import lru_cache
+from typing import List, Dict, Any, Callable, Hashable
 from utils.auth import get_user_index_id
 
+@lru_cache(maxsize=None)
+def _personal_index_name(username: str) -> str:
+    """Personal index name for a user (the username mapping is fixed)"""
+    return f'pdf-qa-personal-{get_user_index_id(username)}'
+
 class DocumentManager:
     """Simple document metadata manager using session state"""
     
@@ -15,28 +21,55 @@ class DocumentManager:
         """Ensure document_metadata exists in session state"""
         if 'document_metadata' not in st.session_state:
             st.session_state.document_metadata = []
+        if 'document_id_seq' not in st.session_state:
+            # Continue after any IDs already handed out in this session
+            st.session_state.document_id_seq = max(
+                (doc.get('id', 0) for doc in st.session_state.document_metadata), default=0
+            )
+        if 'document_by_id' not in st.session_state:
+            st.session_state.document_by_id = {
+                doc.get('id'): doc for doc in st.session_state.document_metadata
+            }
+    
+    def _filtered_documents(self, cache_key: Hashable, 
+                            predicate: Callable[[Dict[str, Any]], bool]) -> List[Dict[str, Any]]:
+        """Filter document metadata, reusing the result until documents are added or deleted"""
+        self._ensure_document_metadata()
+        filter_cache = st.session_state.setdefault('document_filter_cache', {})
+        
+        documents = filter_cache.get(cache_key)
+        if documents is None:
+            documents = [doc for doc in st.session_state.document_metadata if predicate(doc)]
+            filter_cache[cache_key] = documents
+        return list(documents)
+    
+    def _invalidate_filters(self):
+        """Drop cached filter results after the document list changed"""
+        st.session_state.pop('document_filter_cache', None)
     
     def add_document(self, doc_metadata: Dict[str, Any]):
         """Add document metadata"""
         self._ensure_document_metadata()
-        doc_metadata['id'] = len(st.session_state.document_metadata) + 1
+        # Monotonic IDs are never reused, even after deletions
+        st.session_state.document_id_seq += 1
+        doc_metadata['id'] = st.session_state.document_id_seq
         st.session_state.document_metadata.append(doc_metadata)
+        st.session_state.document_by_id[doc_metadata['id']] = doc_metadata
+        self._invalidate_filters()
     
     def get_user_documents(self, username: str) -> List[Dict[str, Any]]:
         """Get documents for a specific user"""
-        self._ensure_document_metadata()
-        return [doc for doc in st.session_state.document_metadata if doc.get('upload_user') == username]
+        return self._filtered_documents(
+            ('user', username), lambda doc: doc.get('upload_user') == username
+        )
     
     def get_shared_documents(self) -> List[Dict[str, Any]]:
         """Get documents in shared index"""
-        self._ensure_document_metadata()
-        return [doc for doc in st.session_state.document_metadata if doc.get('index_name') == 'pdf-qa-shared']
+        return self.get_documents_by_index('pdf-qa-shared')
     
     def get_personal_documents(self, username: str) -> List[Dict[str, Any]]:
         """Get documents in personal index"""
-        self._ensure_document_metadata()
-        user_id = get_user_index_id(username)
-        return [doc for doc in st.session_state.document_metadata if doc.get('index_name') == f'pdf-qa-personal-{user_id}']
+        return self.get_documents_by_index(_personal_index_name(username))
     
     def get_all_documents(self) -> List[Dict[str, Any]]:
         """Get all documents"""
@@ -47,37 +80,50 @@ class DocumentManager:
         """Delete document by ID"""
         self._ensure_document_metadata()
         st.session_state.document_metadata = [doc for doc in st.session_state.document_metadata if doc.get('id') != doc_id]
+        st.session_state.document_by_id.pop(doc_id, None)
+        self._invalidate_filters()
     
     def get_document_by_id(self, doc_id: int) -> Dict[str, Any]:
         """Get document by ID"""
         self._ensure_document_metadata()
-        for doc in st.session_state.document_metadata:
-            if doc.get('id') == doc_id:
-                return doc
-        return None
+        return st.session_state.document_by_id.get(doc_id)
     
     def get_documents_by_index(self, index_name: str) -> List[Dict[str, Any]]:
         """Get documents by index name"""
-        self._ensure_document_metadata()
-        return [doc for doc in st.session_state.document_metadata if doc.get('index_name') == index_name]
+        return self._filtered_documents(
+            ('index', index_name), lambda doc: doc.get('index_name') == index_name
+        )
     
     def get_statistics(self) -> Dict[str, Any]:
         """Get document statistics"""
         self._ensure_document_metadata()
-        docs = st.session_state.document_metadata
-        
-        total_docs = len(docs)
-        total_size = sum(doc.get('file_size', 0) for doc in docs)
-        total_chunks = sum(doc.get('chunk_count', 0) for doc in docs)
+        filter_cache = st.session_state.setdefault('document_filter_cache', {})
         
-        # By index
-        shared_docs = [doc for doc in docs if doc.get('index_name') == 'pdf-qa-shared']
-        personal_docs = [doc for doc in docs if 'pdf-qa-personal-' in doc.get('index_name', '')]
+        stats = filter_cache.get('statistics')
+        if stats is None:
+            docs = st.session_state.document_metadata
+            
+            # Single pass over the documents for totals and per-index counts
+            total_size = 0
+            total_chunks = 0
+            shared_count = 0
+            personal_count = 0
+            for doc in docs:
+                total_size += doc.get('file_size', 0)
+                total_chunks += doc.get('chunk_count', 0)
+                index_name = doc.get('index_name', '')
+                if index_name == 'pdf-qa-shared':
+                    shared_count += 1
+                elif 'pdf-qa-personal-' in index_name:
+                    personal_count += 1
+            
+            stats = {
+                'total_documents': len(docs),
+                'total_size_mb': total_size / (1024 * 1024),
+                'total_chunks': total_chunks,
+                'shared_documents': shared_count,
+                'personal_documents': personal_count
+            }
+            filter_cache['statistics'] = stats
         
-        return {
-            'total_documents': total_docs,
-            'total_size_mb': total_size / (1024 * 1024),
-            'total_chunks': total_chunks,
-            'shared_documents': len(shared_docs),
-            'personal_documents': len(personal_docs)
-        }
\ No newline at end of file
+        return dict(stats)
\ No newline at end of file
@@ -6,27 +6,112 @@ with structure detection, smart chunking, and citation management.
 """
 
 import os
+import asyncio
+import time
 import tempfile
+import hashlib
+import heapq
+import threading
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import deque
+from itertools import islice
+import httpx
 import openai
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Tuple, Callable, Iterator
 import logging
 import numpy as np
 from langchain_openai import OpenAIEmbeddings
 from pinecone import Pinecone
 
 # Import our new components
-from processors.pdf_processor import EnhancedPDFProcessor
-from processors.metadata_extractor import MetadataExtractor
-from utils.smart_chunker import SmartChunker
+from processors.pdf_processor import get_pdf_processor
+from processors.metadata_extractor import get_metadata_extractor
+from utils.smart_chunker import get_smart_chunker
 from utils.citation_manager import CitationManager
 from models.hybrid_search import HybridSearchEngine
 from models.financial_rag_chain import FinancialRAGChain
 from utils.response_formatter import ResponseFormatter
+from utils.config import EMBEDDING_MODEL, EMBEDDING_DIMENSIONS
+from utils.query_cache import QueryCache, VectorHitsCache, embed_query_with_cache, prefetch_query_embeddings
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Decimal places kept for vector values sent to Pinecone
+_UPSERT_DECIMALS = 6
+
+# Placeholder chunk coordinates until real PDF coordinates are extracted;
+# shared by all citations and never mutated
+_DEFAULT_COORDS = {'x1': 0, 'y1': 0, 'x2': 100, 'y2': 100}
+
+# Parallel upsert requests per Pinecone index handle
+_UPSERT_CONCURRENCY = 16
+
+# Connection pools shared by every processor in the process: one HTTP client
+# for the OpenAI clients, and one Pinecone client and index handle (with its
+# upsert thread pool) per API key and index name
+_http_client: Optional[httpx.Client] = None
+_pinecone_clients: Dict[str, Pinecone] = {}
+_index_handles: Dict[Tuple[str, str], Any] = {}
+_shared_clients_lock = threading.Lock()
+
+
+def _get_http_client() -> httpx.Client:
+    """Return the process-wide pooled HTTP client, creating it on first use."""
+    global _http_client
+    with _shared_clients_lock:
+        if _http_client is None:
+            _http_client = httpx.Client(
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=20)
+            )
+        return _http_client
+
+
+def _get_index_handle(pinecone_api_key: str, index_name: str):
+    """Return the process-wide Pinecone index handle for a key and index, opening it on first use."""
+    with _shared_clients_lock:
+        index = _index_handles.get((pinecone_api_key, index_name))
+        if index is None:
+            pc = _pinecone_clients.get(pinecone_api_key)
+            if pc is None:
+                pc = _pinecone_clients[pinecone_api_key] = Pinecone(api_key=pinecone_api_key)
+            # pool_threads sizes the pool used by async_req upserts
+            index = _index_handles[(pinecone_api_key, index_name)] = pc.Index(
+                index_name, pool_threads=_UPSERT_CONCURRENCY
+            )
+        return index
+
+
+def discard_index_handles(index_name: str) -> None:
+    """Drop cached handles for an index that was deleted or recreated (e.g. by a migration)."""
+    with _shared_clients_lock:
+        for key in [key for key in _index_handles if key[1] == index_name]:
+            del _index_handles[key]
+
+
+@lru_cache(maxsize=128)
+def _build_pinecone_filter(frozen_filters: Tuple[Tuple[str, Any], ...]) -> Dict[str, Dict[str, Any]]:
+    """
+    Build a Pinecone equality filter from sorted filter items.
+    
+    The returned dict is shared between calls and must not be mutated.
+    
+    Args:
+        frozen_filters: tuple(sorted(filters.items()))
+        
+    Returns:
+        Pinecone metadata filter
+    """
+    return {key: {"$eq": value} for key, value in frozen_filters}
+
+
+@lru_cache(maxsize=1024)
+def _hash_document_id(id_string: str) -> str:
+    """16-hex-character document ID for an identity string (BLAKE2b, 64-bit digest)."""
+    return hashlib.blake2b(id_string.encode('utf-8'), digest_size=8).hexdigest()
+
 
 class EnhancedDocumentProcessor:
     """
@@ -45,28 +130,40 @@ class EnhancedDocumentProcessor:
         self.openai_api_key = openai_api_key
         self.pinecone_api_key = pinecone_api_key
         
+        # The LLM and embeddings clients share the process-wide pooled HTTP
+        # client, so keep-alive connections are reused across queries and reruns
+        self.http_client = _get_http_client()
+        
         # Initialize OpenAI client
         openai.api_key = openai_api_key
-        self.openai_client = openai.OpenAI(api_key=openai_api_key)
-        
-        # Initialize Pinecone
-        self.pc = Pinecone(api_key=pinecone_api_key)
+        self.openai_client = openai.OpenAI(api_key=openai_api_key, http_client=self.http_client)
         
         # Initialize embeddings
         self.embeddings = OpenAIEmbeddings(
-            model="text-embedding-ada-002",
-            openai_api_key=openai_api_key
+            model=EMBEDDING_MODEL,
+            dimensions=EMBEDDING_DIMENSIONS,
+            openai_api_key=openai_api_key,
+            http_client=self.http_client
         )
         
-        # Initialize processors
-        self.pdf_processor = EnhancedPDFProcessor()
-        self.metadata_extractor = MetadataExtractor()
-        self.smart_chunker = SmartChunker()
+        # Initialize processors (model-loading ones are shared per process)
+        self.pdf_processor = get_pdf_processor()
+        self.metadata_extractor = get_metadata_extractor()
+        self.smart_chunker = get_smart_chunker()
         self.citation_manager = CitationManager()
         self.search_engine = HybridSearchEngine()
         self.rag_chain = FinancialRAGChain(llm_client=self.openai_client)
         self.response_formatter = ResponseFormatter()
         
+        # Maximum embedding requests in flight while ingesting a document
+        self.embedding_concurrency = 8
+        
+        # Cache of query results; invalidated whenever new chunks are indexed
+        self.cache = QueryCache(max_size=2000, ttl_seconds=600)
+        
+        # Cache of Pinecone matches per query vector; invalidated the same way
+        self.hits_cache = VectorHitsCache(max_size=2000, ttl_seconds=600)
+        
         logger.info("Enhanced Document Processor initialized")
     
     def process_document(self, file_path: str, index_name: str, 
@@ -99,44 +196,60 @@ class EnhancedDocumentProcessor:
                 document_id = self._generate_document_id(file_path, metadata)
             document_info['document_id'] = document_id
             
-            # Step 3: Smart chunking with formula/table preservation
-            logger.info("Step 3: Smart chunking...")
-            chunks = self.smart_chunker.chunk_document(document_info)
-            
-            # Step 4: Generate embeddings for chunks
-            logger.info("Step 4: Generating embeddings...")
-            chunk_embeddings = self._generate_chunk_embeddings(chunks)
+            # Steps 3-5: Smart chunking with formula/table preservation, embedding
+            # generation and Pinecone storage as one pipeline; each embedded batch
+            # is upserted while later batches are still being chunked and embedded
+            logger.info("Step 3-5: Chunking, generating embeddings and storing in vector database...")
+            upload = self._begin_upload(index_name, document_info)
+            try:
+                chunks, chunk_embeddings = self._chunk_and_embed(document_info, on_batch=upload['submit'])
+                logger.info(f"Created {len(chunks)} chunks")
+                
+                # Step 6: Build citation index while the last upserts are in flight
+                logger.info("Step 6: Building citation index...")
+                self._build_citation_index(chunks, document_info)
+            except Exception:
+                # Batches already sent would leave a partial document in the index
+                upload['abort']()
+                raise
             
-            # Step 5: Store in Pinecone with enhanced metadata
-            logger.info("Step 5: Storing in vector database...")
-            storage_result = self._store_chunks_in_pinecone(
-                chunks, chunk_embeddings, index_name, document_info
-            )
+            storage_result = upload['finish']()
             
-            # Step 6: Build citation index
-            logger.info("Step 6: Building citation index...")
-            self._build_citation_index(chunks, document_info)
+            # Cached answers and hits may no longer reflect the index contents
+            self.cache.clear()
+            self.hits_cache.clear()
             
             # Step 7: Update search index
             logger.info("Step 7: Updating search index...")
-            self._update_search_index(chunks, chunk_embeddings)
+            self._update_search_index(chunks, chunk_embeddings, index_name)
+            
+            # Per-chunk statistics as arrays, reduced with NumPy
+            chunk_count = len(chunks)
+            has_formula = np.fromiter((chunk.get('formula_count', 0) > 0 for chunk in chunks), 
+                                      dtype=bool, count=chunk_count)
+            has_table = np.fromiter((chunk.get('table_count', 0) > 0 for chunk in chunks), 
+                                    dtype=bool, count=chunk_count)
+            chunk_sizes = np.fromiter((len(chunk['content']) for chunk in chunks), 
+                                      dtype=np.int64, count=chunk_count)
+            formula_chunks = int(has_formula.sum())
+            table_chunks = int(has_table.sum())
             
             processing_result = {
                 'status': 'success',
                 'document_id': document_id,
                 'document_title': metadata.get('title', 'Unknown'),
-                'chunks_created': len(chunks),
+                'chunks_created': chunk_count,
                 'sections_detected': len(document_info.get('sections', [])),
                 'metadata': metadata,
                 'storage_result': storage_result,
-                'has_formulas': any(chunk.get('formula_count', 0) > 0 for chunk in chunks),
-                'has_tables': any(chunk.get('table_count', 0) > 0 for chunk in chunks),
+                'has_formulas': formula_chunks > 0,
+                'has_tables': table_chunks > 0,
                 'processing_stats': {
                     'total_pages': document_info.get('page_count', 0),
-                    'total_chunks': len(chunks),
-                    'avg_chunk_size': np.mean([len(chunk['content']) for chunk in chunks]) if chunks else 0,
-                    'formula_chunks': sum(1 for chunk in chunks if chunk.get('formula_count', 0) > 0),
-                    'table_chunks': sum(1 for chunk in chunks if chunk.get('table_count', 0) > 0)
+                    'total_chunks': chunk_count,
+                    'avg_chunk_size': chunk_sizes.mean() if chunk_count else 0,
+                    'formula_chunks': formula_chunks,
+                    'table_chunks': table_chunks
                 }
             }
             
@@ -167,42 +280,46 @@ class EnhancedDocumentProcessor:
         """
         logger.info(f"Processing query: {question[:100]}...")
         
+        cache_key = self.cache.make_key(question, index_name, top_k, filters)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            logger.info("Using cached query result")
+            return dict(cached)
+        
         try:
             # Step 1: Generate query embedding
-            query_embedding = self.embeddings.embed_query(question)
+            query_embedding = embed_query_with_cache(self.embeddings, question)
             
-            # Step 2: Hybrid search (BM25 + vector)
-            if hasattr(self.search_engine, 'documents') and self.search_engine.documents:
-                # Use local hybrid search if available
+            # Step 2: Pinecone covers the whole index; the local hybrid engine
+            # only holds chunks uploaded by this process, so its hits are
+            # merged in rather than used in place of the index
+            retrieved_chunks = self._fallback_pinecone_search(
+                query_embedding, index_name, top_k, filters
+            )
+            
+            if self.search_engine.documents:
+                # Hybrid search (BM25 + vector) over chunks indexed into this index
                 search_results = self.search_engine.search(
                     query=question,
                     query_embedding=np.array(query_embedding),
                     top_k=top_k,
-                    filters=filters
+                    filters=dict(filters or {}, index_name=index_name)
                 )
                 
-                # Convert search results to chunks format
-                retrieved_chunks = []
-                for result in search_results:
-                    chunk_data = result.metadata
-                    chunk_data['content'] = result.content
-                    chunk_data['search_score'] = result.score
-                    retrieved_chunks.append(chunk_data)
-            else:
-                # Fallback to Pinecone-only search
-                retrieved_chunks = self._fallback_pinecone_search(
-                    query_embedding, index_name, top_k, filters
-                )
+                if search_results:
+                    # Convert search results to chunks format
+                    local_chunks = [
+                        dict(result.metadata, content=result.content, search_score=result.score)
+                        for result in search_results
+                    ]
+                    retrieved_chunks = self._merge_retrieved_chunks(
+                        local_chunks, retrieved_chunks, top_k
+                    )
             
             # Step 3: Get citations for retrieved chunks
-            citations = []
-            for chunk in retrieved_chunks:
-                chunk_id = chunk.get('chunk_id')
-                if chunk_id:
-                    citation = self.citation_manager.get_citation(chunk_id)
-                    citations.append(citation)
-                else:
-                    citations.append(None)
+            citations = self.citation_manager.get_citations_bulk(
+                [chunk.get('chunk_id') for chunk in retrieved_chunks]
+            )
             
             # Step 4: Generate enhanced response using Financial RAG
             rag_response = self.rag_chain.generate_answer(question, retrieved_chunks, citations)
@@ -215,7 +332,16 @@ class EnhancedDocumentProcessor:
                 confidence=rag_response.confidence
             )
             
-            return {
+            # Search stats in one pass over the (few) retrieved chunks
+            score_sum = 0.0
+            has_formulas = False
+            has_tables = False
+            for chunk in retrieved_chunks:
+                score_sum += chunk.get('search_score', 0)
+                has_formulas = has_formulas or chunk.get('formula_count', 0) > 0
+                has_tables = has_tables or chunk.get('table_count', 0) > 0
+            
+            result = {
                 'status': 'success',
                 'formatted_response': formatted_response,
                 'raw_response': rag_response,
@@ -223,12 +349,15 @@ class EnhancedDocumentProcessor:
                 'citations': citations,
                 'search_stats': {
                     'chunks_retrieved': len(retrieved_chunks),
-                    'avg_search_score': np.mean([c.get('search_score', 0) for c in retrieved_chunks]) if retrieved_chunks else 0,
-                    'has_formulas': any(c.get('formula_count', 0) > 0 for c in retrieved_chunks),
-                    'has_tables': any(c.get('table_count', 0) > 0 for c in retrieved_chunks)
+                    'avg_search_score': score_sum / len(retrieved_chunks) if retrieved_chunks else 0,
+                    'has_formulas': has_formulas,
+                    'has_tables': has_tables
                 }
             }
             
+            self.cache.put(cache_key, result)
+            return dict(result)
+            
         except Exception as e:
             logger.error(f"Error processing query: {str(e)}")
             return {
@@ -242,147 +371,385 @@ class EnhancedDocumentProcessor:
                 )
             }
     
+    def query_documents_batch(self, questions: List[str], index_name: str, 
+                              top_k: int = 5, filters: Optional[Dict] = None, 
+                              max_workers: int = 4,
+                              on_result: Optional[Callable[[str, Dict[str, Any]], None]] = None
+                              ) -> List[Dict[str, Any]]:
+        """
+        Answer several questions, embedding them with one batched request.
+        
+        Uncached question embeddings are fetched in a single embeddings call; the
+        per-question search and answer generation then run in a small thread pool.
+        
+        Args:
+            questions: User questions
+            index_name: Pinecone index to search
+            top_k: Number of chunks to retrieve per question
+            filters: Optional filters for search
+            max_workers: Maximum number of questions processed concurrently
+            on_result: Optional callback invoked with (question, result) as soon as
+                each question finishes, in completion order
+            
+        Returns:
+            One query_documents() result per question, in the same order
+        """
+        if not questions:
+            return []
+        
+        prefetch_query_embeddings(self.embeddings, questions)
+        
+        results: List[Optional[Dict[str, Any]]] = [None] * len(questions)
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(questions))) as executor:
+            futures = {
+                executor.submit(self.query_documents, question, index_name, top_k, filters): i
+                for i, question in enumerate(questions)
+            }
+            
+            for future in as_completed(futures):
+                i = futures[future]
+                results[i] = future.result()
+                if on_result is not None:
+                    on_result(questions[i], results[i])
+        
+        return results
+    
+    async def aquery_documents(self, question: str, index_name: str, 
+                               top_k: int = 5, filters: Optional[Dict] = None) -> Dict[str, Any]:
+        """
+        Async variant of query_documents for issuing several queries concurrently.
+        
+        The pipeline is dominated by blocking network calls (OpenAI, Pinecone), so
+        it runs in a worker thread to keep the event loop free.
+        
+        Args:
+            question: User question
+            index_name: Pinecone index to search
+            top_k: Number of chunks to retrieve
+            filters: Optional filters for search
+            
+        Returns:
+            Enhanced response with citations and confidence
+        """
+        return await asyncio.to_thread(self.query_documents, question, index_name, top_k, filters)
+    
     def _generate_document_id(self, file_path: str, metadata: Dict[str, Any]) -> str:
         """Generate unique document ID."""
-        import hashlib
-        
         # Use file name and metadata for ID generation
         base_name = os.path.basename(file_path)
         title = metadata.get('title', base_name)
         authors = str(metadata.get('authors', []))
         
         id_string = f"{base_name}_{title}_{authors}"
-        return hashlib.md5(id_string.encode()).hexdigest()[:16]
+        return _hash_document_id(id_string)
     
-    def _generate_chunk_embeddings(self, chunks: List[Dict[str, Any]]) -> List[np.ndarray]:
-        """Generate embeddings for document chunks."""
-        texts = [chunk['content'] for chunk in chunks]
+    def _chunk_and_embed(self, document_info: Dict[str, Any], 
+                         on_batch: Optional[Callable[[List[Dict[str, Any]], List[List[float]]], None]] = None
+                         ) -> Tuple[List[Dict[str, Any]], List[List[float]]]:
+        """
+        Chunk a document and embed its chunks as a producer/consumer pipeline.
         
-        # Generate embeddings in batches to avoid rate limits
-        batch_size = 100
+        Chunks are pulled from the chunker stream in batches; batches are
+        embedded on background threads, several requests in flight at once,
+        while later batches are still being chunked.
+        
+        Args:
+            document_info: Document data from EnhancedPDFProcessor
+            on_batch: Optional callback receiving (chunks, embeddings) of each
+                batch, in document order, as soon as the batch is embedded
+            
+        Returns:
+            Tuple of (chunks, embeddings) in document order; embeddings stay the
+            plain float lists returned by the API
+        """
+        # One embeddings call per batch; 96 inputs stays well under the
+        # per-request token and payload limits
+        batch_size = 96
+        chunks = []
         all_embeddings = []
+        pending = deque()  # in-flight (batch, future) pairs, oldest first
         
-        for i in range(0, len(texts), batch_size):
-            batch_texts = texts[i:i + batch_size]
-            batch_embeddings = self.embeddings.embed_documents(batch_texts)
+        def collect() -> None:
+            batch, future = pending.popleft()
+            batch_embeddings = future.result()
             all_embeddings.extend(batch_embeddings)
+            if on_batch is not None:
+                on_batch(batch, batch_embeddings)
+        
+        stream = self.smart_chunker.chunk_stream(document_info)
+        with ThreadPoolExecutor(max_workers=self.embedding_concurrency) as executor:
+            while True:
+                batch = list(islice(stream, batch_size))
+                if not batch:
+                    break
+                chunks.extend(batch)
+                
+                # Cap in-flight requests; results are collected in submission order
+                if len(pending) >= self.embedding_concurrency:
+                    collect()
+                pending.append((batch, executor.submit(
+                    self.embeddings.embed_documents,
+                    [chunk['content'] for chunk in batch]
+                )))
+            
+            while pending:
+                collect()
         
-        return [np.array(emb) for emb in all_embeddings]
+        return chunks, all_embeddings
+    
+    def _get_index(self, index_name: str):
+        """Get the process-wide Pinecone index handle, opening it on first use."""
+        return _get_index_handle(self.pinecone_api_key, index_name)
+    
+    def _upsert_with_retry(self, index, vectors: List[Tuple[str, List[float], Dict[str, Any]]], 
+                           attempts: int = 3) -> None:
+        """Upsert one batch synchronously, backing off exponentially between attempts."""
+        for attempt in range(attempts):
+            try:
+                index.upsert(vectors=vectors)
+                return
+            except Exception as e:
+                if attempt == attempts - 1:
+                    raise
+                delay = 2 ** attempt
+                logger.warning(f"Upsert attempt {attempt + 1} failed ({str(e)}), retrying in {delay}s")
+                time.sleep(delay)
     
     def _store_chunks_in_pinecone(self, chunks: List[Dict[str, Any]], 
-                                 embeddings: List[np.ndarray],
+                                 embeddings: List[List[float]],
                                  index_name: str, 
                                  document_info: Dict[str, Any]) -> Dict[str, Any]:
         """Store chunks in Pinecone with enhanced metadata."""
+        upload = self._begin_upload(index_name, document_info)
+        upload['submit'](chunks, embeddings)
+        return upload['finish']()
+    
+    def _begin_upload(self, index_name: str, 
+                      document_info: Dict[str, Any]) -> Dict[str, Callable]:
+        """
+        Start an incremental Pinecone upload for a document.
+        
+        Returns:
+            Dict with 'submit'(chunks, embeddings), which sends the vectors as
+            async upserts without waiting, 'finish'(), which waits for all
+            submitted upserts (retrying failed batches) and returns the storage
+            result, and 'abort'(), which waits for the submitted upserts and
+            undoes them: vectors this upload created are deleted and vectors it
+            overwrote are restored. Errors are reported by finish() rather than
+            raised.
+        """
+        # 'previous' holds (id, values, metadata) of vectors that existed before
+        # this upload overwrote them; chunk IDs are content hashes, so a
+        # re-upload or a chunk shared with another document reuses them
+        state = {'pending': [], 'previous': [], 'submitted': set(), 'vectors_stored': 0, 
+                 'error': None, 'index': None}
         try:
-            index = self.pc.Index(index_name)
-            
-            # Prepare vectors for upsert
-            vectors = []
-            for i, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
-                metadata = {
-                    'content': chunk['content'],
-                    'chunk_id': chunk['chunk_id'],
-                    'document_id': document_info['document_id'],
-                    'document_title': document_info.get('extracted_metadata', {}).get('title', 'Unknown'),
-                    'page_num': chunk.get('page_num', 1),
-                    'section_id': chunk.get('section_id', ''),
-                    'section_title': chunk.get('section_title', ''),
-                    'content_type': chunk.get('content_type', 'text'),
-                    'formula_count': chunk.get('formula_count', 0),
-                    'table_count': chunk.get('table_count', 0),
-                    'character_count': chunk.get('character_count', 0),
-                    'word_count': chunk.get('word_count', 0),
-                    'upload_user': document_info.get('upload_user', 'unknown'),
-                    'upload_date': document_info.get('upload_date', ''),
+            state['index'] = self._get_index(index_name)
+        except Exception as e:
+            state['error'] = e
+        
+        def submit(chunks: List[Dict[str, Any]], embeddings: List[List[float]]) -> None:
+            if state['error'] is not None:
+                return
+            try:
+                vectors = self._iter_vectors(chunks, embeddings, index_name, document_info)
+                
+                # Send batches on the index's thread pool without waiting
+                batch_size = 100
+                while True:
+                    batch = list(islice(vectors, batch_size))
+                    if not batch:
+                        break
+                    # IDs repeated within this upload already hold its own vectors
+                    new_ids = [vector_id for vector_id, _, _ in batch if vector_id not in state['submitted']]
+                    if new_ids:
+                        existing = state['index'].fetch(ids=new_ids).vectors
+                        state['previous'].extend(
+                            (vector_id, list(vector.values), dict(vector.metadata or {}))
+                            for vector_id, vector in existing.items()
+                        )
+                        state['submitted'].update(new_ids)
+                    state['pending'].append((batch, state['index'].upsert(vectors=batch, async_req=True)))
+            except Exception as e:
+                state['error'] = e
+        
+        def finish() -> Dict[str, Any]:
+            try:
+                if state['error'] is not None:
+                    raise state['error']
+                
+                # A failed batch is retried on its own with backoff
+                for batch, async_result in state['pending']:
+                    try:
+                        async_result.get()
+                    except Exception as e:
+                        logger.warning(f"Upsert of {len(batch)} vectors failed, retrying: {str(e)}")
+                        self._upsert_with_retry(state['index'], batch)
+                    state['vectors_stored'] += len(batch)
+                
+                return {
+                    'status': 'success',
+                    'vectors_stored': state['vectors_stored'],
                     'index_name': index_name
                 }
                 
-                vectors.append({
-                    'id': chunk['chunk_id'],
-                    'values': embedding.tolist(),
-                    'metadata': metadata
-                })
-            
-            # Upsert in batches
-            batch_size = 100
-            total_upserted = 0
+            except Exception as e:
+                logger.error(f"Error storing chunks in Pinecone: {str(e)}")
+                return {
+                    'status': 'error',
+                    'error_message': str(e)
+                }
+        
+        def abort() -> None:
+            if state['index'] is None or not state['pending']:
+                return
             
-            for i in range(0, len(vectors), batch_size):
-                batch = vectors[i:i + batch_size]
-                index.upsert(vectors=batch)
-                total_upserted += len(batch)
+            # Deletes must not race upserts still in flight for the same IDs
+            for _, async_result in state['pending']:
+                try:
+                    async_result.get()
+                except Exception:
+                    pass
             
-            return {
-                'status': 'success',
-                'vectors_stored': total_upserted,
+            previous = state['previous']
+            previous_ids = {vector_id for vector_id, _, _ in previous}
+            created_ids = list(dict.fromkeys(
+                vector_id for batch, _ in state['pending'] for vector_id, _, _ in batch
+                if vector_id not in previous_ids
+            ))
+            try:
+                # Pinecone accepts at most 1000 IDs per delete request
+                for i in range(0, len(created_ids), 1000):
+                    state['index'].delete(ids=created_ids[i:i + 1000])
+                for i in range(0, len(previous), 100):
+                    self._upsert_with_retry(state['index'], previous[i:i + 100])
+                logger.info(f"Rolled back a failed upload: removed {len(created_ids)} vectors, "
+                            f"restored {len(previous)}")
+            except Exception as e:
+                logger.error(f"Could not roll back a failed upload ({len(created_ids)} created, "
+                             f"{len(previous)} overwritten vectors): {str(e)}")
+        
+        return {'submit': submit, 'finish': finish, 'abort': abort}
+    
+    def _iter_vectors(self, chunks: List[Dict[str, Any]], embeddings: List[List[float]], index_name: str, 
+                      document_info: Dict[str, Any]) -> Iterator[Tuple[str, List[float], Dict[str, Any]]]:
+        """Yield (id, values, metadata) upsert tuples for chunks and their embeddings."""
+        document_id = document_info['document_id']
+        document_title = document_info.get('extracted_metadata', {}).get('title', 'Unknown')
+        upload_user = document_info.get('upload_user', 'unknown')
+        upload_date = document_info.get('upload_date', '')
+        
+        # Values travel as JSON text; six decimals cut the request to under half
+        # the size of full float reprs and move cosine scores by ~1e-5 at most.
+        # The batch is rounded in one vectorized pass; no per-vector arrays are kept
+        values = np.round(embeddings, _UPSERT_DECIMALS).tolist()
+        
+        # Built one tuple at a time as upsert batches are taken; no intermediate
+        # id/metadata lists or batch slices
+        for chunk, chunk_values in zip(chunks, values):
+            chunk_get = chunk.get
+            yield (chunk['chunk_id'], chunk_values, {
+                'content': chunk['content'],
+                'chunk_id': chunk['chunk_id'],
+                'document_id': document_id,
+                'document_title': document_title,
+                'page_num': chunk_get('page_num', 1),
+                'section_id': chunk_get('section_id', ''),
+                'section_title': chunk_get('section_title', ''),
+                'content_type': chunk_get('content_type', 'text'),
+                'formula_count': chunk_get('formula_count', 0),
+                'table_count': chunk_get('table_count', 0),
+                'character_count': chunk_get('character_count', 0),
+                'word_count': chunk_get('word_count', 0),
+                'upload_user': upload_user,
+                'upload_date': upload_date,
                 'index_name': index_name
-            }
-            
-        except Exception as e:
-            logger.error(f"Error storing chunks in Pinecone: {str(e)}")
-            return {
-                'status': 'error',
-                'error_message': str(e)
-            }
+            })
     
     def _build_citation_index(self, chunks: List[Dict[str, Any]], 
                              document_info: Dict[str, Any]) -> None:
         """Build citation index for precise source references."""
-        for chunk in chunks:
-            # Create coordinates from chunk metadata
-            coordinates = {
-                'x1': 0,  # Would be populated from actual PDF coordinates
-                'y1': 0,
-                'x2': 100,
-                'y2': 100
-            }
-            
-            self.citation_manager.add_citation(chunk, document_info, coordinates)
+        self.citation_manager.add_citations_bulk(chunks, document_info, 
+                                                 default_coordinates=_DEFAULT_COORDS)
     
     def _update_search_index(self, chunks: List[Dict[str, Any]], 
-                           embeddings: List[np.ndarray]) -> None:
-        """Update the hybrid search index."""
-        # Only update if we have existing search index
-        if hasattr(self.search_engine, 'documents'):
-            # For now, we'll rebuild the index
-            # In production, this could be optimized for incremental updates
-            pass
+                           embeddings: List[List[float]], index_name: str) -> None:
+        """Add the new chunks to the hybrid search index incrementally."""
+        # Tag chunks with their Pinecone index so local search stays per index
+        self.search_engine.add_documents(
+            [dict(chunk, index_name=index_name) for chunk in chunks], embeddings
+        )
     
     def _fallback_pinecone_search(self, query_embedding: List[float], 
                                  index_name: str, top_k: int, 
                                  filters: Optional[Dict] = None) -> List[Dict[str, Any]]:
         """Fallback search using only Pinecone."""
+        hits_key = self.hits_cache.make_key(query_embedding, index_name, top_k, filters)
+        hits = self.hits_cache.get(hits_key)
+        if hits is not None:
+            # Fresh dicts so callers can annotate chunks without touching the cache
+            return [dict(metadata, search_score=score) for score, metadata in hits]
+        
         try:
-            index = self.pc.Index(index_name)
+            index = self._get_index(index_name)
             
-            # Prepare filter
-            pinecone_filter = {}
+            # Prepare filter (cached for hashable filter values)
+            pinecone_filter = None
             if filters:
-                for key, value in filters.items():
-                    pinecone_filter[key] = {"$eq": value}
+                try:
+                    pinecone_filter = _build_pinecone_filter(tuple(sorted(filters.items())))
+                except TypeError:
+                    pinecone_filter = {key: {"$eq": value} for key, value in filters.items()}
             
-            # Query Pinecone
+            # Query Pinecone; matched vectors themselves are never used
             results = index.query(
                 vector=query_embedding,
                 top_k=top_k,
                 include_metadata=True,
-                filter=pinecone_filter if pinecone_filter else None
+                include_values=False,
+                filter=pinecone_filter
             )
             
             # Convert to our format
-            retrieved_chunks = []
-            for match in results.matches:
-                chunk_data = match.metadata
-                chunk_data['search_score'] = match.score
-                retrieved_chunks.append(chunk_data)
+            hits = [(match.score, dict(match.metadata or {})) for match in results.matches]
+            self.hits_cache.put(hits_key, hits)
             
-            return retrieved_chunks
+            return [dict(metadata, search_score=score) for score, metadata in hits]
             
         except Exception as e:
             logger.error(f"Error in fallback Pinecone search: {str(e)}")
             return []
     
+    def _merge_retrieved_chunks(self, local_chunks: List[Dict[str, Any]],
+                                index_chunks: List[Dict[str, Any]],
+                                top_k: int) -> List[Dict[str, Any]]:
+        """
+        Merge local hybrid hits with Pinecone hits by reciprocal rank.
+        
+        The two lists score on different scales (RRF vs cosine), so only the
+        ranks are combined. A chunk found by both keeps the local entry.
+        
+        Args:
+            local_chunks: Ranked chunks from the local hybrid engine
+            index_chunks: Ranked chunks from Pinecone
+            top_k: Number of chunks to return
+            
+        Returns:
+            Up to top_k chunks, best first
+        """
+        rrf_k = self.search_engine.rrf_k
+        fused_scores = {}
+        chunks_by_id = {}
+        
+        for ranked in (local_chunks, index_chunks):
+            for rank, chunk in enumerate(ranked, start=1):
+                chunk_id = chunk.get('chunk_id')
+                fused_scores[chunk_id] = fused_scores.get(chunk_id, 0.0) + 1.0 / (rrf_k + rank)
+                chunks_by_id.setdefault(chunk_id, chunk)
+        
+        best_ids = heapq.nlargest(top_k, fused_scores, key=fused_scores.__getitem__)
+        return [chunks_by_id[chunk_id] for chunk_id in best_ids]
+    
     def _convert_citations_to_sources(self, citations: List[Any]) -> List[Dict[str, Any]]:
         """Convert citation objects to source format for response formatter."""
         sources = []
@@ -400,12 +767,30 @@ class EnhancedDocumentProcessor:
         
         return sources
     
+    def close(self) -> None:
+        """
+        Release this processor's own resources: open PDFs and cached results.
+        
+        The HTTP client and Pinecone index handles are shared by all
+        processors in the process and stay open.
+        """
+        self.citation_manager.close_documents()
+        self.cache.clear()
+        self.hits_cache.clear()
+    
+    def __enter__(self) -> 'EnhancedDocumentProcessor':
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+    
     def get_system_stats(self) -> Dict[str, Any]:
         """Get comprehensive system statistics."""
         return {
             'citations_count': len(self.citation_manager.citations_index),
             'documents_indexed': len(self.citation_manager.document_citations),
             'search_index_stats': self.search_engine.get_index_stats() if hasattr(self.search_engine, 'get_index_stats') else {},
+            'query_cache': self.cache.stats(),
             'processors_initialized': {
                 'pdf_processor': self.pdf_processor is not None,
                 'metadata_extractor': self.metadata_extractor is not None,
@@ -415,4 +800,29 @@ class EnhancedDocumentProcessor:
                 'rag_chain': self.rag_chain is not None,
                 'response_formatter': self.response_formatter is not None
             }
-        }
\ No newline at end of file
+        }
+
+
+_shared_processors: Dict[Tuple[str, str], EnhancedDocumentProcessor] = {}
+_shared_processors_lock = threading.Lock()
+
+
+def get_enhanced_processor(openai_api_key: str, pinecone_api_key: str) -> EnhancedDocumentProcessor:
+    """
+    Return the process-wide EnhancedDocumentProcessor for a pair of API keys.
+    
+    Pages call this on every Streamlit rerun, so the processor (and its query
+    caches, citation index and local search index) is built once, not per rerun.
+    Its answer caches are cleared with the app's other answer caches when
+    documents are uploaded or deleted.
+    """
+    key = (openai_api_key, pinecone_api_key)
+    with _shared_processors_lock:
+        processor = _shared_processors.get(key)
+        if processor is None:
+            from utils.rag import register_response_cache
+            
+            processor = _shared_processors[key] = EnhancedDocumentProcessor(openai_api_key, pinecone_api_key)
+            register_response_cache(processor.cache)
+            register_response_cache(processor.hits_cache)
+        return processor
\ No newline at end of file
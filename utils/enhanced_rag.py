@@ -8,6 +8,8 @@ from langchain_core.runnables import RunnablePassthrough
 from langchain_openai import ChatOpenAI
 from langchain.prompts import PromptTemplate
 from utils.config import get_api_keys
+from utils.query_cache import QueryCache
+from utils.rag import register_response_cache
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -51,6 +53,11 @@ class EnhancedRAG:
 
             ОТВЕТ:"""
         )
+        
+        # Answers of query_hybrid keyed by (question, index); shared by all
+        # sessions and cleared with the other answer caches on upload/delete
+        self.cache = QueryCache(max_size=256, ttl_seconds=600)
+        register_response_cache(self.cache)
     
     def query_with_vectorstore(self, question: str, vectorstore) -> str:
         """Query using traditional vectorstore (fallback method)"""
@@ -95,6 +102,20 @@ class EnhancedRAG:
         """
         logger.info(f"Starting hybrid query for: {question[:100]}...")
         
+        # Repeated questions are answered from cache until documents change
+        cache_key = self.cache.make_key(question, st.session_state.get('current_index') or '', 0)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            logger.info("Returning cached hybrid answer")
+            return cached
+        
+        result = self._query_hybrid_uncached(question, vectorstore, enhanced_processor)
+        if not result.startswith("❌"):
+            self.cache.put(cache_key, result)
+        return result
+    
+    def _query_hybrid_uncached(self, question: str, vectorstore=None, enhanced_processor=None) -> str:
+        """Run the enhanced processor, falling back to the vectorstore"""
         # Try enhanced processor first if available
         if enhanced_processor:
             try:
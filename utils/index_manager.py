@@ -1,63 +1,122 @@
 import streamlit as st
+import os
+import json
 import time
+import logging
 from pinecone import Pinecone, ServerlessSpec
 from langchain_pinecone import PineconeVectorStore
 from langchain_openai import OpenAIEmbeddings
 from utils.auth import get_user_index_id
+from utils.config import EMBEDDING_MODEL, EMBEDDING_DIMENSIONS
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_shared_embeddings = None
+
+# Re-embedded vectors of an index being migrated are written here before the old
+# index is deleted, and removed once they are all stored in the new one
+MIGRATION_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'migrations')
+
+
+def _get_embeddings():
+    """Return a process-wide OpenAIEmbeddings client (one tokenizer and HTTP client)"""
+    global _shared_embeddings
+    if _shared_embeddings is None:
+        _shared_embeddings = OpenAIEmbeddings(model=EMBEDDING_MODEL, dimensions=EMBEDDING_DIMENSIONS)
+    return _shared_embeddings
 
 class IndexManager:
     def __init__(self, pinecone_key):
         self.pinecone_key = pinecone_key
         self.pc = Pinecone(api_key=pinecone_key)
-        self.embeddings = OpenAIEmbeddings(model="text-embedding-ada-002")
+        self.embeddings = _get_embeddings()
         self.spec = ServerlessSpec(cloud='aws', region='us-east-1')
         
-        # Initialize indices
-        self._ensure_shared_index()
+        # Index handles and vectorstores are opened once per index name and reused
+        self._indexes = {}
+        self._vectorstores = {}
+        
+        # Initialize indices; the index list is fetched once for both checks
+        existing_indexes = set(self.pc.list_indexes().names())
+        self._ensure_shared_index(existing_indexes)
         if st.session_state.username:
-            self._ensure_personal_index(st.session_state.username)
+            self._ensure_personal_index(st.session_state.username, existing_indexes)
     
-    def _ensure_shared_index(self):
+    def _ensure_shared_index(self, existing_indexes):
         """Ensure shared index exists"""
         index_name = "pdf-qa-shared"
-        existing_indexes = [item['name'] for item in self.pc.list_indexes().indexes]
         
         if index_name not in existing_indexes:
             try:
                 self.pc.create_index(
                     index_name,
-                    dimension=1536,
+                    dimension=EMBEDDING_DIMENSIONS,
                     metric='cosine',
                     spec=self.spec
                 )
-                # Wait for index to be ready
-                while not self.pc.describe_index(index_name).status['ready']:
-                    time.sleep(1)
+                self._wait_until_ready(index_name)
             except Exception as e:
                 st.error(f"Ошибка создания общего индекса: {str(e)}")
+        else:
+            self._warn_if_outdated(index_name)
     
-    def _ensure_personal_index(self, username):
+    def _ensure_personal_index(self, username, existing_indexes):
         """Ensure personal index exists for user"""
         user_id = get_user_index_id(username)
         index_name = f"pdf-qa-personal-{user_id}"
-        existing_indexes = [item['name'] for item in self.pc.list_indexes().indexes]
         
         if index_name not in existing_indexes:
             try:
                 self.pc.create_index(
                     index_name,
-                    dimension=1536,
+                    dimension=EMBEDDING_DIMENSIONS,
                     metric='cosine',
                     spec=self.spec
                 )
-                # Wait for index to be ready
-                while not self.pc.describe_index(index_name).status['ready']:
-                    time.sleep(1)
+                self._wait_until_ready(index_name)
             except Exception as e:
                 st.error(f"Ошибка создания личного индекса: {str(e)}")
+        else:
+            self._warn_if_outdated(index_name)
+    
+    def _wait_until_ready(self, index_name, initial_delay=0.25, max_delay=5.0):
+        """Wait for a newly created index to become ready, polling with exponential backoff"""
+        delay = initial_delay
+        while not self.pc.describe_index(index_name).status['ready']:
+            time.sleep(delay)
+            delay = min(delay * 1.5, max_delay)
+    
+    def _warn_if_outdated(self, index_name):
+        """Warn when an existing index was built for another embedding dimension"""
+        try:
+            dimension = self.pc.describe_index(index_name).dimension
+        except Exception:
+            return
+        if dimension != EMBEDDING_DIMENSIONS:
+            st.warning(
+                f"Индекс {index_name} создан для векторов размерности {dimension}, "
+                f"а текущая модель использует {EMBEDDING_DIMENSIONS}. Требуется миграция индекса."
+            )
+    
+    def _get_index(self, index_name):
+        """Get cached index handle, opening it on first use"""
+        index = self._indexes.get(index_name)
+        if index is None:
+            index = self._indexes[index_name] = self.pc.Index(index_name)
+        return index
+    
+    def _get_vectorstore(self, index_name):
+        """Get cached vectorstore for index, creating it on first use"""
+        vectorstore = self._vectorstores.get(index_name)
+        if vectorstore is None:
+            vectorstore = PineconeVectorStore(self._get_index(index_name), self.embeddings, "text")
+            self._vectorstores[index_name] = vectorstore
+        return vectorstore
     
     def get_vectorstore(self, index_type="shared", username=None):
-        """Get vectorstore for specified index type"""
+        """Get vectorstore for specified index type, or None if it cannot be opened (the caller reports it)"""
         if index_type == "personal" and username:
             user_id = get_user_index_id(username)
             index_name = f"pdf-qa-personal-{user_id}"
@@ -65,30 +124,28 @@ class IndexManager:
             index_name = "pdf-qa-shared"
         
         try:
-            index = self.pc.Index(index_name)
-            return PineconeVectorStore(index, self.embeddings, "text")
-        except Exception as e:
-            st.error(f"Ошибка подключения к индексу {index_name}: {str(e)}")
+            return self._get_vectorstore(index_name)
+        except Exception:
+            logger.exception(f"Error connecting to index {index_name}")
             return None
     
     def get_current_vectorstore(self):
-        """Get vectorstore for current user's selected index"""
+        """Get vectorstore for current user's selected index, or None if it cannot be opened (the caller reports it)"""
         if not st.session_state.current_index:
             # Default to personal index
             user_id = get_user_index_id(st.session_state.username)
             st.session_state.current_index = f"pdf-qa-personal-{user_id}"
         
         try:
-            index = self.pc.Index(st.session_state.current_index)
-            return PineconeVectorStore(index, self.embeddings, "text")
-        except Exception as e:
-            st.error(f"Ошибка подключения к индексу: {str(e)}")
+            return self._get_vectorstore(st.session_state.current_index)
+        except Exception:
+            logger.exception(f"Error connecting to index {st.session_state.current_index}")
             return None
     
     def get_index_stats(self, index_name):
         """Get statistics for specified index"""
         try:
-            index = self.pc.Index(index_name)
+            index = self._get_index(index_name)
             stats = index.describe_index_stats()
             return {
                 "status": "success",
@@ -97,21 +154,192 @@ class IndexManager:
                 "index_fullness": stats.index_fullness
             }
         except Exception as e:
+            logger.exception(f"Error getting stats for index {index_name}")
             return {"status": "error", "message": str(e)}
     
     def clear_index(self, index_name):
         """Clear all documents from specified index"""
         try:
-            index = self.pc.Index(index_name)
+            index = self._get_index(index_name)
             index.delete(delete_all=True)
             return {"status": "success", "message": "Индекс очищен успешно"}
         except Exception as e:
             return {"status": "error", "message": str(e)}
     
+    def migrate_index(self, index_name, batch_size=100):
+        """Re-embed an index built for a previous embedding model (one-time, re-embeds every stored text).
+        
+        Every vector of every namespace is read and re-embedded before anything
+        is deleted; if a vector has no stored text or embedding fails, the index
+        is left untouched and an error is returned. The re-embedded vectors are
+        saved to a backup file under MIGRATION_DATA_DIR before the old index is
+        deleted, and the file is only removed once all of them are stored in the
+        new index. If rebuilding fails, calling migrate_index again resumes from
+        the backup instead of the (already deleted) old index.
+        """
+        backup_path = os.path.join(MIGRATION_DATA_DIR, f"{index_name}.jsonl")
+        
+        if os.path.exists(backup_path):
+            try:
+                records = self._load_migration_backup(backup_path)
+            except (OSError, ValueError) as e:
+                logger.exception(f"Error reading migration backup {backup_path}")
+                return {"status": "error", "message": f"Не удалось прочитать резервную копию {backup_path}: {str(e)}"}
+            logger.info(f"Resuming migration of {index_name} from {backup_path} ({len(records)} vectors)")
+        else:
+            try:
+                records = self._reembed_index(index_name, batch_size)
+            except ValueError as e:
+                return {"status": "error", "message": f"Миграция отменена: {str(e)} Индекс не изменен."}
+            except Exception as e:
+                logger.exception(f"Error preparing migration of index {index_name}")
+                return {"status": "error", "message": f"Миграция отменена, индекс не изменен: {str(e)}"}
+            
+            try:
+                self._write_migration_backup(backup_path, records)
+            except OSError as e:
+                logger.exception(f"Error writing migration backup {backup_path}")
+                return {"status": "error", "message": f"Миграция отменена, индекс не изменен: {str(e)}"}
+        
+        try:
+            self._rebuild_index(index_name, records, batch_size)
+        except Exception as e:
+            logger.exception(f"Error rebuilding index {index_name} during migration")
+            return {
+                "status": "error",
+                "message": f"Ошибка при пересоздании индекса: {str(e)}. Векторы сохранены в {backup_path}; "
+                           f"повторите миграцию, чтобы продолжить."
+            }
+        
+        os.remove(backup_path)
+        return {"status": "success", "message": f"Индекс перенесен, векторов: {len(records)}"}
+    
+    def has_pending_migration(self, index_name):
+        """Whether a migration of index_name stopped after its backup was written"""
+        return os.path.exists(os.path.join(MIGRATION_DATA_DIR, f"{index_name}.jsonl"))
+    
+    def _reembed_index(self, index_name, batch_size):
+        """Read every vector of every namespace and re-embed its stored text.
+        
+        Returns:
+            List of (namespace, vector_id, values, metadata) records
+            
+        Raises:
+            ValueError: If some vectors have no stored text to re-embed
+        """
+        # LangChain stores texts as 'text', the v3 processor as 'content'
+        old_index = self.pc.Index(index_name)
+        namespaces = list(old_index.describe_index_stats().namespaces or {}) or [""]
+        stored = []
+        missing_text = 0
+        for namespace in namespaces:
+            for ids in old_index.list(namespace=namespace):
+                for vector_id, vector in old_index.fetch(ids=ids, namespace=namespace).vectors.items():
+                    metadata = vector.metadata or {}
+                    text = metadata.get('text') or metadata.get('content')
+                    if text:
+                        stored.append((namespace, vector_id, text, metadata))
+                    else:
+                        missing_text += 1
+        
+        if missing_text:
+            raise ValueError(f"у {missing_text} векторов нет сохраненного текста, их нельзя пересчитать.")
+        
+        records = []
+        for i in range(0, len(stored), batch_size):
+            batch = stored[i:i + batch_size]
+            values = self.embeddings.embed_documents([text for _, _, text, _ in batch])
+            records.extend(
+                (namespace, vector_id, vector, metadata)
+                for (namespace, vector_id, _, metadata), vector in zip(batch, values)
+            )
+        return records
+    
+    def _write_migration_backup(self, backup_path, records):
+        """Write re-embedded records to the backup file (atomically, via a temp file)"""
+        os.makedirs(MIGRATION_DATA_DIR, exist_ok=True)
+        temp_path = f"{backup_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            for namespace, vector_id, values, metadata in records:
+                f.write(json.dumps([namespace, vector_id, values, metadata], ensure_ascii=False, default=str) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, backup_path)
+    
+    def _load_migration_backup(self, backup_path):
+        """Read (namespace, vector_id, values, metadata) records from a backup file"""
+        with open(backup_path, 'r', encoding='utf-8') as f:
+            return [tuple(json.loads(line)) for line in f if line.strip()]
+    
+    def _rebuild_index(self, index_name, records, batch_size, attempts=5):
+        """Recreate index_name with the current dimension and upsert records into it.
+        
+        Safe to call again after a partial failure: an index that already has
+        the current dimension is kept, and upserts overwrite by ID.
+        """
+        self._indexes.pop(index_name, None)
+        self._vectorstores.pop(index_name, None)
+        
+        if index_name in set(self.pc.list_indexes().names()):
+            if self.pc.describe_index(index_name).dimension != EMBEDDING_DIMENSIONS:
+                self.pc.delete_index(index_name)
+                self._wait_until_deleted(index_name)
+        
+        # Deletion finishes asynchronously; creation is retried while the name is still taken
+        if index_name not in set(self.pc.list_indexes().names()):
+            for attempt in range(attempts):
+                try:
+                    self.pc.create_index(
+                        index_name,
+                        dimension=EMBEDDING_DIMENSIONS,
+                        metric='cosine',
+                        spec=self.spec
+                    )
+                    break
+                except Exception as e:
+                    if attempt == attempts - 1:
+                        raise
+                    delay = 2 ** attempt
+                    logger.warning(f"Creating index {index_name} failed ({str(e)}), retrying in {delay}s")
+                    time.sleep(delay)
+        self._wait_until_ready(index_name)
+        
+        # Upload in batches, each vector into its original namespace
+        index = self._get_index(index_name)
+        for i in range(0, len(records), batch_size):
+            batch_vectors = {}
+            for namespace, vector_id, values, metadata in records[i:i + batch_size]:
+                batch_vectors.setdefault(namespace, []).append((vector_id, values, metadata))
+            for namespace, vectors in batch_vectors.items():
+                self._upsert_with_retry(index, vectors, namespace, attempts)
+    
+    def _upsert_with_retry(self, index, vectors, namespace, attempts):
+        """Upsert one batch, backing off exponentially between attempts"""
+        for attempt in range(attempts):
+            try:
+                index.upsert(vectors=vectors, namespace=namespace)
+                return
+            except Exception as e:
+                if attempt == attempts - 1:
+                    raise
+                delay = 2 ** attempt
+                logger.warning(f"Upsert of {len(vectors)} vectors failed ({str(e)}), retrying in {delay}s")
+                time.sleep(delay)
+    
+    def _wait_until_deleted(self, index_name, initial_delay=0.5, max_delay=10.0, timeout=600.0):
+        """Wait until a deleted index disappears from the index list, polling with exponential backoff"""
+        delay = initial_delay
+        deadline = time.monotonic() + timeout
+        while index_name in set(self.pc.list_indexes().names()):
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Index {index_name} is still being deleted after {timeout:.0f}s")
+            time.sleep(delay)
+            delay = min(delay * 1.5, max_delay)
+    
     def list_all_indexes(self):
         """List all indexes in account"""
         try:
-            indexes = [item['name'] for item in self.pc.list_indexes().indexes]
+            indexes = self.pc.list_indexes().names()
             return {"status": "success", "indexes": indexes}
         except Exception as e:
             return {"status": "error", "message": str(e)}
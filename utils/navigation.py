@@ -1,6 +1,18 @@
 import streamlit as st
 from utils.auth import get_user_index_id
 
+# Sidebar sections, built once at import instead of on every rerun
+_NAV_LABELS = {
+    "home": "🏠 Главная",
+    "chat": "💬 Чат с документами",
+    "upload": "📎 Загрузка документов",
+    "documents": "📋 Управление документами",
+    "index_management": "🔄 Переключение индексов",
+    "debug": "🔍 Отладка поиска",
+}
+_NAV_PAGES = tuple(_NAV_LABELS)
+_INDEX_OPTIONS = ("Личный", "Общий")
+
 def setup_navigation():
     """Setup sidebar navigation"""
     with st.sidebar:
@@ -11,60 +23,19 @@ def setup_navigation():
         
         # Navigation links
         st.markdown("### 📋 Разделы:")
-        
-        # Home page
-        if st.button("🏠 Главная", use_container_width=True):
-            st.session_state.current_page = "home"
-            st.rerun()
-        
-        # Chat page
-        if st.button("💬 Чат с документами", use_container_width=True):
-            st.session_state.current_page = "chat"
-            st.rerun()
-        
-        # Upload page
-        if st.button("📎 Загрузка документов", use_container_width=True):
-            st.session_state.current_page = "upload"
-            st.rerun()
-        
-        # Documents page  
-        if st.button("📋 Управление документами", use_container_width=True):
-            st.session_state.current_page = "documents"
-            st.rerun()
-        
-        # Index management
-        if st.button("🔄 Переключение индексов", use_container_width=True):
-            st.session_state.current_page = "index_management"
-            st.rerun()
-        
-        # Debug page
-        if st.button("🔍 Отладка поиска", use_container_width=True):
-            st.session_state.current_page = "debug"
-            st.rerun()
+        # Bound to current_page: a selection updates the state and reruns once
+        st.radio(
+            "Разделы",
+            _NAV_PAGES,
+            key="current_page",
+            format_func=_NAV_LABELS.__getitem__,
+            label_visibility="collapsed"
+        )
         
         st.markdown("---")
         
         # Index switcher
-        st.markdown("### 📊 Текущий индекс:")
-        index_options = ["Личный", "Общий"]
-        user_id = get_user_index_id(st.session_state.username)
-        current_index_type = "Личный" if st.session_state.current_index and st.session_state.current_index.endswith(f"-{user_id}") else "Общий"
-        
-        new_index_type = st.selectbox(
-            "Выберите индекс:",
-            index_options,
-            index=index_options.index(current_index_type) if current_index_type in index_options else 0,
-            key="index_selector"
-        )
-        
-        # Switch index if changed
-        if new_index_type != current_index_type:
-            if new_index_type == "Личный":
-                user_id = get_user_index_id(st.session_state.username)
-                st.session_state.current_index = f"pdf-qa-personal-{user_id}"
-            else:
-                st.session_state.current_index = "pdf-qa-shared"
-            st.rerun()
+        _render_index_switcher()
         
         st.markdown("---")
         
@@ -73,6 +44,29 @@ def setup_navigation():
             from utils.auth import logout
             logout()
 
+def _render_index_switcher():
+    """Render the personal/shared index selector"""
+    st.markdown("### 📊 Текущий индекс:")
+    personal_index = f"pdf-qa-personal-{get_user_index_id(st.session_state.username)}"
+    current_index_type = "Личный" if st.session_state.current_index == personal_index else "Общий"
+    
+    # The callback switches the index before the widget-triggered rerun
+    st.selectbox(
+        "Выберите индекс:",
+        _INDEX_OPTIONS,
+        index=_INDEX_OPTIONS.index(current_index_type),
+        key="index_selector",
+        on_change=_switch_index,
+        args=(personal_index,)
+    )
+
+def _switch_index(personal_index):
+    """Point current_index at the index picked in the selector"""
+    if st.session_state.index_selector == "Личный":
+        st.session_state.current_index = personal_index
+    else:
+        st.session_state.current_index = "pdf-qa-shared"
+
 def get_current_page():  
     """Get current page from session state"""
     # current_page is initialized in main app.py
@@ -0,0 +1,303 @@
+"""
+Query Result Cache
+
+Thread-safe LRU cache with time-to-live expiry for query pipeline results.
+Repeated questions against the same index skip embedding, vector search and
+LLM generation entirely. A separate process-wide cache keeps query embeddings,
+which stay valid even when answers differ (other top_k, filters or index), and
+a vector hits cache skips the Pinecone round-trip for repeated query vectors.
+A semantic cache matches paraphrased questions by embedding similarity.
+"""
+
+import re
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional, Tuple
+import logging
+import numpy as np
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize_question(question: str) -> str:
+    """Normalize a question for cache lookups (case and whitespace insensitive)."""
+    return _WHITESPACE_RE.sub(' ', question).strip().lower()
+
+
+class QueryCache:
+    """
+    LRU cache with per-entry TTL, safe for use from multiple threads.
+    """
+    
+    def __init__(self, max_size: int = 2000, ttl_seconds: float = 600):
+        """
+        Initialize the cache.
+        
+        Args:
+            max_size: Maximum number of entries before least recently used are evicted
+            ttl_seconds: Seconds after which an entry expires
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: 'OrderedDict[str, Tuple[float, Any]]' = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def make_key(question: str, index_name: str, top_k: int, 
+                 filters: Optional[Dict] = None) -> str:
+        """
+        Build a cache key for a query.
+        
+        Args:
+            question: User question
+            index_name: Pinecone index searched
+            top_k: Number of chunks retrieved
+            filters: Optional search filters
+            
+        Returns:
+            SHA-256 hex digest identifying the query
+        """
+        parts = [
+            normalize_question(question),
+            index_name,
+            str(top_k),
+            json.dumps(filters, sort_keys=True, default=str) if filters else ''
+        ]
+        return hashlib.sha256('\0'.join(parts).encode('utf-8')).hexdigest()
+    
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for key, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, value = entry
+                if time.monotonic() - stored_at <= self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            
+            self.misses += 1
+            return None
+    
+    def put(self, key: str, value: Any) -> None:
+        """Store value under key, evicting the least recently used entries if full."""
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        """Drop all entries (e.g. after new documents are indexed)."""
+        with self._lock:
+            if self._entries:
+                logger.info(f"Invalidating {len(self._entries)} cached query results")
+            self._entries.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'size': len(self._entries),
+                'max_size': self.max_size
+            }
+
+
+class EmbeddingCache(QueryCache):
+    """
+    QueryCache for query embedding vectors, stored compactly as float32 arrays.
+    """
+    
+    def __init__(self, max_size: int = 10000, ttl_seconds: float = 24 * 3600):
+        super().__init__(max_size=max_size, ttl_seconds=ttl_seconds)
+    
+    @staticmethod
+    def make_key(model_name: str, text: str) -> str:
+        """Build a cache key from the embedding model and the exact input text."""
+        return hashlib.sha256(f"{model_name}\0{text}".encode('utf-8')).hexdigest()
+
+
+class VectorHitsCache(QueryCache):
+    """
+    QueryCache for vector search hits, keyed by the query vector itself.
+    """
+    
+    def __init__(self, max_size: int = 2000, ttl_seconds: float = 600):
+        super().__init__(max_size=max_size, ttl_seconds=ttl_seconds)
+    
+    @staticmethod
+    def make_key(vector: List[float], index_name: str, top_k: int, 
+                 filters: Optional[Dict] = None) -> str:
+        """
+        Build a cache key for a vector search.
+        
+        Args:
+            vector: Query embedding
+            index_name: Pinecone index searched
+            top_k: Number of matches requested
+            filters: Optional search filters
+            
+        Returns:
+            BLAKE2b hex digest identifying the search
+        """
+        digest = hashlib.blake2b(np.asarray(vector, dtype=np.float32).tobytes(), digest_size=16)
+        digest.update('\0'.join([
+            index_name,
+            str(top_k),
+            json.dumps(filters, sort_keys=True, default=str) if filters else ''
+        ]).encode('utf-8'))
+        return digest.hexdigest()
+
+
+class SemanticCache:
+    """
+    Answer cache matched by query embedding similarity, kept per index.
+    
+    Questions whose embeddings have cosine similarity at or above the threshold
+    share an answer. Vectors are stored L2-normalized in one float32 matrix per
+    index, so a lookup is a single matrix-vector product.
+    """
+    
+    def __init__(self, max_size: int = 256, threshold: float = 0.95, ttl_seconds: float = 3600):
+        """
+        Initialize the cache.
+        
+        Args:
+            max_size: Maximum entries per index before least recently used are evicted
+            threshold: Minimum cosine similarity for a cached answer to be reused
+            ttl_seconds: Seconds after which an entry expires
+        """
+        self.max_size = max_size
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        # index_name -> (vectors (n, d), values, stored_at, last_used)
+        self._entries: Dict[str, Tuple[np.ndarray, List[Any], List[float], List[float]]] = {}
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def _normalize(vector: List[float]) -> np.ndarray:
+        """Return the vector as a unit-length float32 array."""
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else vector
+    
+    def get(self, index_name: str, vector: List[float]) -> Optional[Any]:
+        """Return the answer of the most similar unexpired question, or None below the threshold."""
+        query = self._normalize(vector)
+        with self._lock:
+            entry = self._entries.get(index_name)
+            if entry is not None and len(entry[1]):
+                vectors, values, stored_at, last_used = entry
+                scores = vectors @ query
+                best = int(np.argmax(scores))
+                now = time.monotonic()
+                if scores[best] >= self.threshold and now - stored_at[best] <= self.ttl_seconds:
+                    last_used[best] = now
+                    self.hits += 1
+                    return values[best]
+            
+            self.misses += 1
+            return None
+    
+    def put(self, index_name: str, vector: List[float], value: Any) -> None:
+        """Store an answer for a question embedding, evicting the least recently used entry if full."""
+        row = self._normalize(vector)[np.newaxis, :]
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(index_name)
+            if entry is None or entry[0].shape[1] != row.shape[1]:
+                self._entries[index_name] = (row, [value], [now], [now])
+                return
+            
+            vectors, values, stored_at, last_used = entry
+            if len(values) >= self.max_size:
+                oldest = min(range(len(last_used)), key=last_used.__getitem__)
+                vectors = np.delete(vectors, oldest, axis=0)
+                del values[oldest], stored_at[oldest], last_used[oldest]
+            
+            values.append(value)
+            stored_at.append(now)
+            last_used.append(now)
+            self._entries[index_name] = (np.vstack([vectors, row]), values, stored_at, last_used)
+    
+    def clear(self) -> None:
+        """Drop all entries (e.g. after new documents are indexed)."""
+        with self._lock:
+            self._entries.clear()
+
+
+_shared_embedding_cache: Optional[EmbeddingCache] = None
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Return the process-wide EmbeddingCache instance."""
+    global _shared_embedding_cache
+    if _shared_embedding_cache is None:
+        _shared_embedding_cache = EmbeddingCache()
+    return _shared_embedding_cache
+
+
+def embed_query_with_cache(embeddings: Any, text: str) -> List[float]:
+    """
+    Embed a query, reusing a cached vector for the same model and text.
+    
+    Args:
+        embeddings: LangChain embeddings object exposing embed_query()
+        text: Query text to embed
+        
+    Returns:
+        Embedding vector as a list of floats
+    """
+    cache = get_embedding_cache()
+    key = cache.make_key(getattr(embeddings, 'model', ''), text)
+    
+    vector = cache.get(key)
+    if vector is None:
+        vector = np.asarray(embeddings.embed_query(text), dtype=np.float32)
+        cache.put(key, vector)
+    
+    return vector.tolist()
+
+
+def prefetch_query_embeddings(embeddings: Any, texts: List[str]) -> None:
+    """
+    Embed all uncached texts with a single batched request and cache the vectors.
+    
+    Args:
+        embeddings: LangChain embeddings object exposing embed_documents()
+        texts: Query texts that are about to be embedded
+    """
+    cache = get_embedding_cache()
+    model_name = getattr(embeddings, 'model', '')
+    
+    missing = list(dict.fromkeys(
+        text for text in texts if cache.get(cache.make_key(model_name, text)) is None
+    ))
+    if not missing:
+        return
+    
+    try:
+        vectors = embeddings.embed_documents(missing)
+    except Exception as e:
+        # Callers fall back to embedding each query individually
+        logger.warning(f"Batched query embedding failed: {str(e)}")
+        return
+    
+    for text, vector in zip(missing, vectors):
+        cache.put(cache.make_key(model_name, text), np.asarray(vector, dtype=np.float32))
\ No newline at end of file
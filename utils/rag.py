@@ -1,45 +1,131 @@
-from langchain_core.runnables import RunnablePassthrough
-from langchain_openai import ChatOpenAI
-from langchain.prompts import PromptTemplate
+# LangChain is imported inside the functions that build chains, so pages that
+# only need clear_response_cache (upload, documents) skip its import cost
+import re
 import logging
+import threading
 import streamlit as st
+from utils.query_cache import QueryCache, SemanticCache, embed_query_with_cache
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Answers keyed by (normalized question, index); shared by all sessions and
+# cleared whenever documents are uploaded or deleted
+_response_cache = QueryCache(max_size=512, ttl_seconds=3600)
+
+# Answers matched by question embedding similarity, for paraphrased questions
+_semantic_cache = SemanticCache(max_size=256, threshold=0.95, ttl_seconds=3600)
+
+# Process-wide cap on concurrent LLM requests from this module (all sessions
+# and batch items), so bursts queue here instead of hitting 429 rate limits
+_LLM_CONCURRENCY = 8
+_llm_semaphore = threading.BoundedSemaphore(_LLM_CONCURRENCY)
+
+# Normalizes increment (∆) and lowercase delta (δ) symbols to Δ in one pass
+_DELTA_TRANS = str.maketrans({'∆': 'Δ', 'δ': 'Δ'})
+
+# Terms that mark a question about mathematical content, matched in one pass
+_MATH_TERMS = ['delta', 'дельта', 'vega', 'вега', 'формула', 'formula', 'опцион', 'option', 
+               'волатильность', 'volatility', '∆', 'Δ', 'греки', 'greeks']
+_MATH_RE = re.compile('|'.join(map(re.escape, _MATH_TERMS)), re.IGNORECASE)
+
+# Static instructions go first, in a system message that is byte-identical on
+# every request, so the provider can reuse the cached prompt prefix
+_SYSTEM_PROMPT = """Ответьте на вопрос на основе предоставленного контекста из научных и финансовых документов.
+
+ИНСТРУКЦИИ:
+- Отвечайте ТОЛЬКО на русском языке
+- Используйте ТОЛЬКО информацию из предоставленного контекста
+- Если в контексте есть математические формулы (например, ∆c = e^(-qt_opt) · N(d1)), воспроизводите их точно
+- Объясняйте финансовые и математические термины простым языком
+- Если контекст содержит формулы или таблицы, обязательно включите их в ответ
+- Укажите источники (номера документов), если доступны
+- Если ответ отсутствует в контексте, честно сообщите: "В предоставленном контексте нет информации для ответа на этот вопрос"
+- Форматируйте ответ для лучшей читаемости с использованием списков и подзаголовков
+
+СПЕЦИАЛЬНЫЕ ПРАВИЛА:
+- Delta (Δ) - чувствительность цены опциона к изменению цены базового актива
+- Vega (V) - чувствительность цены опциона к изменению волатильности
+- Сохраняйте математические обозначения и греческие буквы
+- Объясняйте значение переменных в формулах"""
+
+_HUMAN_PROMPT = """КОНТЕКСТ:
+{context}
+
+ВОПРОС: {question}
+
+ОТВЕТ:"""
+
+@st.cache_resource(show_spinner=False)
+def _get_llm():
+    """Shared chat model (one HTTP client for all questions and reruns)"""
+    from langchain_openai import ChatOpenAI
+    
+    return ChatOpenAI(
+        model_name="gpt-4o-mini", 
+        temperature=0,
+        max_tokens=1000,
+        max_retries=5,
+        timeout=60
+    )
+
+@st.cache_resource(show_spinner=False)
+def _get_prompt():
+    """Shared RAG chat prompt (static system message + per-question context), parsed once"""
+    from langchain_core.prompts import ChatPromptTemplate
+    
+    return ChatPromptTemplate.from_messages([
+        ("system", _SYSTEM_PROMPT),
+        ("human", _HUMAN_PROMPT),
+    ])
+
+# Answer caches kept by other modules (e.g. EnhancedRAG), dropped together
+# with the ones above
+_registered_caches = []
+
+def register_response_cache(cache):
+    """Have clear_response_cache also clear another module's answer cache"""
+    _registered_caches.append(cache)
+
+def clear_response_cache():
+    """Drop all cached answers (call after the indexed documents change)"""
+    _response_cache.clear()
+    _semantic_cache.clear()
+    for cache in _registered_caches:
+        cache.clear()
+
 def format_docs(docs):
     """Format retrieved documents with v3 metadata and detailed logging"""
-    logger.info(f"Formatting {len(docs)} retrieved documents")
+    logger.info("Formatting %d retrieved documents", len(docs))
     
     if not docs:
         logger.warning("No documents retrieved!")
         return "Документы не найдены в базе данных."
     
-    formatted_content = []
+    formatted_content = [None] * len(docs)
     for i, doc in enumerate(docs):
-        logger.info(f"Document {i+1}: {len(doc.page_content)} characters")
-        logger.info(f"Document {i+1} metadata: {doc.metadata}")
+        logger.debug("Document %d: %d characters", i + 1, len(doc.page_content))
         
         # Extract v3 metadata if available
         metadata = doc.metadata or {}
         
-        # Build document header with enhanced metadata
-        doc_header = f"[Документ {i+1}"
+        # Build document header with enhanced metadata; fragments are joined once
+        parts = [f"[Документ {i+1}"]
         
         # Add document title if available
         if 'document_title' in metadata:
-            doc_header += f" - {metadata['document_title']}"
+            parts.append(f" - {metadata['document_title']}")
         elif 'filename' in metadata:
-            doc_header += f" - {metadata['filename']}"
+            parts.append(f" - {metadata['filename']}")
         
         # Add page number if available
         if 'page_num' in metadata:
-            doc_header += f", стр. {metadata['page_num']}"
+            parts.append(f", стр. {metadata['page_num']}")
         
         # Add section info if available  
         if 'section_title' in metadata:
-            doc_header += f", раздел: {metadata['section_title']}"
+            parts.append(f", раздел: {metadata['section_title']}")
         
         # Add content type indicators
         indicators = []
@@ -51,143 +137,214 @@ def format_docs(docs):
             indicators.append("🔢 математический контент")
         
         if indicators:
-            doc_header += f" ({', '.join(indicators)})"
+            parts.append(f" ({', '.join(indicators)})")
         
-        doc_header += "]"
+        parts.append("]\n")
         
         # Format the content
         content = doc.page_content
         
         # Highlight mathematical formulas if they exist
         if metadata.get('formula_count', 0) > 0:
-            content = content.replace('∆', 'Δ')  # Normalize Delta symbols
-            content = content.replace('δ', 'Δ')  # Normalize delta symbols
+            content = content.translate(_DELTA_TRANS)  # Normalize Delta symbols
         
-        formatted_content.append(f"{doc_header}\n{content}")
+        parts.append(content)
+        formatted_content[i] = "".join(parts)
     
     result = "\n\n".join(formatted_content)
-    logger.info(f"Total formatted content length: {len(result)} characters")
+    logger.info("Total formatted content length: %d characters", len(result))
     
-    # Count mathematical content
-    math_indicators = sum(1 for doc in docs if doc.metadata.get('formula_count', 0) > 0)
-    if math_indicators > 0:
-        logger.info(f"Found {math_indicators} documents with mathematical formulas")
+    # Count mathematical content (only needed for the log line)
+    if logger.isEnabledFor(logging.INFO):
+        math_indicators = sum(1 for doc in docs if (doc.metadata or {}).get('formula_count', 0) > 0)
+        if math_indicators > 0:
+            logger.info("Found %d documents with mathematical formulas", math_indicators)
     
     return result
 
 def ask_question(question, vectorstore):
-    """Get answer to question using RAG with detailed logging"""
-    logger.info(f"Processing question: {question[:100]}...")
+    """Get answer to question, reusing the cached answer for a repeated question on the same index"""
+    return "".join(stream_question(question, vectorstore))
+
+def stream_question(question, vectorstore):
+    """
+    Answer a question, yielding the text in pieces as the LLM generates it.
     
-    try:
-        # Check vectorstore status
-        logger.info(f"Vectorstore type: {type(vectorstore)}")
-        
-        # Try to get index stats if available
+    Cached answers (same or near-duplicate question on the same index) are
+    yielded whole; a freshly generated answer is cached once it is complete.
+    """
+    index_name = st.session_state.get('current_index') or ''
+    cache_key = _response_cache.make_key(question, index_name, 0)
+    answer = _response_cache.get(cache_key)
+    if answer is not None:
+        logger.info("Returning cached answer")
+        yield answer
+        return
+    
+    # Near-duplicate questions are matched with the index's own embedding model
+    query_vector = None
+    embeddings = getattr(vectorstore, 'embeddings', None)
+    if embeddings is not None:
         try:
-            if hasattr(vectorstore, '_index') and hasattr(vectorstore._index, 'describe_index_stats'):
-                stats = vectorstore._index.describe_index_stats()
-                logger.info(f"Index stats: {stats}")
+            query_vector = embed_query_with_cache(embeddings, question)
         except Exception as e:
-            logger.warning(f"Could not get index stats: {e}")
-        
-        # Enhanced search parameters for better mathematical content retrieval
-        search_kwargs = {"k": 5}
-        
-        # Check if question contains mathematical terms
-        math_terms = ['delta', 'дельта', 'vega', 'вега', 'формула', 'formula', 'опцион', 'option', 
-                     'волатильность', 'volatility', '∆', 'Δ', 'греки', 'greeks']
-        
-        question_lower = question.lower()
-        has_math_terms = any(term in question_lower for term in math_terms)
-        
-        if has_math_terms:
-            logger.info("Mathematical terms detected in question, adjusting search parameters")
-            # Increase retrieval count for mathematical queries
-            search_kwargs["k"] = 8
-            
-            # Add filter for mathematical content if available
-            search_kwargs["filter"] = {
-                "formula_count": {"$gte": 0}  # Include documents with formulas
-            }
-        
-        retriever = vectorstore.as_retriever(search_kwargs=search_kwargs)
+            logger.warning("Could not embed question for semantic cache: %s", e)
+    
+    if query_vector is not None:
+        answer = _semantic_cache.get(index_name, query_vector)
+        if answer is not None:
+            logger.info("Returning cached answer for a similar question")
+            _response_cache.put(cache_key, answer)
+            yield answer
+            return
+    
+    pieces = []
+    try:
+        for piece in _stream_answer(question, vectorstore, query_vector):
+            pieces.append(piece)
+            yield piece
+    except Exception as e:
+        error_msg = f"❌ Ошибка при обработке вопроса: {str(e)}"
+        logger.error(error_msg)
+        logger.exception("Full exception details:")
+        yield error_msg
+        return
+    
+    answer = "".join(pieces)
+    if answer:
+        _response_cache.put(cache_key, answer)
+        if query_vector is not None:
+            _semantic_cache.put(index_name, query_vector, answer)
+
+def ask_questions(questions, vectorstore, max_concurrency=8):
+    """
+    Answer several questions with batched chain calls.
+    
+    Identical questions are answered once and cached answers are reused; the
+    rest run through rag_chain.batch() with up to max_concurrency requests in
+    flight. Returns the answers in the order of questions.
+    """
+    from langchain_core.runnables import RunnableLambda
+    
+    index_name = st.session_state.get('current_index') or ''
+    answers = {}
+    pending = []
+    for question in dict.fromkeys(questions):
+        answer = _response_cache.get(_response_cache.make_key(question, index_name, 0))
+        if answer is not None:
+            answers[question] = answer
+        else:
+            pending.append(question)
+    
+    # Math and regular questions use different retrievers, so one batch each
+    for has_math_terms in (False, True):
+        group = [question for question in pending if (_MATH_RE.search(question) is not None) == has_math_terms]
+        if not group:
+            continue
         
-        # Test retrieval directly
-        logger.info("Testing document retrieval...")
-        try:
-            retrieved_docs = retriever.get_relevant_documents(question)
-            logger.info(f"Retrieved {len(retrieved_docs)} documents")
-            
-            # Log each retrieved document
-            for i, doc in enumerate(retrieved_docs):
-                logger.info(f"Retrieved doc {i+1}: content length={len(doc.page_content)}, metadata={doc.metadata}")
-                logger.info(f"Retrieved doc {i+1} content preview: {doc.page_content[:200]}...")
-                
-        except Exception as e:
-            logger.error(f"Direct retrieval failed: {e}")
-            return f"❌ Ошибка при поиске документов: {str(e)}"
+        logger.info("Answering %d questions in one batch", len(group))
+        rag_chain = _build_rag_chain(vectorstore, has_math_terms)
         
-        prompt_rag = PromptTemplate.from_template(
-            """Ответьте на вопрос на основе предоставленного контекста из научных и финансовых документов.
-
-            КОНТЕКСТ:
-            {context}
-
-            ВОПРОС: {question}
-
-            ИНСТРУКЦИИ:
-            - Отвечайте ТОЛЬКО на русском языке
-            - Используйте ТОЛЬКО информацию из предоставленного контекста
-            - Если в контексте есть математические формулы (например, ∆c = e^(-qt_opt) · N(d1)), воспроизводите их точно
-            - Объясняйте финансовые и математические термины простым языком
-            - Если контекст содержит формулы или таблицы, обязательно включите их в ответ
-            - Укажите источники (номера документов), если доступны
-            - Если ответ отсутствует в контексте, честно сообщите: "В предоставленном контексте нет информации для ответа на этот вопрос"
-            - Форматируйте ответ для лучшей читаемости с использованием списков и подзаголовков
-
-            СПЕЦИАЛЬНЫЕ ПРАВИЛА:
-            - Delta (Δ) - чувствительность цены опциона к изменению цены базового актива
-            - Vega (V) - чувствительность цены опциона к изменению волатильности
-            - Сохраняйте математические обозначения и греческие буквы
-            - Объясняйте значение переменных в формулах
-
-            ОТВЕТ:"""
-        )
+        def invoke_limited(question, rag_chain=rag_chain):
+            with _llm_semaphore:
+                return rag_chain.invoke(question)
         
-        llm = ChatOpenAI(
-            model_name="gpt-4o-mini", 
-            temperature=0,
-            max_tokens=1000
+        results = RunnableLambda(invoke_limited).batch(
+            group, config={"max_concurrency": max_concurrency}, return_exceptions=True
         )
-        
-        rag_chain = (
-            {"context": retriever | format_docs, "question": RunnablePassthrough()}
-            | prompt_rag
-            | llm
+        for question, result in zip(group, results):
+            if isinstance(result, Exception):
+                logger.error("Batched question failed: %s", result)
+                answers[question] = f"❌ Ошибка при обработке вопроса: {str(result)}"
+            else:
+                answers[question] = result.content
+                if result.content:
+                    _response_cache.put(_response_cache.make_key(question, index_name, 0), result.content)
+    
+    return [answers[question] for question in questions]
+
+def _build_rag_chain(vectorstore, has_math_terms, capture_docs=None, query_vector=None):
+    """
+    Compose retriever, prompt and LLM; capture_docs, if given, receives the retrieved documents.
+    
+    With a precomputed query_vector the search runs on that vector directly
+    instead of embedding the question again inside the retriever.
+    """
+    from langchain_core.runnables import RunnablePassthrough, RunnableLambda
+    
+    # Increase retrieval count for mathematical queries
+    k = 8 if has_math_terms else 5
+    if query_vector is not None:
+        retriever = RunnableLambda(
+            lambda _question: vectorstore.similarity_search_by_vector(query_vector, k=k)
         )
-        
-        # Log the chain execution
-        logger.info("Executing RAG chain...")
-        result = rag_chain.invoke(question)
-        
-        logger.info(f"Generated response length: {len(result.content)} characters")
-        logger.info(f"Response preview: {result.content[:200]}...")
-        
-        # Display debug info in Streamlit for troubleshooting
-        if st.session_state.get('debug_mode', False):
-            with st.expander("🔍 Debug Information"):
-                st.write(f"**Question:** {question}")
-                st.write(f"**Retrieved documents:** {len(retrieved_docs)}")
-                for i, doc in enumerate(retrieved_docs):
-                    st.write(f"**Document {i+1}:** {len(doc.page_content)} chars")
-                    st.code(doc.page_content[:300] + "..." if len(doc.page_content) > 300 else doc.page_content)
-                st.write(f"**Generated response:** {len(result.content)} chars")
-        
-        return result.content
+    else:
+        # A retriever is a thin wrapper; the index handle and embeddings client
+        # behind it are already reused by IndexManager
+        retriever = vectorstore.as_retriever(search_kwargs={"k": k})
     
-    except Exception as e:
-        error_msg = f"❌ Ошибка при обработке вопроса: {str(e)}"
-        logger.error(error_msg)
-        logger.exception("Full exception details:")
-        return error_msg
\ No newline at end of file
+    context_chain = retriever | format_docs
+    if capture_docs is not None:
+        context_chain = retriever | RunnableLambda(capture_docs) | format_docs
+    
+    return (
+        {"context": context_chain, "question": RunnablePassthrough()}
+        | _get_prompt()
+        | _get_llm()
+    )
+
+def _stream_answer(question, vectorstore, query_vector=None):
+    """Generate the answer to question using RAG with detailed logging, yielding LLM output chunks"""
+    logger.info("Processing question: %.100s...", question)
+    
+    # Check vectorstore status
+    logger.debug("Vectorstore type: %s", type(vectorstore))
+    
+    # Index stats cost a Pinecone round-trip, so they are only fetched in
+    # debug mode and at most once per session
+    debug_mode = st.session_state.get('debug_mode', False)
+    if debug_mode and not st.session_state.get('_index_stats_logged'):
+        try:
+            if hasattr(vectorstore, '_index') and hasattr(vectorstore._index, 'describe_index_stats'):
+                stats = vectorstore._index.describe_index_stats()
+                logger.info("Index stats: %s", stats)
+                st.session_state['_index_stats_logged'] = True
+        except Exception as e:
+            logger.warning("Could not get index stats: %s", e)
+    
+    # Check if question contains mathematical terms
+    has_math_terms = _MATH_RE.search(question) is not None
+    if has_math_terms:
+        logger.info("Mathematical terms detected in question, adjusting search parameters")
+    
+    # Documents are retrieved once, inside the chain; in debug mode they are
+    # also captured on the way to format_docs for the debug expander
+    retrieved_docs = []
+    
+    def capture_docs(docs):
+        retrieved_docs.extend(docs)
+        return docs
+    
+    rag_chain = _build_rag_chain(vectorstore, has_math_terms, capture_docs if debug_mode else None, 
+                                 query_vector)
+    
+    # Log the chain execution; tokens are passed on as they arrive
+    logger.info("Executing RAG chain...")
+    response_length = 0
+    with _llm_semaphore:
+        for chunk in rag_chain.stream(question):
+            if chunk.content:
+                response_length += len(chunk.content)
+                yield chunk.content
+    
+    logger.info("Generated response length: %d characters", response_length)
+    
+    # Display debug info in Streamlit for troubleshooting
+    if debug_mode:
+        with st.expander("🔍 Debug Information"):
+            st.write(f"**Question:** {question}")
+            st.write(f"**Retrieved documents:** {len(retrieved_docs)}")
+            for i, doc in enumerate(retrieved_docs):
+                st.write(f"**Document {i+1}:** {len(doc.page_content)} chars")
+                st.code(doc.page_content[:300] + "..." if len(doc.page_content) > 300 else doc.page_content)
+            st.write(f"**Generated response:** {response_length} chars")
\ No newline at end of file
@@ -8,12 +8,64 @@ explanations, and well-formatted citations from source documents.
 from typing import List, Dict, Any, Optional
 import re
 from dataclasses import dataclass
+from functools import lru_cache
 import logging
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+_WS_RE = re.compile(r'\s+')
+_SENT_SPLIT = re.compile(r'[.!?]+')
+_CONJ = re.compile(r'^(However|Moreover|Furthermore|Additionally|Therefore|Thus),?\s*')
+_ANSWER_MD = re.compile(r'### Ответ\n(.*?)(?=\n### |$)', re.DOTALL)
+_ANSWER_PLAIN = re.compile(r'Ответ:\n(.*?)(?=\nОбъяснение:|$)', re.DOTALL)
+_CONFIDENCE = re.compile(r'Уровень уверенности: (\w+)')
+_TERMINATORS = frozenset('.!?')
+
+
+@lru_cache(maxsize=256)
+def _clean_quote_text(quote: str, max_quote_length: int = 300) -> str:
+    """
+    Collapse whitespace in a quote and truncate it to max_quote_length.
+    
+    Args:
+        quote: Raw quote text
+        max_quote_length: Maximum length before truncation
+        
+    Returns:
+        Cleaned quote
+    """
+    cleaned = quote.strip()
+    
+    # Remove excessive whitespace; printable text without double spaces has
+    # no whitespace run to collapse, so the regex is skipped
+    if not cleaned.isprintable() or '  ' in cleaned:
+        cleaned = _WS_RE.sub(' ', cleaned)
+    
+    # Limit quote length
+    if len(cleaned) > max_quote_length:
+        # Try to break at sentence boundary; only terminators in the last 30%
+        # qualify, so a single reverse walk stops at that threshold
+        truncated = cleaned[:max_quote_length]
+        last_sentence = next(
+            (i for i in range(len(truncated) - 1, int(max_quote_length * 0.7), -1)
+             if truncated[i] in _TERMINATORS),
+            -1
+        )
+        
+        if last_sentence > max_quote_length * 0.7:
+            cleaned = truncated[:last_sentence + 1]
+        else:
+            # Break at word boundary
+            last_space = truncated.rfind(' ')
+            if last_space > 0:
+                cleaned = truncated[:last_space] + "..."
+            else:
+                cleaned = truncated + "..."
+    
+    return cleaned
+
 @dataclass
 class FormattedSource:
     """Formatted source information."""
@@ -156,32 +208,8 @@ class ResponseFormatter:
         return formatted
     
     def _clean_quote(self, quote: str) -> str:
-        """Clean and format quote text."""
-        # Remove excessive whitespace
-        cleaned = re.sub(r'\s+', ' ', quote.strip())
-        
-        # Limit quote length
-        max_quote_length = 300
-        if len(cleaned) > max_quote_length:
-            # Try to break at sentence boundary
-            truncated = cleaned[:max_quote_length]
-            last_sentence = max(
-                truncated.rfind('.'),
-                truncated.rfind('!'),
-                truncated.rfind('?')
-            )
-            
-            if last_sentence > max_quote_length * 0.7:
-                cleaned = truncated[:last_sentence + 1]
-            else:
-                # Break at word boundary
-                last_space = truncated.rfind(' ')
-                if last_space > 0:
-                    cleaned = truncated[:last_space] + "..."
-                else:
-                    cleaned = truncated + "..."
-        
-        return cleaned
+        """Clean and format quote text (memoized; repeated quotes are cleaned once)."""
+        return _clean_quote_text(quote)
     
     def _format_confidence_section(self, confidence: Dict[str, Any]) -> str:
         """Format the confidence section."""
@@ -325,7 +353,7 @@ class ResponseFormatter:
             return []
         
         # Split into sentences
-        sentences = re.split(r'[.!?]+', explanation)
+        sentences = _SENT_SPLIT.split(explanation)
         
         # Filter and clean sentences
         key_points = []
@@ -333,7 +361,7 @@ class ResponseFormatter:
             sentence = sentence.strip()
             if len(sentence) > 20:  # Ignore very short sentences
                 # Remove leading conjunctions
-                sentence = re.sub(r'^(However|Moreover|Furthermore|Additionally|Therefore|Thus),?\s*', '', sentence)
+                sentence = _CONJ.sub('', sentence)
                 if sentence:
                     key_points.append(sentence)
         
@@ -351,16 +379,16 @@ class ResponseFormatter:
             Summary version
         """
         # Extract just the answer section
-        answer_match = re.search(r'### Ответ\n(.*?)(?=\n### |$)', full_response, re.DOTALL)
+        answer_match = _ANSWER_MD.search(full_response)
         if answer_match:
             answer = answer_match.group(1).strip()
         else:
             # Fallback: look for non-markdown format
-            answer_match = re.search(r'Ответ:\n(.*?)(?=\nОбъяснение:|$)', full_response, re.DOTALL)
+            answer_match = _ANSWER_PLAIN.search(full_response)
             answer = answer_match.group(1).strip() if answer_match else "Ответ недоступен."
         
         # Extract confidence level
-        confidence_match = re.search(r'Уровень уверенности: (\w+)', full_response)
+        confidence_match = _CONFIDENCE.search(full_response)
         confidence_level = confidence_match.group(1) if confidence_match else "Unknown"
         
         # Create summary
@@ -6,10 +6,17 @@ tables, and semantic coherence while respecting document structure.
 """
 
 import re
-from typing import Dict, List, Tuple, Optional, Any
+import threading
+import multiprocessing
+from bisect import bisect_right, insort
+from concurrent.futures import ProcessPoolExecutor, BrokenExecutor
+from itertools import chain, islice
+from typing import Dict, List, Tuple, Optional, Any, Iterator
 import logging
 import hashlib
 from dataclasses import dataclass
+from functools import lru_cache
+import numpy as np
 
 # Import spacy conditionally
 try:
@@ -23,9 +30,47 @@ except ImportError:
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-@dataclass
+# Pipeline components not needed for Doc.similarity(), which only uses token
+# vectors (the lemmatizer is listed because it depends on the tagger output);
+# they are excluded when the model is loaded, so they are never built
+_SIMILARITY_EXCLUDED_PIPES = ['tagger', 'parser', 'ner', 'attribute_ruler', 'lemmatizer']
+
+# Sections are chunked in worker processes only when the caller asks for more
+# than one worker and the document has at least this many sections; each
+# worker loads its own spaCy model, so the pool is opt-in
+_PARALLEL_MIN_SECTIONS = 8
+
+# Formula normalization: math delimiters to strip and LaTeX commands to spell out
+_FORMULA_DELIM_RE = re.compile(r'\$\$|\$|\\\[|\\\]|\\\(|\\\)|\\(?:begin|end)\{(?:equation|align)\}')
+_FORMULA_WHITESPACE_RE = re.compile(r'\s+')
+_LATEX_COMMANDS = {
+    'alpha': 'alpha',
+    'beta': 'beta',
+    'sigma': 'sigma',
+    'mu': 'mu',
+    'sum': 'sum',
+    'int': 'integral',
+    'frac': 'fraction',
+    'sqrt': 'square_root'
+}
+_LATEX_COMMAND_RE = re.compile(r'\\(' + '|'.join(_LATEX_COMMANDS) + ')')
+
+
+@lru_cache(maxsize=4096)
+def _normalize_formula_text(formula: str) -> str:
+    """Normalize formula for better searching (memoized; papers repeat formulas)."""
+    # Remove delimiters
+    normalized = _FORMULA_DELIM_RE.sub('', formula)
+    
+    # Normalize spacing
+    normalized = _FORMULA_WHITESPACE_RE.sub(' ', normalized).strip()
+    
+    # Replace common LaTeX commands with text
+    return _LATEX_COMMAND_RE.sub(lambda match: _LATEX_COMMANDS[match.group(1)], normalized)
+
+@dataclass(slots=True)
 class ChunkMetadata:
-    """Metadata for document chunks."""
+    """Metadata for document chunks (slotted: no per-instance __dict__)."""
     chunk_id: str
     content_type: str  # 'text', 'formula', 'table', 'figure'
     page_num: int
@@ -46,26 +91,15 @@ class SmartChunker:
         self.max_chunk_size = max_chunk_size
         self.overlap = overlap
         self.semantic_threshold = 0.7
+        self._max_group_len = int(max_chunk_size * 0.8)  # Same test as > max_chunk_size * 0.8 for int lengths
         
-        # Load spaCy model with fallback to simple processing
+        # spaCy model is loaded on first use (see _get_nlp); use_spacy turns
+        # False if it cannot be loaded
         self.nlp = None
-        self.use_spacy = False
-        
-        if SPACY_AVAILABLE and spacy:
-            try:
-                self.nlp = spacy.load("en_core_web_lg")
-                self.use_spacy = True
-                logger.info("Using spaCy model: en_core_web_lg")
-            except OSError:
-                logger.warning("en_core_web_lg not found, falling back to en_core_web_sm")
-                try:
-                    self.nlp = spacy.load("en_core_web_sm")
-                    self.use_spacy = True
-                    logger.info("Using spaCy model: en_core_web_sm")
-                except OSError:
-                    logger.warning("No spaCy model found. Using simple text processing fallback.")
-                    self.use_spacy = False
-        else:
+        self.use_spacy = bool(SPACY_AVAILABLE and spacy)
+        self._nlp_lock = threading.Lock()
+        
+        if not self.use_spacy:
             logger.info("spaCy not available. Using simple text processing fallback.")
         
         # Formula detection patterns
@@ -87,24 +121,58 @@ class SmartChunker:
             r'(?:Figure\s+\d+|FIGURE\s+\d+)',
         ]
         
-        # Initialize placeholder counter
-        self.placeholder_counter = 0
+        # Compiled once; the chunking helpers below run per section/paragraph
+        # All formula types in one alternation, so a single sweep finds them
+        self._fused_formula_re = re.compile(
+            '|'.join(f'(?P<f{i}>{p})' for i, p in enumerate(self.formula_patterns)),
+            re.DOTALL
+        )
+        self._currency_re = re.compile(self.currency_pattern, re.IGNORECASE)
+        self._table_re = re.compile('|'.join(self.table_patterns), re.IGNORECASE)  # One scan for all reference types
+        self._caption_end_re = re.compile(r'\n\s*\n|\n\s*[A-Z]')
+        self._placeholder_re = re.compile(r'__(?:FORMULA|TABLE)_\d+__')
+        self._para_split_re = re.compile(r'\n\s*\n')
+        self._sent_split_re = re.compile(r'(?<=[.!?])\s+')
+        self._word_re = re.compile(r'\b[a-zA-Z]{4,}\b')
+        
+        # (sections list, sorted positions, sorted sections) of the last document
+        self._section_order = None
     
-    def chunk_document(self, document_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def chunk_document(self, document_data: Dict[str, Any],
+                       max_workers: Optional[int] = None) -> List[Dict[str, Any]]:
         """
         Chunk document using smart algorithm that preserves content integrity.
         
         Args:
             document_data: Document data from EnhancedPDFProcessor
+            max_workers: Worker processes for sections (None or 1 for serial)
             
         Returns:
             List of chunks with metadata
         """
         logger.info("Starting smart chunking process")
         
-        chunks = []
-        self.placeholder_counter = 0
+        chunks = list(self.chunk_stream(document_data, max_workers))
+        
+        logger.info(f"Created {len(chunks)} chunks")
+        return chunks
+    
+    def chunk_stream(self, document_data: Dict[str, Any],
+                     max_workers: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yield chunks section by section as they are produced.
+        
+        Lets callers start embedding early chunks while later sections
+        are still being chunked. With max_workers > 1, documents with many
+        sections are chunked in a process pool, since sections are independent.
         
+        Args:
+            document_data: Document data from EnhancedPDFProcessor
+            max_workers: Worker processes for sections (None or 1 for serial)
+            
+        Yields:
+            Chunks with metadata, in document order
+        """
         # Process each section
         sections = document_data.get('sections', [])
         pages = document_data.get('pages', [])
@@ -112,25 +180,59 @@ class SmartChunker:
         if not sections:
             # Fallback: process entire document as one section
             full_text = self._extract_full_text(pages)
-            section_chunks = self._chunk_section(full_text, None, pages)
-            chunks.extend(section_chunks)
-        else:
-            for section in sections:
-                section_text = self._extract_section_text(section, document_data)
-                if section_text.strip():
-                    section_chunks = self._chunk_section(section_text, section, pages)
-                    chunks.extend(section_chunks)
+            yield from self._chunk_section(full_text, None, pages)
+            return
         
-        logger.info(f"Created {len(chunks)} chunks")
-        return chunks
+        if max_workers and max_workers > 1 and len(sections) >= _PARALLEL_MIN_SECTIONS:
+            yield from self._chunk_sections_parallel(sections, document_data, max_workers)
+            return
+        
+        for section in sections:
+            section_text = self._extract_section_text(section, document_data)
+            if section_text.strip():
+                yield from self._chunk_section(section_text, section, pages)
+    
+    def _chunk_sections_parallel(self, sections: List[Dict[str, Any]], document_data: Dict[str, Any],
+                                 max_workers: int) -> Iterator[Dict[str, Any]]:
+        """
+        Chunk sections in worker processes, yielding chunks in document order.
+        
+        Falls back to serial chunking for the remaining sections if the
+        worker pool cannot be started or breaks.
+        
+        Args:
+            sections: Document sections
+            document_data: Document data from EnhancedPDFProcessor
+            max_workers: Number of worker processes
+            
+        Yields:
+            Chunks with metadata, in document order
+        """
+        # Section text is extracted here; workers only get (text, section) pairs
+        jobs = []
+        for section in sections:
+            section_text = self._extract_section_text(section, document_data)
+            if section_text.strip():
+                jobs.append((section_text, section))
+        
+        done = 0
+        try:
+            pool = _get_section_pool(max_workers, self.max_chunk_size, self.overlap)
+            for section_chunks in pool.map(_chunk_section_in_worker, jobs):
+                yield from section_chunks
+                done += 1
+            return
+        except (BrokenExecutor, OSError) as e:
+            logger.warning(f"Section worker pool failed, chunking remaining sections serially: {e}")
+            _discard_section_pool()
+        
+        pages = document_data.get('pages', [])
+        for section_text, section in jobs[done:]:
+            yield from self._chunk_section(section_text, section, pages)
     
     def _extract_full_text(self, pages: List[Dict[str, Any]]) -> str:
         """Extract all text from document pages."""
-        text_parts = []
-        for page in pages:
-            for block in page.get('text_blocks', []):
-                text_parts.append(block['text'])
-        return '\n'.join(text_parts)
+        return '\n'.join(block['text'] for page in pages for block in page.get('text_blocks', ()))
     
     def _extract_section_text(self, section: Dict[str, Any], document_data: Dict[str, Any]) -> str:
         """Extract text for a specific section."""
@@ -143,19 +245,12 @@ class SmartChunker:
         
         # Fallback: extract based on coordinates
         pages = document_data.get('pages', [])
-        section_text = []
         
         start_page = section['page_num'] - 1
         start_y = section['coordinates']['y']
         
         # Find next section to determine end point
-        sections = document_data.get('sections', [])
-        next_section = None
-        for s in sections:
-            if (s['page_num'] > section['page_num'] or 
-                (s['page_num'] == section['page_num'] and s['coordinates']['y'] > start_y)):
-                if not next_section or s['coordinates']['y'] < next_section['coordinates']['y']:
-                    next_section = s
+        next_section = self._next_section(section, document_data.get('sections', []))
         
         end_page = len(pages) - 1
         end_y = float('inf')
@@ -165,21 +260,90 @@ class SmartChunker:
             end_y = next_section['coordinates']['y']
         
         # Extract text from the section range
+        return '\n'.join(self._iter_section_texts(pages, start_page, start_y, end_page, end_y))
+    
+    def _iter_section_texts(self, pages: List[Dict[str, Any]], start_page: int, start_y: float,
+                            end_page: int, end_y: float) -> Iterator[str]:
+        """
+        Yield the text of blocks between (start_page, start_y) and (end_page, end_y).
+        
+        Only the first and last pages of the range need the y check; blocks
+        of the pages in between are taken whole.
+        """
         for page_num in range(start_page, min(end_page + 1, len(pages))):
-            page = pages[page_num]
+            blocks = pages[page_num].get('text_blocks', ())
+            check_start = page_num == start_page
+            check_end = page_num == end_page
+            
+            if not (check_start or check_end):
+                for block in blocks:
+                    yield block['text']
+                continue
             
-            for block in page.get('text_blocks', []):
-                block_y = block['bbox'][1] if isinstance(block['bbox'], (list, tuple)) else 0
+            for block in blocks:
+                bbox = block.get('bbox')
+                block_y = bbox[1] if bbox else 0
                 
                 # Check if block is within section range
-                if page_num == start_page and block_y < start_y:
+                if check_start and block_y < start_y:
                     continue
-                if page_num == end_page and block_y >= end_y:
+                if check_end and block_y >= end_y:
                     continue
                 
-                section_text.append(block['text'])
+                yield block['text']
+    
+    def _next_section(self, section: Dict[str, Any],
+                      sections: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        Find the first section that starts after the given one.
+        
+        Sections are sorted by (page_num, y) once per document and the
+        successor is found by bisection.
+        
+        Args:
+            section: Current section
+            sections: All sections of the document
+            
+        Returns:
+            Next section in reading order, or None for the last one
+        """
+        order = self._section_order
+        if order is None or order[0] is not sections:
+            sorted_sections = sorted(sections, key=lambda s: (s['page_num'], s['coordinates']['y']))
+            positions = [(s['page_num'], s['coordinates']['y']) for s in sorted_sections]
+            order = self._section_order = (sections, positions, sorted_sections)
+        
+        _, positions, sorted_sections = order
+        i = bisect_right(positions, (section['page_num'], section['coordinates']['y']))
+        return sorted_sections[i] if i < len(sorted_sections) else None
+    
+    def _get_nlp(self) -> Optional[Any]:
+        """
+        Load the spaCy model on first use, with fallback to simple processing.
+        
+        Only the components needed for similarity are loaded.
+        
+        Returns:
+            spaCy Language object, or None if no model is available
+        """
+        if self.nlp is not None or not self.use_spacy:
+            return self.nlp
         
-        return '\n'.join(section_text)
+        with self._nlp_lock:
+            if self.nlp is None and self.use_spacy:
+                try:
+                    self.nlp = spacy.load("en_core_web_lg", exclude=_SIMILARITY_EXCLUDED_PIPES)
+                    logger.info("Using spaCy model: en_core_web_lg")
+                except OSError:
+                    logger.warning("en_core_web_lg not found, falling back to en_core_web_sm")
+                    try:
+                        self.nlp = spacy.load("en_core_web_sm", exclude=_SIMILARITY_EXCLUDED_PIPES)
+                        logger.info("Using spaCy model: en_core_web_sm")
+                    except OSError:
+                        logger.warning("No spaCy model found. Using simple text processing fallback.")
+                        self.use_spacy = False
+        
+        return self.nlp
     
     def _chunk_section(self, text: str, section: Optional[Dict[str, Any]], 
                       pages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
@@ -222,103 +386,140 @@ class SmartChunker:
             Tuple of (modified_text, preservation_map)
         """
         preservation_map = {}
-        modified_text = text
-        
-        # First, protect currency values from being detected as formulas
-        currency_matches = list(re.finditer(self.currency_pattern, text, re.IGNORECASE))
-        currency_placeholders = {}
-        
-        for i, match in enumerate(currency_matches):
-            currency_id = f"__CURRENCY_{i}__"
-            currency_placeholders[currency_id] = match.group(0)
-            modified_text = modified_text.replace(match.group(0), currency_id, 1)
-        
-        # Preserve formulas
-        for pattern in self.formula_patterns:
-            matches = list(re.finditer(pattern, modified_text, re.DOTALL))
-            for match in matches:
-                formula_content = match.group(0)
-                
-                # Skip if this looks like currency that was temporarily replaced
-                if any(currency_id in formula_content for currency_id in currency_placeholders):
-                    continue
-                
-                placeholder_id = f"__FORMULA_{self.placeholder_counter}__"
-                self.placeholder_counter += 1
-                
+        
+        # Spans to replace, kept sorted by start: (start, end, type, reference).
+        # Every formula contains '$' or '\\', so plain text skips the formula scan
+        spans = self._find_formula_spans(text) if ('$' in text or '\\' in text) else []
+        
+        # Preserve table references and captions
+        for match in self._table_re.finditer(text):
+            start = match.start()
+            
+            # Skip references inside an already preserved span
+            i = bisect_right(spans, (start, float('inf')))
+            if i > 0 and spans[i - 1][1] > start:
+                continue
+            
+            # Look for table caption (usually follows the table reference)
+            end = min(match.end() + 200, len(text))
+            
+            # Try to find the end of the caption (usually at next paragraph or section)
+            caption_end = self._caption_end_re.search(text, start + 50, end)  # Skip first 50 chars
+            if caption_end:
+                end = caption_end.start()
+            
+            # Stop the caption where the next preserved span begins
+            if i < len(spans):
+                end = min(end, spans[i][0])
+            
+            insort(spans, (start, end, 'table', match.group(0)))
+        
+        if not spans:
+            return text, preservation_map
+        
+        # Rebuild the text in a single pass over the sorted spans
+        text_parts = []
+        cursor = 0
+        # Placeholders are numbered per call: the preservation map is section-local,
+        # and no chunker state is touched, so a shared chunker is safe across threads
+        for placeholder_num, (start, end, content_type, reference) in enumerate(spans):
+            content = text[start:end]
+            
+            if content_type == 'formula':
+                placeholder_id = f"__FORMULA_{placeholder_num}__"
                 preservation_map[placeholder_id] = {
                     'type': 'formula',
-                    'content': formula_content,
-                    'normalized': self._normalize_formula(formula_content)
+                    'content': content,
+                    'normalized': self._normalize_formula(content)
                 }
-                
-                modified_text = modified_text.replace(formula_content, placeholder_id, 1)
-        
-        # Preserve table references and captions
-        for pattern in self.table_patterns:
-            matches = list(re.finditer(pattern, modified_text, re.IGNORECASE))
-            for match in matches:
-                # Look for table caption (usually follows the table reference)
-                start_pos = match.end()
-                end_pos = min(start_pos + 200, len(modified_text))
-                
-                # Try to find the end of the caption (usually at next paragraph or section)
-                caption_text = modified_text[match.start():end_pos]
-                caption_end = re.search(r'\n\s*\n|\n\s*[A-Z]', caption_text[50:])  # Skip first 50 chars
-                
-                if caption_end:
-                    caption_text = caption_text[:50 + caption_end.start()]
-                
-                placeholder_id = f"__TABLE_{self.placeholder_counter}__"
-                self.placeholder_counter += 1
-                
+            else:
+                placeholder_id = f"__TABLE_{placeholder_num}__"
                 preservation_map[placeholder_id] = {
                     'type': 'table',
-                    'content': caption_text,
-                    'reference': match.group(0)
+                    'content': content,
+                    'reference': reference
                 }
-                
-                modified_text = modified_text.replace(caption_text, placeholder_id, 1)
+            
+            text_parts.append(text[cursor:start])
+            text_parts.append(placeholder_id)
+            cursor = end
         
-        # Restore currency values
-        for currency_id, currency_value in currency_placeholders.items():
-            modified_text = modified_text.replace(currency_id, currency_value)
+        text_parts.append(text[cursor:])
         
-        return modified_text, preservation_map
+        return ''.join(text_parts), preservation_map
     
-    def _normalize_formula(self, formula: str) -> str:
-        """Normalize formula for better searching."""
-        # Remove delimiters
-        normalized = formula
-        for delim in ['$$', '$', '\\[', '\\]', '\\(', '\\)', 
-                     '\\begin{equation}', '\\end{equation}',
-                     '\\begin{align}', '\\end{align}']:
-            normalized = normalized.replace(delim, '')
-        
-        # Normalize spacing
-        normalized = re.sub(r'\s+', ' ', normalized).strip()
-        
-        # Replace common LaTeX commands with text
-        replacements = {
-            '\\alpha': 'alpha',
-            '\\beta': 'beta', 
-            '\\sigma': 'sigma',
-            '\\mu': 'mu',
-            '\\sum': 'sum',
-            '\\int': 'integral',
-            '\\frac': 'fraction',
-            '\\sqrt': 'square_root'
-        }
+    def _find_formula_spans(self, text: str) -> List[Tuple[int, int, str, None]]:
+        """
+        Find formulas in text, skipping matches that would swallow a currency value.
+        
+        Args:
+            text: Input text
+            
+        Returns:
+            (start, end, 'formula', None) spans, in order
+        """
+        # Protect currency values from being detected as formulas: their
+        # characters are blanked in the copy that the formula pattern scans
+        currency_spans = self._find_currency_spans(text)
+        scan_text = text
+        if currency_spans:
+            masked_parts = []
+            cursor = 0
+            for start, end in currency_spans:
+                masked_parts.append(text[cursor:start])
+                masked_parts.append(' ' * (end - start))
+                cursor = end
+            masked_parts.append(text[cursor:])
+            scan_text = ''.join(masked_parts)
+        currency_ends = [end for _, end in currency_spans]
+        
+        spans = []
+        
+        # Preserve formulas (one sweep of the fused pattern)
+        for match in self._fused_formula_re.finditer(scan_text):
+            start, end = match.span()
+            
+            # Skip formulas that would swallow a currency value
+            i = bisect_right(currency_ends, start)
+            if i < len(currency_spans) and currency_spans[i][0] < end:
+                continue
+            
+            spans.append((start, end, 'formula', None))
+        
+        return spans
+    
+    def _find_currency_spans(self, text: str) -> List[Tuple[int, int]]:
+        """
+        Find currency values in text.
         
-        for latex_cmd, text_rep in replacements.items():
-            normalized = normalized.replace(latex_cmd, text_rep)
+        Every currency value starts with '$', so the pattern is only tried at
+        the '$' positions found with str.find instead of at every offset.
         
-        return normalized
+        Args:
+            text: Input text
+            
+        Returns:
+            (start, end) spans of currency values, in order
+        """
+        spans = []
+        pos = text.find('$')
+        while pos != -1:
+            match = self._currency_re.match(text, pos)
+            if match:
+                spans.append(match.span())
+                pos = text.find('$', match.end())
+            else:
+                pos = text.find('$', pos + 1)
+        return spans
+    
+    def _normalize_formula(self, formula: str) -> str:
+        """Normalize formula for better searching."""
+        return _normalize_formula_text(formula)
     
     def _split_into_paragraphs(self, text: str) -> List[str]:
         """Split text into logical paragraphs."""
         # Split on double newlines first
-        initial_split = re.split(r'\n\s*\n', text)
+        initial_split = self._para_split_re.split(text)
         
         paragraphs = []
         for chunk in initial_split:
@@ -328,19 +529,25 @@ class SmartChunker:
             
             # Further split very long paragraphs at sentence boundaries
             if len(chunk) > self.max_chunk_size * 1.5:
-                sentences = re.split(r'(?<=[.!?])\s+', chunk)
-                current_para = ""
+                sentences = self._sent_split_re.split(chunk)
+                
+                # Sentences are collected in a list and joined once per paragraph;
+                # current_len counts each sentence plus its separating space
+                current_sentences = []
+                current_len = 0
                 
                 for sentence in sentences:
-                    if len(current_para + sentence) < self.max_chunk_size:
-                        current_para += sentence + " "
+                    if current_len + len(sentence) < self.max_chunk_size:
+                        current_sentences.append(sentence)
+                        current_len += len(sentence) + 1
                     else:
-                        if current_para.strip():
-                            paragraphs.append(current_para.strip())
-                        current_para = sentence + " "
+                        if current_sentences:
+                            paragraphs.append(' '.join(current_sentences))
+                        current_sentences = [sentence]
+                        current_len = len(sentence) + 1
                 
-                if current_para.strip():
-                    paragraphs.append(current_para.strip())
+                if current_sentences:
+                    paragraphs.append(' '.join(current_sentences))
             else:
                 paragraphs.append(chunk)
         
@@ -353,12 +560,26 @@ class SmartChunker:
         
         groups = [[paragraphs[0]]]
         
+        # Similarities of all adjacent pairs, computed up front in one batch
+        similarities = self._adjacent_similarities(paragraphs)
+        
+        # Without spaCy, each paragraph's word set is extracted once for the heuristic
+        word_sets = None
+        if similarities is None:
+            word_sets = [self._paragraph_words(para) for para in paragraphs]
+        
         for i in range(1, len(paragraphs)):
             current_para = paragraphs[i]
             previous_para = paragraphs[i-1]
             
             # Check if paragraphs should be grouped
-            if self._should_group_paragraphs(previous_para, current_para):
+            if similarities is not None:
+                should_group = self._should_group_paragraphs(previous_para, current_para, similarities[i-1])
+            else:
+                should_group = self._should_group_paragraphs(previous_para, current_para,
+                                                             words1=word_sets[i-1], words2=word_sets[i])
+            
+            if should_group:
                 # Add to current group
                 groups[-1].append(current_para)
             else:
@@ -367,49 +588,86 @@ class SmartChunker:
         
         return groups
     
-    def _should_group_paragraphs(self, para1: str, para2: str) -> bool:
-        """Determine if two paragraphs should be grouped together."""
+    def _adjacent_similarities(self, paragraphs: List[str]) -> Optional[List[float]]:
+        """
+        Compute spaCy cosine similarity of each paragraph to the next one.
+        
+        Args:
+            paragraphs: Paragraphs of one section
+            
+        Returns:
+            len(paragraphs) - 1 similarities, or None without spaCy or on error
+        """
+        # A single paragraph has no pairs, so the model is not even loaded
+        if len(paragraphs) < 2 or not self.use_spacy:
+            return None
+        
+        nlp = self._get_nlp()
+        if nlp is None:
+            return None
+        
+        truncated = [para[:500] for para in paragraphs]  # Limit text for efficiency
+        try:
+            docs = nlp.pipe(truncated, batch_size=64)
+            vectors = np.stack([doc.vector for doc in docs]).astype(np.float32)
+        except Exception as e:
+            logger.warning(f"Error calculating semantic similarity: {e}")
+            return None
+        
+        # Same as Doc.similarity(): cosine of the mean token vectors (0 if empty)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-8
+        return np.einsum('ij,ij->i', vectors[:-1], vectors[1:]).tolist()
+    
+    def _should_group_paragraphs(self, para1: str, para2: str, similarity: Optional[float] = None,
+                                 words1: Optional[frozenset] = None,
+                                 words2: Optional[frozenset] = None) -> bool:
+        """
+        Determine if two paragraphs should be grouped together.
+        
+        Args:
+            para1: Previous paragraph
+            para2: Current paragraph
+            similarity: spaCy similarity of the pair, or None without spaCy
+            words1: Precomputed word set of para1 for the simple heuristic
+            words2: Precomputed word set of para2 for the simple heuristic
+            
+        Returns:
+            True if para2 continues the group of para1
+        """
         # Skip grouping if paragraphs are too long
-        if len(para1) + len(para2) > self.max_chunk_size * 0.8:
+        if len(para1) + len(para2) > self._max_group_len:
             return False
         
-        # Don't group if either paragraph has special content placeholders
-        placeholders = [p for p in re.findall(r'__(?:FORMULA|TABLE)_\d+__', para1 + para2)]
-        if len(placeholders) > 1:  # Multiple special elements
+        # Don't group if the pair has more than one special content placeholder;
+        # the scan stops at the second one and does not concatenate the texts
+        placeholders = chain(self._placeholder_re.finditer(para1), self._placeholder_re.finditer(para2))
+        if next(islice(placeholders, 1, None), None) is not None:  # Multiple special elements
             return False
         
-        # Use spaCy if available, otherwise use simple heuristics
-        if self.use_spacy and self.nlp:
-            try:
-                # Use spaCy for semantic similarity
-                doc1 = self.nlp(para1[:500])  # Limit text for efficiency
-                doc2 = self.nlp(para2[:500])
-                
-                # Calculate semantic similarity
-                similarity = doc1.similarity(doc2)
-                
-                # Group if similarity is above threshold
-                return similarity >= self.semantic_threshold
-                
-            except Exception as e:
-                logger.warning(f"Error calculating semantic similarity: {e}")
-                # Fallback to simple heuristics
-                return self._simple_grouping_heuristic(para1, para2)
+        # Use spaCy similarity if available, otherwise use simple heuristics
+        if similarity is not None:
+            # Group if similarity is above threshold
+            return similarity >= self.semantic_threshold
         else:
             # Use simple heuristics when spaCy is not available
-            return self._simple_grouping_heuristic(para1, para2)
+            if words1 is None:
+                words1 = self._paragraph_words(para1)
+            if words2 is None:
+                words2 = self._paragraph_words(para2)
+            return self._simple_grouping_heuristic(words1, words2)
+    
+    def _paragraph_words(self, paragraph: str) -> frozenset:
+        """Extract the set of important (4+ letter) words of a paragraph."""
+        return frozenset(self._word_re.findall(paragraph.lower()))
     
-    def _simple_grouping_heuristic(self, para1: str, para2: str) -> bool:
-        """Simple fallback grouping logic."""
+    def _simple_grouping_heuristic(self, words1: frozenset, words2: frozenset) -> bool:
+        """Simple fallback grouping logic on precomputed word sets."""
         # Group if they share common important words
-        words1 = set(re.findall(r'\b[a-zA-Z]{4,}\b', para1.lower()))
-        words2 = set(re.findall(r'\b[a-zA-Z]{4,}\b', para2.lower()))
-        
         if not words1 or not words2:
             return False
         
         # Calculate word overlap
-        common_words = words1.intersection(words2)
+        common_words = words1 & words2
         overlap_ratio = len(common_words) / min(len(words1), len(words2))
         
         return overlap_ratio >= 0.3
@@ -441,11 +699,11 @@ class SmartChunker:
         restored_text = self._restore_special_content(text, preservation_map)
         
         # Find placeholders in this chunk
-        placeholders = re.findall(r'__(?:FORMULA|TABLE)_\d+__', text)
+        placeholders = self._placeholder_re.findall(text)
         
-        # Count special content types
-        formula_count = len([p for p in placeholders if 'FORMULA' in p])
-        table_count = len([p for p in placeholders if 'TABLE' in p])
+        # Count special content types ('__F...' or '__T...')
+        formula_count = sum(1 for p in placeholders if p[2] == 'F')
+        table_count = len(placeholders) - formula_count
         
         # Generate unique chunk ID
         chunk_id = self._generate_chunk_id(restored_text)
@@ -478,51 +736,111 @@ class SmartChunker:
                           section: Optional[Dict[str, Any]], group_idx: int) -> List[Dict[str, Any]]:
         """Split a large paragraph group into multiple chunks."""
         chunks = []
-        current_chunk_text = ""
+        
+        # The chunk text is joined only when a chunk is emitted; current_len
+        # tracks the length of '\n\n'.join(current_paragraphs)
         current_paragraphs = []
+        current_len = 0
         
         for para in paragraphs:
             # Check if adding this paragraph would exceed chunk size
-            if len(current_chunk_text + para) > self.max_chunk_size and current_chunk_text:
+            if current_paragraphs and current_len + len(para) > self.max_chunk_size:
                 # Create chunk with current content
-                chunk = self._create_chunk(current_chunk_text, preservation_map, section, group_idx)
+                chunk = self._create_chunk('\n\n'.join(current_paragraphs), preservation_map, section, group_idx)
                 chunks.append(chunk)
                 
                 # Start new chunk with overlap if possible
-                if current_paragraphs and len(current_paragraphs[-1]) < self.overlap:
-                    current_chunk_text = current_paragraphs[-1] + "\n\n" + para
+                if len(current_paragraphs[-1]) < self.overlap:
                     current_paragraphs = [current_paragraphs[-1], para]
+                    current_len = len(current_paragraphs[0]) + 2 + len(para)
                 else:
-                    current_chunk_text = para
                     current_paragraphs = [para]
+                    current_len = len(para)
             else:
                 # Add paragraph to current chunk
-                if current_chunk_text:
-                    current_chunk_text += "\n\n" + para
-                else:
-                    current_chunk_text = para
+                if current_paragraphs:
+                    current_len += 2
                 current_paragraphs.append(para)
+                current_len += len(para)
         
         # Create final chunk if there's remaining content
-        if current_chunk_text.strip():
-            chunk = self._create_chunk(current_chunk_text, preservation_map, section, group_idx)
+        if current_paragraphs:
+            chunk = self._create_chunk('\n\n'.join(current_paragraphs), preservation_map, section, group_idx)
             chunks.append(chunk)
         
         return chunks
     
     def _restore_special_content(self, text: str, preservation_map: Dict[str, Dict]) -> str:
         """Restore formulas and tables from placeholders."""
-        restored_text = text
+        def restore(match):
+            content_data = preservation_map.get(match.group(0))
+            return content_data['content'] if content_data is not None else match.group(0)
         
-        for placeholder_id, content_data in preservation_map.items():
-            if placeholder_id in restored_text:
-                original_content = content_data['content']
-                restored_text = restored_text.replace(placeholder_id, original_content)
-        
-        return restored_text
+        # One scan over the text instead of one str.replace per map entry
+        return self._placeholder_re.sub(restore, text)
     
     def _generate_chunk_id(self, text: str) -> str:
         """Generate unique ID for chunk based on content."""
-        # Create hash of content for unique ID
-        content_hash = hashlib.md5(text.encode('utf-8')).hexdigest()[:12]
-        return f"chunk_{content_hash}"
\ No newline at end of file
+        # Create hash of content for unique ID (6-byte BLAKE2b = 12 hex chars)
+        content_hash = hashlib.blake2b(text.encode('utf-8'), digest_size=6).hexdigest()
+        return f"chunk_{content_hash}"
+
+
+_shared_chunker: Optional[SmartChunker] = None
+
+
+def get_smart_chunker() -> SmartChunker:
+    """Return a process-wide SmartChunker instance (loads the spaCy model once)."""
+    global _shared_chunker
+    if _shared_chunker is None:
+        _shared_chunker = SmartChunker()
+    return _shared_chunker
+
+
+# Process pool for chunking sections in parallel, shared by all chunkers with
+# the same settings; each worker builds its own SmartChunker once
+_section_pool: Optional[ProcessPoolExecutor] = None
+_section_pool_config: Optional[Tuple[int, int, int]] = None
+_section_pool_lock = threading.Lock()
+_worker_chunker: Optional[SmartChunker] = None
+
+
+def _init_section_worker(max_chunk_size: int, overlap: int) -> None:
+    """Create the worker process's chunker (and spaCy model)."""
+    global _worker_chunker
+    _worker_chunker = SmartChunker(max_chunk_size, overlap)
+
+
+def _chunk_section_in_worker(job: Tuple[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Chunk one (section_text, section) pair in a worker process."""
+    section_text, section = job
+    return _worker_chunker._chunk_section(section_text, section, [])
+
+
+def _get_section_pool(max_workers: int, max_chunk_size: int, overlap: int) -> ProcessPoolExecutor:
+    """Return the section worker pool, creating it for these settings if needed."""
+    global _section_pool, _section_pool_config
+    config = (max_workers, max_chunk_size, overlap)
+    with _section_pool_lock:
+        if _section_pool is None or _section_pool_config != config:
+            if _section_pool is not None:
+                _section_pool.shutdown(wait=False)
+            # spawn, not fork: the app process runs server threads
+            _section_pool = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_section_worker,
+                initargs=(max_chunk_size, overlap)
+            )
+            _section_pool_config = config
+        return _section_pool
+
+
+def _discard_section_pool() -> None:
+    """Drop a broken section worker pool so the next call starts a new one."""
+    global _section_pool, _section_pool_config
+    with _section_pool_lock:
+        if _section_pool is not None:
+            _section_pool.shutdown(wait=False)
+        _section_pool = None
+        _section_pool_config = None